@@ -1,6 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from bot.models import TgUser, TgChatState
+from bot.broadcast import queue_broadcast
+from bot.models import TgUser, TgChatState, TgUpdate, TgOutbox, TgReminder, TgBroadcast, TgOffset
 
 
 @admin.register(TgUser)
@@ -17,3 +18,66 @@ class TgChatStateAdmin(admin.ModelAdmin):
 
     list_display = ('tg_user', 'category', 'is_create_command',)
     search_fields = ('tg_user',)
+
+
+@admin.register(TgUpdate)
+class TgUpdateAdmin(admin.ModelAdmin):
+    """Регистрация модели TgUpdate для отображения в панели администратора"""
+
+    list_display = ('update_id', 'chat_id', 'status', 'attempts', 'created', 'processed',)
+    list_filter = ('status',)
+    search_fields = ('update_id', 'chat_id',)
+
+
+@admin.register(TgOutbox)
+class TgOutboxAdmin(admin.ModelAdmin):
+    """Регистрация модели TgOutbox для отображения в панели администратора"""
+
+    list_display = ('chat_id', 'status', 'attempts', 'next_attempt', 'created', 'sent',)
+    list_filter = ('status',)
+    search_fields = ('chat_id',)
+
+
+@admin.register(TgReminder)
+class TgReminderAdmin(admin.ModelAdmin):
+    """Регистрация модели TgReminder для отображения в панели администратора"""
+
+    list_display = ('goal', 'due_date', 'sent',)
+    raw_id_fields = ('goal',)
+
+
+@admin.register(TgBroadcast)
+class TgBroadcastAdmin(admin.ModelAdmin):
+    """Регистрация модели TgBroadcast для отображения в панели администратора
+
+    Действие "Запустить рассылку" ставит рассылку в очередь, из которой ее выполняет команда runbroadcasts;
+    рассылку также можно выполнить командой broadcast
+    """
+
+    list_display = ('__str__', 'status', 'total', 'delivered', 'failed', 'created', 'started', 'finished',)
+    list_filter = ('status',)
+    readonly_fields = ('status', 'last_tg_user_id', 'total', 'delivered', 'failed', 'started', 'finished', 'heartbeat',)
+    actions = ('start', 'stop',)
+
+    @admin.action(description='Запустить рассылку')
+    def start(self, request, queryset):
+        for broadcast in queryset:
+            if queue_broadcast(broadcast.pk):
+                self.message_user(request, f'Рассылка "{broadcast}" поставлена в очередь')
+            else:
+                self.message_user(request, f'Рассылка "{broadcast}" уже в очереди, выполняется или завершена',
+                                  level=messages.WARNING)
+
+    @admin.action(description='Остановить рассылку')
+    def stop(self, request, queryset):
+        stopped = queryset.filter(
+            status__in=(TgBroadcast.Status.queued, TgBroadcast.Status.running),
+        ).update(status=TgBroadcast.Status.paused)
+        self.message_user(request, f'Остановлено рассылок: {stopped}')
+
+
+@admin.register(TgOffset)
+class TgOffsetAdmin(admin.ModelAdmin):
+    """Регистрация модели TgOffset для отображения в панели администратора"""
+
+    list_display = ('name', 'offset', 'updated',)
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from bot.models import TgBroadcast, TgUser
+from bot.tg.client import TgClient, TgClientError, get_tg_client
+from bot.tg.dispatcher import TokenBucket
+
+
+class Broadcaster:
+    """Рассылка сообщения всем верифицированным Telegram пользователям
+
+    Получатели читаются из БД курсором на стороне сервера (QuerySet.iterator) по возрастанию id и
+    отправляются пачками пулом потоков с общим ограничением частоты (маркерная корзина). При ответе 429
+    все потоки приостанавливаются на retry_after секунд, и сообщение отправляется повторно; остальные
+    ошибки API (например, бот заблокирован пользователем) учитываются как недоставленные сообщения.
+    После каждой пачки прогресс и heartbeat сохраняются в TgBroadcast; если статус рассылки изменен
+    (например, рассылка остановлена в панели администратора), отправка прекращается.
+
+    Args:
+        tg_client: Telegram клиент (повторы при 429 выполняет рассылка)
+        rate (float): максимальное количество сообщений в секунду
+        workers (int): количество потоков отправки
+        chunk_size (int): количество получателей в пачке (между сохранениями прогресса)
+    """
+
+    def __init__(self, tg_client: TgClient | None = None, rate: float | None = None,
+                 workers: int = 8, chunk_size: int = 500):
+        if tg_client is None:
+            tg_client = get_tg_client()
+            tg_client.retry_rate_limited = False
+        self.tg_client = tg_client
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+        self._bucket = TokenBucket(rate=rate or settings.BOT_GLOBAL_RATE, capacity=1)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    @staticmethod
+    def claim(broadcast_id: int, force: bool = False) -> bool:
+        """Переводит рассылку в статус running, если она не выполняется и не завершена
+
+        Args:
+            force (bool): продолжить рассылку в статусе running (процесс, выполнявший ее, завершился аварийно)
+        Returns:
+            bool: удалось ли запустить рассылку
+        """
+        statuses = [TgBroadcast.Status.new, TgBroadcast.Status.paused, TgBroadcast.Status.queued]
+        if force:
+            statuses.append(TgBroadcast.Status.running)
+        now = timezone.now()
+        return bool(TgBroadcast.objects.filter(pk=broadcast_id, status__in=statuses).update(
+            status=TgBroadcast.Status.running,
+            started=now,
+            heartbeat=now,
+        ))
+
+    @staticmethod
+    def claim_next(stale: float) -> TgBroadcast | None:
+        """Переводит в статус running первую рассылку в очереди или рассылку, прогресс которой не сохранялся
+
+        Args:
+            stale (float): через сколько секунд без сохранения прогресса выполняемая рассылка считается
+                прерванной (должно превышать время отправки пачки)
+        Returns:
+            TgBroadcast | None: захваченная рассылка (None - нет рассылок для выполнения)
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            broadcast = TgBroadcast.objects.select_for_update(skip_locked=True).filter(
+                Q(status=TgBroadcast.Status.queued)
+                | Q(status=TgBroadcast.Status.running, heartbeat__lt=now - timedelta(seconds=stale))
+                #: Рассылки, запущенные до появления heartbeat
+                | Q(status=TgBroadcast.Status.running, heartbeat__isnull=True)
+            ).order_by('id').first()
+            if broadcast is None:
+                return None
+            if broadcast.status == TgBroadcast.Status.running:
+                logging.getLogger(__name__).warning('Resuming stale broadcast %s', broadcast.pk)
+            broadcast.status = TgBroadcast.Status.running
+            broadcast.started = broadcast.started or now
+            broadcast.heartbeat = now
+            broadcast.save(update_fields=('status', 'started', 'heartbeat',))
+        return broadcast
+
+    def _acquire(self) -> None:
+        """Ожидает разрешения на отправку одного сообщения"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self._paused_until - now, self._bucket.delay(now))
+                if wait <= 0:
+                    self._bucket.consume(now)
+                    return
+            time.sleep(wait)
+
+    def _send(self, chat_id: int, text: str) -> bool:
+        while True:
+            self._acquire()
+            try:
+                self.tg_client.send_message(chat_id=chat_id, text=text)
+                return True
+            except TgClientError as e:
+                if e.error_code == 429:
+                    with self._lock:
+                        self._paused_until = max(self._paused_until, time.monotonic() + (e.retry_after or 1))
+                    continue
+                self.logger.info('Broadcast to chat %s failed: %s', chat_id, e)
+                return False
+
+    def run(self, broadcast: TgBroadcast) -> TgBroadcast:
+        """Выполняет рассылку, начиная с получателя после сохраненного (рассылка должна быть в статусе running)
+
+        Returns:
+            TgBroadcast: рассылка с обновленным прогрессом
+        """
+        recipients = TgUser.objects.filter(user_id__isnull=False).order_by('id')
+        if not broadcast.total:
+            broadcast.total = recipients.count()
+            TgBroadcast.objects.filter(pk=broadcast.pk).update(total=broadcast.total)
+
+        chunk: list[tuple[int, int]] = []
+        stopped = False
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='broadcast') as executor:
+            for recipient in recipients.filter(id__gt=broadcast.last_tg_user_id).values_list(
+                    'id', 'tg_id').iterator(chunk_size=self.chunk_size):
+                chunk.append(recipient)
+                if len(chunk) >= self.chunk_size:
+                    if not self._flush(broadcast, chunk, executor):
+                        stopped = True
+                        break
+                    chunk = []
+            if chunk and not stopped:
+                stopped = not self._flush(broadcast, chunk, executor)
+
+        if not stopped:
+            TgBroadcast.objects.filter(pk=broadcast.pk, status=TgBroadcast.Status.running).update(
+                status=TgBroadcast.Status.done,
+                finished=timezone.now(),
+            )
+        broadcast.refresh_from_db()
+        self.logger.info('Broadcast %s: delivered=%s failed=%s of %s',
+                         broadcast.pk, broadcast.delivered, broadcast.failed, broadcast.total)
+        return broadcast
+
+    def _flush(self, broadcast: TgBroadcast, chunk: list[tuple[int, int]], executor: ThreadPoolExecutor) -> bool:
+        """Отправляет пачку и сохраняет прогресс
+
+        Returns:
+            bool: продолжать ли рассылку (False - статус рассылки изменен)
+        """
+        results = list(executor.map(lambda recipient: self._send(recipient[1], broadcast.text), chunk))
+        delivered = sum(results)
+        broadcast.last_tg_user_id = chunk[-1][0]
+        broadcast.delivered += delivered
+        broadcast.failed += len(results) - delivered
+        TgBroadcast.objects.filter(pk=broadcast.pk).update(
+            last_tg_user_id=broadcast.last_tg_user_id,
+            delivered=F('delivered') + delivered,
+            failed=F('failed') + len(results) - delivered,
+            heartbeat=timezone.now(),
+        )
+        return TgBroadcast.objects.filter(pk=broadcast.pk, status=TgBroadcast.Status.running).exists()
+
+
+def queue_broadcast(broadcast_id: int) -> bool:
+    """Ставит новую или остановленную рассылку в очередь команды runbroadcasts (для панели администратора)
+
+    Returns:
+        bool: поставлена ли рассылка в очередь (False - рассылка уже в очереди, выполняется или завершена)
+    """
+    return bool(TgBroadcast.objects.filter(
+        pk=broadcast_id,
+        status__in=(TgBroadcast.Status.new, TgBroadcast.Status.paused),
+    ).update(status=TgBroadcast.Status.queued))
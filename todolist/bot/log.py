@@ -0,0 +1,47 @@
+import json
+import logging
+import random
+
+#: set: Стандартные атрибуты LogRecord (остальные атрибуты переданы через extra)
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sampled'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись журнала как одну строку JSON
+
+    Поля: time, level, logger, message, поля из extra и exc_info (при наличии исключения).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Пропускает долю rate записей, отмеченных extra={'sampled': True}; остальные записи пропускаются всегда
+
+    Выборочно записываются частые события (например, обработка каждого обновления), а предупреждения,
+    ошибки и периодические отчеты попадают в журнал полностью.
+
+    Args:
+        rate (float): доля записываемых событий (от 0 до 1)
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sampled', False) or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate
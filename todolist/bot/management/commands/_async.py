@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import close_old_connections
+
+from bot.management.commands._offset import PendingUpdates, UpdateLog
+from bot.management.commands._store import DbStore
+from bot.tg.client import TgClient, TgClientError, AsyncTgClient
+from bot.tg.dc import Update
+from bot.tg.metrics import POLL_UPDATES
+
+
+class AsyncRunner:
+    """Асинхронная среда выполнения Telegram бота
+
+    Обновления разных чатов обрабатываются параллельно, обновления одного чата -
+    строго по порядку (для каждого активного чата создается своя очередь и задача-обработчик).
+    Работа с БД и отправка сообщений выполняются в ограниченном пуле потоков. Количество полученных,
+    но еще не обработанных обновлений ограничено max_pending: при достижении предела получение
+    обновлений приостанавливается до завершения обработки (память не растет при задержках БД).
+    getUpdates вызывается с offset наименьшего необработанного обновления (см. PendingUpdates), и это же
+    значение сохраняется перед запросом, поэтому обновления из очередей чатов не теряются при аварийном завершении.
+
+    Args:
+        tg_client: Telegram клиент
+        sender: объект с методом send_message для отправки ответов (по умолчанию tg_client)
+        store: хранилище Telegram пользователей и состояний чатов (по умолчанию - прямые запросы к БД)
+        concurrency (int): максимальное количество одновременно обрабатываемых чатов
+        orm_workers (int): размер пула потоков для работы с БД
+        max_pending (int): максимальное количество полученных, но еще не обработанных обновлений
+    """
+
+    def __init__(self, tg_client: TgClient, concurrency: int, orm_workers: int, sender=None,
+                 store: DbStore | None = None, max_pending: int = 1000):
+        self.tg_client = tg_client
+        self.sender = sender or tg_client
+        self.store = store or DbStore()
+        self.log = UpdateLog()
+        self.async_client = AsyncTgClient(tg_client=tg_client, max_workers=1)
+        self.concurrency = concurrency
+        self.orm_workers = orm_workers
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
+
+        #: dict: идентификатор чата -> очередь необработанных обновлений
+        self._queues: dict[int, asyncio.Queue] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._pending: asyncio.Semaphore | None = None
+        self._received: PendingUpdates | None = None
+        #: Событие завершения обработки обновления (ожидается, если getUpdates не вернул новых обновлений)
+        self._progress: asyncio.Event | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def run(self) -> None:
+        """Запускает цикл событий (блокирующий вызов)"""
+        asyncio.run(self.poll())
+
+    async def poll(self) -> None:
+        """Получает обновления методом long polling и распределяет их по очередям чатов"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self._progress = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.orm_workers, thread_name_prefix='bot-orm')
+
+        loop = asyncio.get_running_loop()
+        self._received = PendingUpdates(
+            await loop.run_in_executor(self._executor, self._call_db, self.log.get_offset)
+        )
+        saved = self._received.offset
+        try:
+            while True:
+                self._progress.clear()
+                offset = self._received.offset
+                if offset > saved:
+                    await loop.run_in_executor(self._executor, self._call_db, partial(self.log.save_offset, offset))
+                    saved = offset
+                try:
+                    response = await self.async_client.get_updates(offset=offset)
+                except TgClientError as e:
+                    self.logger.warning('getUpdates failed: %s', e)
+                    await asyncio.sleep(self.tg_client.backoff)
+                    continue
+                loop.run_in_executor(self._executor, self._call_db, self.log.cleanup)
+                POLL_UPDATES.observe(len(response.result))
+                updates = self._received.add(response.result)
+                if response.result and not updates:
+                    #: Получены только обновления, ожидающие обработки: повтор запроса - после продвижения offset
+                    try:
+                        await asyncio.wait_for(self._progress.wait(), timeout=1)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                for update in updates:
+                    if update.chat_id is None:
+                        self._received.done(update.update_id)
+                        continue
+                    #: Освобождается обработчиком чата после обработки обновления
+                    await self._pending.acquire()
+                    self.dispatch(update)
+        finally:
+            self._executor.shutdown(wait=True)
+            self.async_client.close()
+
+    def dispatch(self, update: Update) -> None:
+        """Помещает обновление в очередь его чата и запускает обработчик чата при необходимости"""
+        if update.chat_id is None:
+            return
+
+        chat_id = update.chat_id
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.Queue()
+            task = asyncio.create_task(self._chat_worker(chat_id, queue))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        queue.put_nowait(update)
+
+    async def _chat_worker(self, chat_id: int, queue: asyncio.Queue) -> None:
+        """Последовательно обрабатывает обновления одного чата, пока его очередь не опустеет"""
+        loop = asyncio.get_running_loop()
+        try:
+            while not queue.empty():
+                update = queue.get_nowait()
+                try:
+                    async with self._semaphore:
+                        await loop.run_in_executor(self._executor, self._process, update)
+                finally:
+                    self._received.done(update.update_id)
+                    self._progress.set()
+                    self._pending.release()
+        finally:
+            #: Между проверкой пустой очереди и удалением нет точек переключения,
+            #: поэтому новое обновление не может быть потеряно
+            del self._queues[chat_id]
+
+    @staticmethod
+    def _call_db(func):
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+
+    def _process(self, update: Update) -> None:
+        close_old_connections()
+        try:
+            self.log.process(update=update, tg_client=self.sender, store=self.store)
+        finally:
+            close_old_connections()
@@ -0,0 +1,153 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+
+from bot.management.commands._chat import BufferedSender, handle_update
+from bot.management.commands._offset import UpdateLog
+from bot.management.commands._store import CHAT_STATE_FIELDS, DbStore
+from bot.models import TgUser, TgChatState
+from bot.tg.client import TgClient
+from bot.tg.dc import MessageFrom, Update
+from bot.tg.metrics import UPDATE_ERRORS
+from goals import events
+from goals.events import Action, Entity
+from goals.models import Goal
+
+
+class BatchStore(DbStore):
+    """Хранилище Telegram пользователей и состояний чатов для пачки обновлений
+
+    Telegram пользователи и состояния чатов всех отправителей пачки загружаются двумя запросами (метод load),
+    изменения накапливаются в памяти и записываются методом flush одной транзакцией: новые пользователи,
+    измененные пользователи, состояния чатов и созданные цели - по одному массовому запросу на каждый вид.
+    """
+
+    def __init__(self):
+        self._tg_users: dict[int, TgUser] = {}
+        self._chat_states: dict[int, TgChatState] = {}
+        #: set: tg_id пользователей, отсутствующих в БД до записи пачки
+        self._new: set[int] = set()
+        #: dict: tg_id -> измененные поля пользователя
+        self._changed: dict[int, set[str]] = defaultdict(set)
+        self._changed_states: set[int] = set()
+        self._goals: list[Goal] = []
+
+    def load(self, senders: list[MessageFrom]) -> None:
+        """Загружает Telegram пользователей и состояния чатов отправителей пачки"""
+        tg_ids = {sender.id for sender in senders}
+        self._tg_users = {tg_user.tg_id: tg_user for tg_user in TgUser.objects.filter(tg_id__in=tg_ids)}
+        self._chat_states = {
+            chat_state.tg_user.tg_id: chat_state
+            for chat_state in TgChatState.objects.filter(tg_user__tg_id__in=tg_ids).select_related('tg_user')
+        }
+
+    def get_tg_user(self, message_from: MessageFrom) -> tuple[TgUser, bool]:
+        tg_user = self._tg_users.get(message_from.id)
+        if tg_user is None:
+            tg_user = self._tg_users[message_from.id] = TgUser(
+                tg_id=message_from.id,
+                tg_username=message_from.username,
+            )
+            self._new.add(message_from.id)
+            return tg_user, True
+
+        if tg_user.tg_username != message_from.username:
+            tg_user.tg_username = message_from.username
+            self._changed[tg_user.tg_id].add('tg_username')
+        return tg_user, False
+
+    def save_tg_user(self, tg_user: TgUser, update_fields: tuple) -> None:
+        self._changed[tg_user.tg_id].update(update_fields)
+
+    def get_chat_state(self, tg_user: TgUser) -> TgChatState:
+        chat_state = self._chat_states.get(tg_user.tg_id)
+        if chat_state is None:
+            chat_state = self._chat_states[tg_user.tg_id] = TgChatState(tg_user=tg_user)
+            self._changed_states.add(tg_user.tg_id)
+        return chat_state
+
+    def save_chat_state(self, chat_state: TgChatState, update_fields: tuple) -> None:
+        self._changed_states.add(chat_state.tg_user.tg_id)
+
+    def add_goal(self, goal: Goal) -> bool:
+        self._goals.append(goal)
+        return True
+
+    def flush(self) -> None:
+        """Записывает накопленные изменения в БД (вызывается внутри транзакции)"""
+        TgUser.objects.bulk_create([self._tg_users[tg_id] for tg_id in self._new])
+
+        changed: dict[tuple, list[TgUser]] = defaultdict(list)
+        for tg_id, fields in self._changed.items():
+            if tg_id not in self._new:
+                changed[tuple(sorted(fields))].append(self._tg_users[tg_id])
+        for fields, tg_users in changed.items():
+            TgUser.objects.bulk_update(tg_users, fields=fields)
+
+        if self._changed_states:
+            TgChatState.objects.bulk_create(
+                [self._chat_states[tg_id] for tg_id in self._changed_states],
+                update_conflicts=True,
+                unique_fields=('tg_user',),
+                update_fields=CHAT_STATE_FIELDS,
+            )
+        Goal.objects.bulk_create(self._goals)
+        events.record(*(
+            events.event(Entity.goal, Action.created, events.category_board_id(goal.category_id), goal.id, goal.user_id)
+            for goal in self._goals
+        ))
+
+
+def process_batch(updates: list[Update], tg_client: TgClient, log: UpdateLog | None = None) -> None:
+    """Обрабатывает пачку обновлений, полученных одним вызовом getUpdates
+
+    Обновления группируются по чатам (порядок внутри чата сохраняется), состояния чатов и отправители
+    загружаются двумя запросами на всю пачку, изменения записываются одной транзакцией, ответы
+    отправляются после ее фиксации. Если запись пачки не удалась, обновления обрабатываются
+    повторно по одному с прямыми запросами к БД.
+
+    Если передан журнал обработки, уже обработанные обновления пропускаются, а отметки об обработке
+    и новый offset записываются в той же транзакции.
+
+    Args:
+        updates: пачка входящих обновлений
+        tg_client: объект с методом send_message для отправки ответов
+        log: журнал обработки обновлений
+    """
+    logger = logging.getLogger(__name__)
+    store = BatchStore()
+    sender = BufferedSender(tg_client)
+    chats: dict[int, list[Update]] = defaultdict(list)
+    try:
+        with transaction.atomic():
+            if log:
+                log.save_offset(updates[-1].update_id + 1)
+                updates = log.exclude_processed(updates)
+                log.mark_processed(updates)
+            for update in updates:
+                if update.sender:
+                    chats[update.chat_id].append(update)
+
+            store.load([update.sender for items in chats.values() for update in items])
+            for items in chats.values():
+                for update in items:
+                    handle_update(update=update, tg_client=sender, store=store)
+            store.flush()
+    except Exception:
+        logger.exception('Failed to process batch of %s updates, falling back to one by one', len(updates))
+    else:
+        sender.release()
+        return
+
+    for update in updates:
+        if log:
+            log.process(update=update, tg_client=tg_client, offset=update.update_id + 1)
+            continue
+        try:
+            if update.sender:
+                with transaction.atomic():
+                    handle_update(update=update, tg_client=tg_client)
+        except Exception:
+            logger.exception('Failed to process update %s', update.update_id)
+            UPDATE_ERRORS.inc()
@@ -1,9 +1,17 @@
+import logging
+import time
+
+from django.db import connection
+
 from bot.management.commands._states import (
     BaseStateClass, NewState, NotVerifiedState, VerifiedState
 )
-from bot.models import TgUser
+from bot.management.commands._store import DbStore
 from bot.tg.client import TgClient
-from bot.tg.dc import Message
+from bot.tg.dc import CallbackQuery, Message, Update
+from bot.tg.metrics import UPDATE_DURATION, UPDATE_LAG, UPDATE_QUERIES, QueryCounter
+
+logger = logging.getLogger(__name__)
 
 
 class Chat:
@@ -12,10 +20,13 @@ class Chat:
     Args:
     message (Message): объект класса Message.
         Предоставляет доступ к атрибутам полученного сообщения.
+    callback_query (CallbackQuery): нажатие кнопки встроенной клавиатуры
+        (вместо сообщения).
     """
 
-    def __init__(self, message: Message):
+    def __init__(self, message: Message | None = None, callback_query: CallbackQuery | None = None):
         self.__message = message
+        self.__callback_query = callback_query
         #: Атрибут для хранения текущего состояния чата
         self.__state: BaseStateClass | None = None
 
@@ -26,31 +37,108 @@ class Chat:
             return self.__state
         raise RuntimeError('state does not set')
 
-    def set_state(self, tg_client: TgClient):
+    def set_state(self, tg_client: TgClient, store: DbStore | None = None):
         """Устанавливает текущее состояние чата:
 
         Args:
             tg_client: Telegram клиент. Предоставляет доступ
                 к функциям получения входящих обновлений и отправки сообщений.
+            store: хранилище Telegram пользователей и состояний чатов
+                (по умолчанию - прямые запросы к БД).
         Returns:
             None
         """
-        tg_user, created = TgUser.objects.get_or_create(
-            tg_id=self.__message.message_from.id,
-            tg_username=self.__message.message_from.username
-        )
+        store = store or DbStore()
+        sender = self.__message.message_from if self.__message else self.__callback_query.message_from
+        tg_user, created = store.get_tg_user(sender)
 
         if created:
-            self.__state = NewState(tg_user=tg_user, tg_client=tg_client)
+            self.__state = NewState(tg_user=tg_user, tg_client=tg_client, store=store)
         else:
             if not tg_user.user_id:
                 self.__state = NotVerifiedState(
                     tg_user=tg_user,
-                    tg_client=tg_client
+                    tg_client=tg_client,
+                    store=store
                 )
             else:
                 self.__state = VerifiedState(
                     tg_user=tg_user,
                     tg_client=tg_client,
-                    chat_msg=self.__message.text
+                    chat_msg=self.__message.text if self.__message else None,
+                    store=store,
+                    callback_query=self.__callback_query
                 )
+
+
+class BufferedSender:
+    """Накапливает исходящие сообщения и отправляет их после фиксации транзакции (метод release)
+
+    Args:
+        tg_client: объект с методами send_message, edit_message_reply_markup и answer_callback_query
+    """
+
+    def __init__(self, tg_client: TgClient):
+        self.tg_client = tg_client
+        self._calls: list[tuple[str, dict]] = []
+
+    def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self._calls.append(('send_message', {'chat_id': chat_id, 'text': text, **kwargs}))
+
+    def edit_message_reply_markup(self, chat_id: int, message_id: int, reply_markup: dict | None = None) -> None:
+        self._calls.append((
+            'edit_message_reply_markup', {'chat_id': chat_id, 'message_id': message_id, 'reply_markup': reply_markup}
+        ))
+
+    def answer_callback_query(self, callback_query_id: str, text: str | None = None) -> None:
+        self._calls.append(('answer_callback_query', {'callback_query_id': callback_query_id, 'text': text}))
+
+    def release(self) -> None:
+        """Выполняет накопленные вызовы в порядке поступления"""
+        for method, kwargs in self._calls:
+            getattr(self.tg_client, method)(**kwargs)
+        self._calls.clear()
+
+
+def handle_update(update: Update, tg_client: TgClient, store: DbStore | None = None) -> None:
+    """Обрабатывает одно входящее обновление: определяет состояние чата и выполняет его действия
+
+    Args:
+        update: входящее обновление
+        tg_client: Telegram клиент
+        store: хранилище Telegram пользователей и состояний чатов
+    Returns:
+        None
+    """
+    if not update.sender:
+        return
+
+    started = time.perf_counter()
+    lag = time.time() - update.message.date if update.message else None
+    chat = Chat(message=update.message, callback_query=update.callback_query)
+    queries = QueryCounter()
+
+    with connection.execute_wrapper(queries):
+        #: Инициализация текущего состояния чата
+        chat.set_state(tg_client=tg_client, store=store)
+
+        #: Выполнение действий для текущего состояния
+        chat.state.run_actions()
+
+    state = type(chat.state).__name__
+    duration = time.perf_counter() - started
+    UPDATE_DURATION.observe(duration, state)
+    UPDATE_QUERIES.observe(queries.count, state)
+    if lag is not None:
+        UPDATE_LAG.observe(lag)
+    #: Событие обработки записывается в журнал выборочно (см. settings.BOT_LOG_SAMPLE_RATE)
+    logger.info('Update processed', extra={
+        'sampled': True,
+        'update_id': update.update_id,
+        'chat_id': update.chat_id,
+        'state': state,
+        'duration': round(duration, 6),
+        'queries': queries.count,
+        'lag': lag,
+    })
+
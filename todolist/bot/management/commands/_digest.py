@@ -0,0 +1,188 @@
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection
+from django.db.models import CharField, Count, Exists, Func, OuterRef, Q
+from django.utils import timezone
+
+from bot.management.commands._processes import get_context
+from bot.models import TgUser
+from bot.tg.client import TgClient
+from goals.models import BoardParticipant, Goal
+
+#: Процессы пула создаются сервером процессов: команда к моменту запуска пула уже создала потоки
+#: (очередь отправки), которые не должны копироваться в процессы пула через fork
+_context = get_context()
+
+#: int: Максимальное количество целей в разделе сводки
+DIGEST_SECTION_LIMIT = 10
+
+#: int: Максимальная длина заголовка цели в сводке
+DIGEST_TITLE_LENGTH = 100
+
+#: tuple: Разделы сводки (ключ, заголовок)
+SECTIONS = (
+    ('overdue', 'Просрочены'),
+    ('due_today', 'Срок сегодня'),
+    ('completed', 'Выполнены вчера'),
+)
+
+
+def get_day_bounds(day: date) -> tuple[datetime, datetime]:
+    """Возвращает начало дня и начало следующего дня в часовом поясе проекта"""
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+
+def get_partitions(partitions: int) -> list[tuple[int, int | None]]:
+    """Делит верифицированных пользователей на диапазоны user_id примерно равного размера
+
+    Returns:
+        list: границы диапазонов [от, до) (None - без верхней границы)
+    """
+    user_ids = list(
+        TgUser.objects.filter(user_id__isnull=False).order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+    if not user_ids:
+        return []
+    size = max(1, -(-len(user_ids) // partitions))
+    bounds = user_ids[::size]
+    return [(low, high) for low, high in zip(bounds, bounds[1:] + [None])]
+
+
+def _section_query(low: int, high: int | None, condition: Q, ordering: str):
+    """Запрос одного раздела сводки, сгруппированный по участникам досок из диапазона user_id"""
+    goals = 'board__categories__goals'
+    participants = BoardParticipant.objects.filter(
+        Exists(TgUser.objects.filter(user_id=OuterRef('user_id'))),
+        condition,
+        user_id__gte=low,
+        board__is_deleted=False,
+        board__categories__is_deleted=False,
+    )
+    if high is not None:
+        participants = participants.filter(user_id__lt=high)
+    return participants.values('user_id').annotate(
+        #: Первые DIGEST_SECTION_LIMIT заголовков выбираются в запросе, остальные не передаются из БД
+        titles=Func(
+            ArrayAgg(f'{goals}__title', ordering=(f'{goals}__{ordering}', f'{goals}__id')),
+            template=f'(%(expressions)s)[1:{DIGEST_SECTION_LIMIT}]',
+            output_field=ArrayField(CharField()),
+        ),
+        total=Count(f'{goals}__id'),
+    ).order_by()
+
+
+def build_digests(day: date, low: int, high: int | None = None) -> dict[int, dict[str, tuple[list[str], int]]]:
+    """Формирует сводки пользователей из диапазона user_id [low, high) тремя групповыми запросами
+
+    Разделы: просроченные цели (срок до начала дня), цели со сроком в течение дня и цели, выполненные
+    накануне (статус 'Выполнено', дата изменения - предыдущий день; отдельная дата выполнения не хранится).
+    Учитываются цели всех досок, участником которых является пользователь.
+
+    Returns:
+        dict: user_id -> {раздел: (заголовки первых DIGEST_SECTION_LIMIT целей, общее количество)}
+    """
+    start, end = get_day_bounds(day)
+    goal = 'board__categories__goals__'
+    conditions = {
+        'overdue': (Q(**{f'{goal}status__lt': Goal.Status.done, f'{goal}due_date__lt': start}), 'due_date'),
+        'due_today': (Q(**{
+            f'{goal}status__lt': Goal.Status.done, f'{goal}due_date__gte': start, f'{goal}due_date__lt': end,
+        }), 'due_date'),
+        'completed': (Q(**{
+            f'{goal}status': Goal.Status.done,
+            f'{goal}updated__gte': start - timedelta(days=1),
+            f'{goal}updated__lt': start,
+        }), 'updated'),
+    }
+
+    digests: dict[int, dict[str, tuple[list[str], int]]] = {}
+    for section, (condition, ordering) in conditions.items():
+        for row in _section_query(low, high, condition, ordering).iterator(chunk_size=2000):
+            digests.setdefault(row['user_id'], {})[section] = (row['titles'], row['total'])
+    return digests
+
+
+def format_digest(day: date, sections: dict[str, tuple[list[str], int]]) -> str:
+    """Возвращает текст сводки"""
+    parts = [f'Сводка на {day:%d.%m.%Y}']
+    for section, caption in SECTIONS:
+        if section not in sections:
+            continue
+        titles, total = sections[section]
+        lines = [f'{caption} ({total}):'] + [
+            '- ' + (title if len(title) <= DIGEST_TITLE_LENGTH else title[:DIGEST_TITLE_LENGTH - 1] + '…')
+            for title in titles
+        ]
+        if total > len(titles):
+            lines.append(f'... и еще {total - len(titles)}')
+        parts.append('\n'.join(lines))
+    return '\n\n'.join(parts)
+
+
+def _build_partition(day: date, low: int, high: int | None) -> list[tuple[int, str]]:
+    """Формирует сообщения сводки для диапазона пользователей (выполняется в процессе пула)"""
+    digests = build_digests(day, low, high)
+    messages = []
+    for user_id, tg_id in TgUser.objects.filter(
+            user_id__in=digests.keys()
+    ).order_by('user_id').values_list('user_id', 'tg_id'):
+        messages.append((tg_id, format_digest(day, digests[user_id])))
+    return messages
+
+
+def generate_digests(day: date, partitions: int = 1, processes: int = 1):
+    """Формирует сводки всех верифицированных пользователей
+
+    Пользователи делятся на partitions диапазонов user_id; диапазоны обрабатываются пулом из processes
+    процессов (processes=1 - в текущем процессе).
+
+    Yields:
+        list: сообщения (tg_id, текст) очередного диапазона, по мере готовности
+    """
+    bounds = get_partitions(partitions)
+    if processes <= 1:
+        for low, high in bounds:
+            yield _build_partition(day, low, high)
+        return
+
+    with _context.Pool(processes=processes, initializer=_init_worker,
+                       initargs=(connection.settings_dict['NAME'],)) as pool:
+        yield from pool.imap_unordered(_build_partition_args, [(day, low, high) for low, high in bounds])
+
+
+def _init_worker(database: str) -> None:
+    """Настраивает процесс пула на БД основного процесса (например, временную БД нагрузочного теста)"""
+    connection.settings_dict['NAME'] = database
+
+
+def _build_partition_args(args: tuple) -> list[tuple[int, str]]:
+    return _build_partition(*args)
+
+
+def send_digests(messages, sender: TgClient, max_pending: int = 10_000) -> int:
+    """Ставит сообщения сводки в очередь отправки, ограничивая количество неотправленных сообщений
+
+    Args:
+        messages: пачки сообщений (tg_id, текст), см. generate_digests
+        sender: объект с методом send_message; если это очередь исходящих сообщений (метод stats),
+            постановка приостанавливается, пока в очереди больше max_pending сообщений
+        max_pending (int): максимальная глубина очереди отправки
+    Returns:
+        int: количество поставленных в очередь сообщений
+    """
+    logger = logging.getLogger(__name__)
+    count = 0
+    for batch in messages:
+        for tg_id, text in batch:
+            if count % 100 == 0 and hasattr(sender, 'stats'):
+                while sender.stats()['queue_depth'] >= max_pending:
+                    time.sleep(0.1)
+            sender.send_message(chat_id=tg_id, text=text)
+            count += 1
+        logger.info('Queued %s digests', count)
+    return count
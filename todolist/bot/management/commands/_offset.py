@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from bot.management.commands._chat import BufferedSender, handle_update
+from bot.management.commands._store import DbStore
+from bot.models import TgOffset, TgProcessedUpdate
+from bot.tg.client import TgClient
+from bot.tg.dc import Update
+from bot.tg.metrics import UPDATE_ERRORS
+
+
+class PendingUpdates:
+    """Полученные, но еще не обработанные обновления (для сред выполнения с параллельной обработкой)
+
+    Telegram считает подтвержденными все обновления до offset вызова getUpdates, поэтому offset
+    (и его сохраненное значение) - наименьший идентификатор необработанного обновления, а не следующий
+    после последнего полученного: после сбоя обновления, ожидавшие обработки в очередях других чатов,
+    будут получены снова. Повторно полученные обновления, уже переданные на обработку, метод add отбрасывает.
+
+    Args:
+        offset (int): сохраненный offset
+    """
+
+    def __init__(self, offset: int):
+        self._next = offset
+        self._pending: set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def offset(self) -> int:
+        """Наименьший идентификатор необработанного обновления (или следующий после полученных)"""
+        with self._lock:
+            return min(self._pending, default=self._next)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, updates: list[Update]) -> list[Update]:
+        """Регистрирует ответ getUpdates
+
+        Returns:
+            list: обновления, полученные впервые
+        """
+        with self._lock:
+            new = [update for update in updates if update.update_id >= self._next]
+            if new:
+                self._next = new[-1].update_id + 1
+                self._pending.update(update.update_id for update in new)
+            return new
+
+    def done(self, update_id: int) -> None:
+        """Отмечает завершение обработки обновления (успешной или окончательно неудачной)"""
+        with self._lock:
+            self._pending.discard(update_id)
+
+
+class UpdateLog:
+    """Журнал обработки входящих обновлений
+
+    Хранит offset метода getUpdates и идентификаторы обработанных обновлений. Отметка об обработке
+    записывается в одной транзакции с изменениями, выполненными при обработке (состояния чатов должны
+    записываться в той же транзакции, см. CachedStore.write_through), а ответы отправляются после
+    фиксации транзакции: повторно доставленное обновление (например, после перезапуска) пропускается
+    без повторного создания целей и отправки сообщений. Сохраненный offset не превышает идентификатор
+    наименьшего необработанного обновления (см. PendingUpdates).
+
+    Args:
+        name (str): имя получателя обновлений (offset хранится отдельно для каждого)
+        ttl (int): срок хранения идентификаторов обработанных обновлений, секунды
+        cleanup_interval (float): минимальный период удаления устаревших идентификаторов, секунды
+        attempts (int): количество попыток обработки обновления (метод process)
+        retry_delay (float): пауза перед повторной попыткой, секунды (увеличивается с каждой попыткой)
+    """
+
+    def __init__(self, name: str = 'runbot', ttl: int | None = None, cleanup_interval: float = 3600,
+                 attempts: int = 3, retry_delay: float = 1.0):
+        self.name = name
+        self.ttl = settings.BOT_PROCESSED_TTL if ttl is None else ttl
+        self.cleanup_interval = cleanup_interval
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(__name__)
+        self._cleaned: float | None = None
+
+    def get_offset(self) -> int:
+        """Возвращает сохраненный offset (0 - обновления еще не обрабатывались)"""
+        offset, _ = TgOffset.objects.get_or_create(name=self.name)
+        return offset.offset
+
+    def save_offset(self, offset: int) -> None:
+        """Сохраняет offset; значение только увеличивается, поэтому порядок фиксации транзакций не важен
+
+        Передаваемое значение не должно превышать идентификатор наименьшего необработанного обновления.
+        """
+        TgOffset.objects.filter(name=self.name, offset__lt=offset).update(offset=offset, updated=timezone.now())
+
+    def exclude_processed(self, updates: list[Update]) -> list[Update]:
+        """Возвращает обновления, которые еще не обрабатывались (одним запросом)"""
+        processed = set(
+            TgProcessedUpdate.objects.filter(
+                update_id__in=[update.update_id for update in updates]
+            ).values_list('update_id', flat=True)
+        )
+        return [update for update in updates if update.update_id not in processed]
+
+    def mark_processed(self, updates: list[Update]) -> None:
+        """Отмечает обновления как обработанные (вызывается в транзакции обработки)"""
+        TgProcessedUpdate.objects.bulk_create([TgProcessedUpdate(update_id=update.update_id) for update in updates])
+
+    def handle_once(self, update: Update, tg_client: TgClient, store: DbStore | None = None,
+                    offset: int | None = None) -> bool:
+        """Обрабатывает обновление, если оно еще не обрабатывалось
+
+        Args:
+            offset (int | None): offset, сохраняемый в транзакции обработки (None - сохраняет вызывающий код)
+        Returns:
+            bool: было ли обновление обработано
+        """
+        sender = BufferedSender(tg_client)
+        try:
+            with transaction.atomic():
+                if offset is not None:
+                    self.save_offset(offset)
+                if not self.exclude_processed([update]):
+                    return False
+                handle_update(update=update, tg_client=sender, store=store)
+                self.mark_processed([update])
+                transaction.on_commit(sender.release)
+        except Exception:
+            #: Кэшированные данные отправителя могли быть изменены в откаченной транзакции
+            if store is not None and update.sender:
+                store.invalidate(update.sender.id)
+            raise
+        return True
+
+    def process(self, update: Update, tg_client: TgClient, store: DbStore | None = None,
+                offset: int | None = None) -> bool:
+        """Обрабатывает обновление (handle_once) с повторами при ошибке, например временной недоступности БД
+
+        Returns:
+            bool: успешно ли обработано обновление (False - ошибка после всех попыток записана в журнал)
+        """
+        for attempt in range(1, self.attempts + 1):
+            try:
+                self.handle_once(update=update, tg_client=tg_client, store=store, offset=offset)
+                return True
+            except Exception:
+                if attempt == self.attempts:
+                    self.logger.exception('Failed to process update %s', update.update_id)
+                    UPDATE_ERRORS.inc()
+                    return False
+                self.logger.warning('Failed to process update %s (attempt %s), retrying',
+                                    update.update_id, attempt, exc_info=True)
+                #: Соединение, ставшее непригодным после ошибки, закрывается и открывается заново
+                close_old_connections()
+                time.sleep(self.retry_delay * attempt)
+        return False
+
+    def cleanup(self, force: bool = False) -> int:
+        """Удаляет идентификаторы обработанных обновлений старше ttl (не чаще, чем раз в cleanup_interval)
+
+        Returns:
+            int: количество удаленных записей
+        """
+        now = time.monotonic()
+        if not force and self._cleaned is not None and now - self._cleaned < self.cleanup_interval:
+            return 0
+        self._cleaned = now
+        deleted, _ = TgProcessedUpdate.objects.filter(
+            processed__lt=timezone.now() - timedelta(seconds=self.ttl)
+        ).delete()
+        if deleted:
+            self.logger.info('Removed %s processed update ids', deleted)
+        return deleted
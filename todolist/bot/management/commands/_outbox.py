@@ -0,0 +1,117 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from bot.models import TgOutbox
+from bot.tg.client import TgClient, TgClientError
+
+
+class OutboxWorker:
+    """Обработчик очереди исходящих уведомлений TgOutbox
+
+    Уведомления выбираются пачками через SELECT ... FOR UPDATE SKIP LOCKED в короткой транзакции, которая
+    только захватывает их: увеличивает счетчик попыток и переносит следующую попытку на lease секунд вперед.
+    Отправка выполняется вне транзакции, а результат каждого уведомления записывается отдельным запросом,
+    поэтому можно запускать несколько обработчиков, а уведомления обработчика, завершившегося во время
+    отправки, будут отправлены повторно после истечения lease.
+
+    Каждое уведомление отправляется одним запросом без повторов внутри клиента: при сетевой ошибке, ответе
+    5xx или 429 и непредвиденной ошибке следующая попытка планируется с экспоненциальной задержкой
+    (для 429 - не раньше retry_after), остальные ошибки API (например, бот заблокирован) окончательные.
+
+    Args:
+        tg_client: Telegram клиент (рекомендуется max_retries=0 и retry_rate_limited=False)
+        batch_size (int): количество уведомлений, выбираемых за один раз
+        max_attempts (int): количество попыток отправки до перевода в статус failed
+        backoff (float): задержка перед второй попыткой в секундах (далее удваивается)
+        max_backoff (float): максимальная задержка между попытками в секундах
+        lease (float): время, на которое захватываются уведомления пачки, секунды
+            (должно превышать время отправки пачки)
+        retention (int | None): срок хранения отправленных и окончательно неотправленных уведомлений, секунды
+            (по умолчанию - settings.BOT_OUTBOX_RETENTION)
+        cleanup_interval (float): минимальный период удаления устаревших уведомлений, секунды
+    """
+
+    def __init__(self, tg_client: TgClient, batch_size: int = 100, max_attempts: int = 5,
+                 backoff: float = 5, max_backoff: float = 3600, lease: float = 300,
+                 retention: int | None = None, cleanup_interval: float = 3600):
+        self.tg_client = tg_client
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.retention = settings.BOT_OUTBOX_RETENTION if retention is None else retention
+        self.cleanup_interval = cleanup_interval
+        self.logger = logging.getLogger(__name__)
+        self._cleaned: float | None = None
+
+    def get_queryset(self):
+        return TgOutbox.objects.filter(
+            status=TgOutbox.Status.pending,
+            next_attempt__lte=timezone.now(),
+        ).order_by('next_attempt')
+
+    def drain(self) -> int:
+        """Отправляет одну пачку уведомлений
+
+        Returns:
+            int: количество выбранных уведомлений
+        """
+        with transaction.atomic():
+            items = list(self.get_queryset().select_for_update(skip_locked=True)[:self.batch_size])
+            for item in items:
+                item.attempts += 1
+                item.next_attempt = timezone.now() + timedelta(seconds=self.lease)
+            TgOutbox.objects.bulk_update(items, fields=('attempts', 'next_attempt'))
+        for item in items:
+            self._send(item)
+            #: Результат не записывается, если после истечения lease уведомление захвачено другим обработчиком
+            TgOutbox.objects.filter(pk=item.pk, attempts=item.attempts).update(
+                status=item.status, next_attempt=item.next_attempt, error=item.error, sent=item.sent,
+            )
+        return len(items)
+
+    def _send(self, item: TgOutbox) -> None:
+        try:
+            self.tg_client.send_message(chat_id=item.chat_id, text=item.text)
+        except Exception as e:
+            item.error = str(e)[:255]
+            if isinstance(e, TgClientError):
+                retryable = e.error_code is None or e.error_code == 429 or e.error_code >= 500
+                retry_after = e.retry_after or 0
+            else:
+                self.logger.exception('Unexpected error delivering notification %s', item.pk)
+                retryable, retry_after = True, 0
+            if not retryable or item.attempts >= self.max_attempts:
+                self.logger.warning('Failed to deliver notification %s to chat %s: %s', item.pk, item.chat_id, e)
+                item.status = TgOutbox.Status.failed
+                return
+            delay = min(self.max_backoff, self.backoff * 2 ** (item.attempts - 1))
+            item.next_attempt = timezone.now() + timedelta(seconds=max(delay, retry_after))
+        else:
+            item.status = TgOutbox.Status.sent
+            item.sent = timezone.now()
+            item.error = ''
+
+    def cleanup(self, force: bool = False) -> int:
+        """Удаляет завершенные уведомления старше retention (не чаще, чем раз в cleanup_interval)
+
+        Returns:
+            int: количество удаленных уведомлений
+        """
+        now = time.monotonic()
+        if not force and self._cleaned is not None and now - self._cleaned < self.cleanup_interval:
+            return 0
+        self._cleaned = now
+        deleted, _ = TgOutbox.objects.filter(
+            created__lt=timezone.now() - timedelta(seconds=self.retention),
+            status__in=(TgOutbox.Status.sent, TgOutbox.Status.failed),
+        ).delete()
+        if deleted:
+            self.logger.info('Removed %s finished notifications', deleted)
+        return deleted
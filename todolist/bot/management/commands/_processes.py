@@ -0,0 +1,21 @@
+import multiprocessing
+
+import django
+from django.apps import apps
+
+if not apps.ready:
+    #: Модуль загружается сервером процессов (forkserver) заранее: дочерние процессы получают настроенный Django
+    django.setup()
+
+
+def get_context():
+    """Возвращает контекст multiprocessing для процессов-обработчиков команд бота
+
+    Процессы создаются через fork однопоточного сервера процессов (forkserver), а не основного процесса:
+    fork процесса с запущенными потоками (очередь отправки, сервер показателей, журнал) может оставить
+    в дочернем процессе захваченными блокировки этих потоков. Сервер процессов заранее загружает
+    этот модуль, поэтому Django настраивается в нем один раз, а не в каждом дочернем процессе.
+    """
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
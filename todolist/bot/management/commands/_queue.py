@@ -0,0 +1,109 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Abs, Coalesce
+from django.utils import timezone
+
+from bot.management.commands._chat import BufferedSender, handle_update
+from bot.models import TgUpdate
+from bot.tg.client import TgClient
+from bot.tg.dc import UpdateDecoder
+
+
+class QueueWorker:
+    """Обработчик очереди входящих обновлений TgUpdate (режим webhook)
+
+    Обновления выбираются по одному через SELECT ... FOR UPDATE SKIP LOCKED, поэтому несколько
+    обработчиков не получают одно и то же обновление. Каждое обновление обрабатывается в своей транзакции
+    вместе с отметкой о результате, а ответы отправляются после ее фиксации: повторная обработка
+    не отправляет ответ дважды, а ответы на откаченные изменения не отправляются. Каждый обработчик
+    отвечает за свою часть чатов (|chat_id| % partitions == partition: идентификаторы групп отрицательные,
+    обновления без чата - в части 0), что сохраняет порядок обработки сообщений одного чата.
+
+    Args:
+        tg_client: Telegram клиент
+        partition (int): номер части чатов, обрабатываемой этим обработчиком
+        partitions (int): общее количество частей
+        batch_size (int): максимальное количество обновлений, обрабатываемых за один вызов drain
+        max_attempts (int): количество попыток обработки обновления до перевода в статус failed
+        retention (int | None): срок хранения обработанных и окончательно неудачных обновлений, секунды
+            (по умолчанию - settings.BOT_UPDATE_RETENTION)
+        cleanup_interval (float): минимальный период удаления устаревших обновлений, секунды
+    """
+
+    def __init__(self, tg_client: TgClient, partition: int = 0, partitions: int = 1,
+                 batch_size: int = 100, max_attempts: int = 3, retention: int | None = None,
+                 cleanup_interval: float = 3600):
+        self.tg_client = tg_client
+        self.partition = partition
+        self.partitions = partitions
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retention = settings.BOT_UPDATE_RETENTION if retention is None else retention
+        self.cleanup_interval = cleanup_interval
+        self.logger = logging.getLogger(__name__)
+        self._cleaned: float | None = None
+
+    def get_queryset(self):
+        queryset = TgUpdate.objects.filter(status=TgUpdate.Status.pending)
+        if self.partitions > 1:
+            queryset = queryset.alias(
+                #: Остаток от деления в Postgres имеет знак делимого
+                partition=Abs(Coalesce('chat_id', Value(0))) % self.partitions
+            ).filter(partition=self.partition)
+        return queryset.order_by('update_id')
+
+    def drain(self) -> int:
+        """Обрабатывает до batch_size обновлений (каждое - в отдельной транзакции)
+
+        Returns:
+            int: количество выбранных обновлений
+        """
+        #: Обновление, обработка которого завершилась ошибкой, повторяется при следующем вызове
+        seen: list[int] = []
+        while len(seen) < self.batch_size:
+            with transaction.atomic():
+                item = self.get_queryset().exclude(id__in=seen).select_for_update(skip_locked=True).first()
+                if item is None:
+                    break
+                seen.append(item.id)
+                self._process(item)
+                item.save(update_fields=('status', 'attempts', 'processed',))
+        return len(seen)
+
+    def _process(self, item: TgUpdate) -> None:
+        item.attempts += 1
+        sender = BufferedSender(self.tg_client)
+        try:
+            with transaction.atomic():
+                handle_update(update=UpdateDecoder.load(item.payload), tg_client=sender)
+        except Exception:
+            self.logger.exception('Failed to process update %s', item.update_id)
+            if item.attempts >= self.max_attempts:
+                item.status = TgUpdate.Status.failed
+        else:
+            item.status = TgUpdate.Status.done
+            item.processed = timezone.now()
+            transaction.on_commit(sender.release)
+
+    def cleanup(self, force: bool = False) -> int:
+        """Удаляет завершенные обновления старше retention (не чаще, чем раз в cleanup_interval)
+
+        Returns:
+            int: количество удаленных обновлений
+        """
+        now = time.monotonic()
+        if not force and self._cleaned is not None and now - self._cleaned < self.cleanup_interval:
+            return 0
+        self._cleaned = now
+        deleted, _ = TgUpdate.objects.filter(
+            created__lt=timezone.now() - timedelta(seconds=self.retention),
+            status__in=(TgUpdate.Status.done, TgUpdate.Status.failed),
+        ).delete()
+        if deleted:
+            self.logger.info('Removed %s finished updates', deleted)
+        return deleted
@@ -0,0 +1,232 @@
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from bot.management.commands._chat import BufferedSender
+from bot.models import TgReminder, TgUser
+from bot.tg.client import TgClient
+from goals.models import Goal
+
+
+class TimingWheel:
+    """Хешированное колесо таймеров
+
+    Таймер попадает в ячейку номер (время срабатывания // tick) % количество ячеек; продвижение колеса
+    просматривает только ячейки прошедших тактов. Добавление и извлечение таймера выполняются за O(1)
+    независимо от количества таймеров. Таймеры, которые сработают через полный оборот колеса и позже,
+    остаются в ячейке до своего оборота.
+
+    Args:
+        tick (float): длительность такта, секунды
+        slots (int): количество ячеек
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 60):
+        self.tick = tick
+        self._slots: list[list[tuple[float, tuple, object]]] = [[] for _ in range(slots)]
+        self._keys: set[tuple] = set()
+        self._current: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._keys
+
+    def add(self, fire_at: float, key: tuple, item) -> bool:
+        """Добавляет таймер (время срабатывания - unix time)
+
+        Returns:
+            bool: был ли добавлен таймер (False - таймер с таким ключом уже есть)
+        """
+        if key in self._keys:
+            return False
+        number = int(fire_at // self.tick)
+        if self._current is not None and number < self._current:
+            number = self._current
+        self._slots[number % len(self._slots)].append((fire_at, key, item))
+        self._keys.add(key)
+        return True
+
+    def advance(self, now: float) -> list:
+        """Продвигает колесо до момента now и возвращает сработавшие таймеры"""
+        target = int(now // self.tick)
+        #: Больше одного оборота просматривать не нужно (при первом вызове - весь оборот)
+        start = target - len(self._slots) + 1
+        if self._current is not None:
+            start = max(start, self._current)
+
+        fired = []
+        for number in range(start, target + 1):
+            slot = self._slots[number % len(self._slots)]
+            if not slot:
+                continue
+            waiting = []
+            for entry in slot:
+                if entry[0] <= now:
+                    fired.append(entry[2])
+                    self._keys.discard(entry[1])
+                else:
+                    waiting.append(entry)
+            slot[:] = waiting
+        self._current = target
+        return fired
+
+
+class ReminderScheduler:
+    """Планировщик напоминаний о сроках целей
+
+    Раз в window секунд загружает из БД цели, напоминания о которых должны быть отправлены в следующем
+    окне: срок в интервале [граница предыдущей загрузки, now + lead + window) - запрос по частичному индексу
+    goal_due_date_idx, без просмотра всей таблицы. Цели, созданные или измененные после предыдущей загрузки
+    со сроком в уже загруженном интервале, выбираются отдельным запросом по индексу goal_updated_idx.
+    Напоминания хранятся в колесе таймеров и отправляются пачками: перед отправкой цели пачки
+    перепроверяются (срок мог быть перенесен, цель выполнена), отметки TgReminder записываются
+    в одной транзакции с постановкой сообщений в очередь, сообщения отправляются после ее фиксации.
+
+    Напоминание получают Telegram пользователи, привязанные к автору цели. Если напоминание опоздало
+    (например, планировщик не работал), оно отправляется сразу, пока срок цели не истек.
+
+    Args:
+        sender: объект с методом send_message (очередь исходящих сообщений с ограничением частоты)
+        lead (int): за сколько секунд до срока отправляется напоминание
+        window (int): длина загружаемого окна, секунды
+        tick (float): точность срабатывания, секунды
+        batch_size (int): количество напоминаний в одной транзакции
+        cleanup_interval (float): период удаления отметок об истекших сроках, секунды
+    """
+
+    def __init__(self, sender: TgClient, lead: int, window: int = 60, tick: float = 1.0,
+                 batch_size: int = 500, cleanup_interval: float = 3600):
+        self.sender = sender
+        self.lead = timedelta(seconds=lead)
+        self.window = timedelta(seconds=window)
+        self.batch_size = batch_size
+        self.cleanup_interval = cleanup_interval
+        self.wheel = TimingWheel(tick=tick, slots=max(1, math.ceil(window / tick)))
+        self.logger = logging.getLogger(__name__)
+        #: datetime: граница сроков, уже загруженных в колесо
+        self._scanned_until: datetime | None = None
+        #: datetime: с какого момента искать измененные цели при следующей загрузке
+        self._changed_since: datetime | None = None
+        self._cleaned: datetime | None = None
+
+    def get_queryset(self):
+        """Незавершенные цели авторов с привязанным Telegram, напоминание о текущем сроке которых не отправлено"""
+        return Goal.objects.filter(
+            Exists(TgUser.objects.filter(user_id=OuterRef('user_id'))),
+            ~Exists(TgReminder.objects.filter(goal_id=OuterRef('pk'), due_date=OuterRef('due_date'))),
+            due_date__isnull=False,
+            status__lt=Goal.Status.done,
+        )
+
+    def scan(self, now: datetime) -> int:
+        """Загружает в колесо напоминания следующего окна
+
+        Returns:
+            int: количество добавленных напоминаний
+        """
+        started = timezone.now()
+        until = now + self.lead + self.window
+        querysets = [self.get_queryset().filter(due_date__gte=self._scanned_until or now, due_date__lt=until)]
+        if self._scanned_until is not None and self._changed_since is not None:
+            querysets.append(self.get_queryset().filter(
+                updated__gte=self._changed_since,
+                due_date__gt=now,
+                due_date__lt=self._scanned_until,
+            ))
+
+        added = 0
+        for queryset in querysets:
+            for goal_id, due_date in queryset.values_list('id', 'due_date').iterator(chunk_size=2000):
+                fire_at = max((due_date - self.lead).timestamp(), now.timestamp())
+                added += self.wheel.add(fire_at, (goal_id, due_date), (goal_id, due_date))
+
+        self._scanned_until = until
+        #: Перекрытие на случай транзакций, зафиксированных после начала загрузки
+        self._changed_since = started - self.window
+        if added:
+            self.logger.info('Scheduled %s reminders, %s pending', added, len(self.wheel))
+        return added
+
+    def fire(self, items: list[tuple[int, datetime]]) -> int:
+        """Отправляет напоминания пачками
+
+        Returns:
+            int: количество поставленных в очередь сообщений
+        """
+        sent = 0
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            try:
+                sent += self._send_batch(batch)
+            except IntegrityError:
+                #: Часть напоминаний пачки записана другим экземпляром планировщика: остальные отправляются
+                #: по одному (записанные исключаются запросом get_queryset)
+                for item in batch:
+                    try:
+                        sent += self._send_batch([item])
+                    except IntegrityError:
+                        self.logger.warning('Skipped reminder for goal %s recorded concurrently', item[0])
+        return sent
+
+    def _send_batch(self, items: list[tuple[int, datetime]]) -> int:
+        due = dict(items)
+        sender = BufferedSender(self.sender)
+        with transaction.atomic():
+            goals = [
+                (goal_id, title, due_date, user_id)
+                for goal_id, title, due_date, user_id in self.get_queryset().filter(
+                    id__in=due.keys(), due_date__gt=timezone.now(),
+                ).values_list('id', 'title', 'due_date', 'user_id')
+                if due.get(goal_id) == due_date
+            ]
+            if not goals:
+                return 0
+            TgReminder.objects.bulk_create([
+                TgReminder(goal_id=goal_id, due_date=due_date) for goal_id, _, due_date, _ in goals
+            ])
+
+            chats: dict[int, list[int]] = {}
+            for user_id, tg_id in TgUser.objects.filter(
+                    user_id__in={user_id for *_, user_id in goals}
+            ).values_list('user_id', 'tg_id'):
+                chats.setdefault(user_id, []).append(tg_id)
+
+            count = 0
+            for _, title, due_date, user_id in goals:
+                text = f'Напоминание: срок цели "{title}" - {timezone.localtime(due_date):%d.%m.%Y %H:%M}'
+                for tg_id in chats.get(user_id, ()):
+                    sender.send_message(chat_id=tg_id, text=text)
+                    count += 1
+            transaction.on_commit(sender.release)
+        return count
+
+    def cleanup(self, now: datetime) -> int:
+        """Удаляет отметки о напоминаниях, срок которых истек (не чаще, чем раз в cleanup_interval)"""
+        if self._cleaned is not None and (now - self._cleaned).total_seconds() < self.cleanup_interval:
+            return 0
+        self._cleaned = now
+        deleted, _ = TgReminder.objects.filter(due_date__lt=now - self.lead).delete()
+        return deleted
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Основной цикл: загрузка окон, продвижение колеса и отправка сработавших напоминаний"""
+        stop = stop or threading.Event()
+        next_scan: datetime | None = None
+        while not stop.is_set():
+            now = timezone.now()
+            if next_scan is None or now >= next_scan:
+                self.scan(now)
+                self.cleanup(now)
+                next_scan = now + self.window
+            items = self.wheel.advance(now.timestamp())
+            if items:
+                sent = self.fire(items)
+                self.logger.info('Sent %s reminders', sent)
+            stop.wait(self.wheel.tick)
@@ -0,0 +1,244 @@
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from bot.management.commands._offset import PendingUpdates, UpdateLog
+from bot.management.commands._processes import get_context
+from bot.management.commands._store import CachedStore
+from bot.tg.client import TgClient, TgClientError
+from bot.tg.dispatcher import get_dispatcher
+from bot.tg.metrics import (
+    POLL_UPDATES, REGISTRY, MetricsServer, dispatcher_collector, store_collector
+)
+
+#: Процессы-обработчики (в том числе перезапускаемые из потока контроля) создаются сервером процессов
+_context = get_context()
+
+#: int: Количество показателей обработчика в общей памяти (обработано, ошибок, время обработки)
+_COUNTERS = 3
+
+
+def _run_worker(number: int, processes: int, updates, done, counters, metrics_port: int = 0) -> None:
+    """Цикл процесса-обработчика: последовательно обрабатывает обновления своей части чатов
+
+    О завершении обработки каждого обновления (успешной или окончательно неудачной) сообщается основному
+    процессу через очередь done: он сохраняет offset наименьшего необработанного обновления.
+
+    Показатели обработчика (время обработки по состояниям, запросы к БД, отправка сообщений)
+    публикуются на порту metrics_port + 1 + номер обработчика (metrics_port=0 - не публикуются).
+    """
+    #: Общее ограничение частоты отправки делится между процессами
+    dispatcher = get_dispatcher(global_rate=settings.BOT_GLOBAL_RATE / processes)
+    #: Чаты распределены между процессами, поэтому кэш состояний каждого процесса независим
+    store = CachedStore(
+        max_size=settings.BOT_STATE_CACHE_SIZE,
+        flush_interval=settings.BOT_STATE_FLUSH_INTERVAL,
+        write_through=True,
+    ).start()
+    server = None
+    if metrics_port:
+        REGISTRY.add_collector(dispatcher_collector(dispatcher))
+        REGISTRY.add_collector(store_collector(store))
+        server = MetricsServer(port=metrics_port + 1 + number).start()
+    log = UpdateLog()
+    offset = number * _COUNTERS
+    try:
+        while True:
+            update = updates.get()
+            if update is None:
+                break
+            started = time.perf_counter()
+            close_old_connections()
+            if not log.process(update=update, tg_client=dispatcher, store=store):
+                counters[offset + 1] += 1
+            done.put((number, update.update_id))
+            counters[offset] += 1
+            counters[offset + 2] += time.perf_counter() - started
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server:
+            server.stop()
+        store.stop()
+        dispatcher.stop()
+
+
+class ShardedRunner:
+    """Многопроцессная среда выполнения Telegram бота
+
+    Основной процесс получает обновления методом long polling и распределяет их по процессам-обработчикам
+    по идентификатору чата (chat.id % processes): все обновления одного чата обрабатываются одним процессом
+    по порядку. Процесс, завершившийся с ошибкой, перезапускается и заново получает все необработанные
+    обновления своих чатов (обновление, обработанное до сбоя, пропускается, см. UpdateLog.handle_once).
+    Основной процесс вызывает getUpdates и сохраняет offset наименьшего необработанного обновления
+    (см. PendingUpdates), поэтому обновления из очередей обработчиков не теряются и при его сбое.
+
+    Показатели обработчиков (количество обработанных обновлений, ошибок, среднее время обработки,
+    глубина очереди) хранятся в общей памяти и доступны через метод stats.
+
+    Args:
+        tg_client: Telegram клиент для получения обновлений
+        processes (int): количество процессов-обработчиков
+        queue_size (int): максимальная длина очереди обработчика (при заполнении получение обновлений
+            приостанавливается)
+        report_interval (float | None): период записи показателей обработчиков в журнал, секунды
+        metrics_port (int): порт показателей основного процесса; обработчики публикуют свои показатели
+            на следующих портах (0 - показатели обработчиков не публикуются)
+    """
+
+    def __init__(self, tg_client: TgClient, processes: int, queue_size: int = 1000,
+                 report_interval: float | None = None, metrics_port: int = 0):
+        self.tg_client = tg_client
+        self.processes = processes
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.metrics_port = metrics_port
+        self.logger = logging.getLogger(__name__)
+
+        self._queues = [_context.Queue(maxsize=queue_size) for _ in range(processes)]
+        #: Очередь сообщений обработчиков о завершении обработки: (номер обработчика, update_id)
+        self._done = _context.Queue()
+        #: list: по каждому обработчику - переданные ему, но еще не обработанные обновления (update_id -> Update)
+        self._outstanding: list[dict] = [{} for _ in range(processes)]
+        self._counters = _context.Array('d', processes * _COUNTERS)
+        self._workers: list = [None] * processes
+        self._restarts = [0] * processes
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _start_worker(self, number: int) -> None:
+        worker = _context.Process(
+            target=_run_worker,
+            args=(number, self.processes, self._queues[number], self._done, self._counters, self.metrics_port),
+            name=f'bot-worker-{number}',
+            daemon=True,
+        )
+        worker.start()
+        self._workers[number] = worker
+
+    def _supervise(self) -> None:
+        """Перезапускает завершившиеся процессы-обработчики"""
+        while not self._stopping.wait(1):
+            with self._lock:
+                for number, worker in enumerate(self._workers):
+                    if worker.is_alive() or self._stopping.is_set():
+                        continue
+                    self.logger.error('Worker %s exited with code %s, restarting', number, worker.exitcode)
+                    #: Процесс, завершенный сигналом, мог оставить захваченной блокировку чтения очереди,
+                    #: поэтому новый процесс получает новую очередь со всеми необработанными обновлениями
+                    self._queues[number] = _context.Queue(maxsize=self.queue_size)
+                    self._restarts[number] += 1
+                    self._start_worker(number)
+                    for update in list(self._outstanding[number].values()):
+                        self._queues[number].put(update)
+
+    def _report(self) -> None:
+        while not self._stopping.wait(self.report_interval):
+            for number, stats in enumerate(self.stats()):
+                self.logger.info(
+                    'Worker %s: processed=%s failed=%s avg=%.3fs queue=%s restarts=%s',
+                    number, stats['processed'], stats['failed'], stats['avg_time'],
+                    stats['queue_depth'], stats['restarts'],
+                )
+
+    def stats(self) -> list[dict]:
+        """Возвращает показатели процессов-обработчиков"""
+        result = []
+        for number in range(self.processes):
+            processed, failed, busy = self._counters[number * _COUNTERS:(number + 1) * _COUNTERS]
+            result.append({
+                'worker': number,
+                'processed': int(processed),
+                'failed': int(failed),
+                'avg_time': busy / processed if processed else 0.0,
+                'queue_depth': self._queues[number].qsize(),
+                'restarts': self._restarts[number],
+            })
+        return result
+
+    def dispatch(self, update) -> None:
+        """Помещает обновление в очередь процесса, обрабатывающего его чат"""
+        if update.chat_id is None:
+            return
+        number = update.chat_id % self.processes
+        with self._lock:
+            self._outstanding[number][update.update_id] = update
+        #: Ожидание с таймаутом: очередь может быть заменена при перезапуске обработчика
+        while True:
+            try:
+                self._queues[number].put(update, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _collect(self, received: PendingUpdates, timeout: float | None = None) -> None:
+        """Отмечает обновления, обработка которых завершена (ожидая первое сообщение не дольше timeout)"""
+        try:
+            item = self._done.get(timeout=timeout) if timeout else self._done.get_nowait()
+            while True:
+                number, update_id = item
+                with self._lock:
+                    self._outstanding[number].pop(update_id, None)
+                received.done(update_id)
+                item = self._done.get_nowait()
+        except queue.Empty:
+            pass
+
+    def run(self) -> None:
+        """Запускает процессы-обработчики и получение обновлений (блокирующий вызов)"""
+        with self._lock:
+            for number in range(self.processes):
+                self._start_worker(number)
+        threading.Thread(target=self._supervise, name='bot-supervisor', daemon=True).start()
+        if self.report_interval:
+            threading.Thread(target=self._report, name='bot-report', daemon=True).start()
+
+        log = UpdateLog()
+        received = PendingUpdates(log.get_offset())
+        saved = received.offset
+        try:
+            while True:
+                self._collect(received)
+                offset = received.offset
+                if offset > saved:
+                    log.save_offset(offset)
+                    saved = offset
+                try:
+                    response = self.tg_client.get_updates(offset=offset)
+                except TgClientError as e:
+                    self.logger.warning('getUpdates failed: %s', e)
+                    time.sleep(self.tg_client.backoff)
+                    continue
+                log.cleanup()
+                POLL_UPDATES.observe(len(response.result))
+                updates = received.add(response.result)
+                if response.result and not updates:
+                    #: Получены только обновления, ожидающие обработки: повтор запроса - после продвижения offset
+                    self._collect(received, timeout=1)
+                    continue
+                for update in updates:
+                    if update.chat_id is None:
+                        received.done(update.update_id)
+                        continue
+                    self.dispatch(update)
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Останавливает процессы-обработчики после обработки уже полученных обновлений"""
+        self._stopping.set()
+        with self._lock:
+            for worker_queue in self._queues:
+                try:
+                    worker_queue.put(None, timeout=timeout)
+                except queue.Full:
+                    pass
+            for worker in self._workers:
+                if worker is not None:
+                    worker.join(timeout)
+                    if worker.is_alive():
+                        worker.terminate()
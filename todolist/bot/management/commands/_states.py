@@ -1,9 +1,29 @@
 import random
+import re
 import string
 
-from bot.models import TgUser, TgChatState
+from django.contrib.postgres.search import SearchQuery, SearchRank
+
+from bot.management.commands._store import DbStore
+from bot.models import TgUser
 from bot.tg.client import TgClient
-from goals.models import Goal, Category
+from bot.tg.dc import CallbackQuery
+from bot.tg.dispatcher import MAX_MESSAGE_LENGTH
+from goals.models import GOAL_SEARCH_VECTOR, Goal, Category
+
+#: int: Максимальное количество целей на странице /goals
+GOALS_PAGE_SIZE = 20
+
+#: int: Максимальное количество категорий на странице клавиатуры /create
+CATEGORIES_PAGE_SIZE = 8
+
+#: int: Максимальное количество результатов /find
+FIND_LIMIT = 10
+
+#: int: Максимальное количество слов в запросе /find
+FIND_MAX_WORDS = 8
+
+_word_re = re.compile(r'\w+')
 
 
 class BaseStateClass:
@@ -14,33 +34,44 @@ class BaseStateClass:
             пользователя.
         tg_client: Telegram клиент. Предоставляет доступ к функциям получения
             входящих обновлений и отправки сообщений.
+        store: хранилище Telegram пользователей и состояний чатов
+            (по умолчанию - прямые запросы к БД).
+        callback_query: нажатие кнопки встроенной клавиатуры (вместо сообщения).
     """
 
-    def __init__(self, tg_user: TgUser, tg_client: TgClient):
+    def __init__(self, tg_user: TgUser, tg_client: TgClient, store: DbStore | None = None,
+                 callback_query: CallbackQuery | None = None):
         self._tg_user = tg_user
         self.__tg_client = tg_client
+        self._store = store or DbStore()
+        self._callback_query = callback_query
 
         #: str: Текст приветствия бота
         self._text: str | None = None
 
         #: list of string: Список разрешенных в чате команд
         self._allowed_commands: list = [
-            '/start', '/goals', '/create', '/cancel'
+            '/start', '/goals', '/next', '/prev', '/create', '/cancel'
         ]
 
         #: dict: Словарь с вариантами сообщений бота
         self._messages = {
             'allowed_commands': 'Для продолжения отправьте одну из команд:\n'
                                 '/goals - просмотреть все цели;\n'
+                                '/next, /prev - следующая и предыдущая страница целей;\n'
+                                '/find <текст> - найти цели по заголовку и описанию;\n'
                                 '/create - создать цель;\n'
                                 '/cancel - отменить создание цели.',
             'unknown_command': '[unknown command]\n',
             'verification_required': 'Необходимо пройти верификацию.',
-            'select_category': 'Отправьте название категории, '
-                               ' которой будет создана цель:\n',
+            'select_category': 'Выберите категорию, в которой будет создана цель:',
             'goal_title': 'Отправьте название цели.',
             'successful': '[successful]',
             'failure': '[failure]',
+            'categories_not_found': '[categories not found]',
+            'category_not_found': '[category not found]',
+            'keyboard_expired': '[keyboard expired]',
+            'find_usage': 'Отправьте /find и текст для поиска, например: /find отчет',
         }
 
     @staticmethod
@@ -59,15 +90,33 @@ class BaseStateClass:
 
         tg_user = self._tg_user
         tg_user.verification_code = code
-        tg_user.save(update_fields=('verification_code',))
+        self._store.save_tg_user(tg_user, update_fields=('verification_code',))
         return code
 
-    def _send_message(self, text: str) -> None:
-        self.__tg_client.send_message(chat_id=self._tg_user.tg_id, text=text)
+    def _send_message(self, text: str, reply_markup: dict | None = None) -> None:
+        if reply_markup is None:
+            self.__tg_client.send_message(chat_id=self._tg_user.tg_id, text=text)
+        else:
+            self.__tg_client.send_message(chat_id=self._tg_user.tg_id, text=text, reply_markup=reply_markup)
+
+    def _answer_callback(self, text: str | None = None) -> None:
+        """Подтверждает нажатие кнопки (Telegram показывает индикатор загрузки до ответа)"""
+        self.__tg_client.answer_callback_query(callback_query_id=self._callback_query.id, text=text)
+
+    def _edit_keyboard(self, reply_markup: dict | None) -> None:
+        """Заменяет (None - удаляет) клавиатуру сообщения, кнопка которого была нажата"""
+        if self._callback_query.message:
+            self.__tg_client.edit_message_reply_markup(
+                chat_id=self._callback_query.message.chat.id,
+                message_id=self._callback_query.message.message_id,
+                reply_markup=reply_markup,
+            )
 
     def run_actions(self) -> None:
         """Выполняет характерные для определенного состояния действия"""
 
+        if self._callback_query:
+            self._answer_callback()
         self._send_message(text=self._text)
         self._send_message(text=self.get_verification_code())
 
@@ -80,10 +129,13 @@ class NewState(BaseStateClass):
             пользователя.
         tg_client: Telegram клиент. Предоставляет доступ к функциям получения
             входящих обновлений и отправки сообщений.
+        store: хранилище Telegram пользователей и состояний чатов.
+        callback_query: нажатие кнопки встроенной клавиатуры.
     """
 
-    def __init__(self, tg_user: TgUser, tg_client: TgClient):
-        super().__init__(tg_user, tg_client)
+    def __init__(self, tg_user: TgUser, tg_client: TgClient, store: DbStore | None = None,
+                 callback_query: CallbackQuery | None = None):
+        super().__init__(tg_user, tg_client, store, callback_query)
 
         #: str: Текст приветствия бота
         self._text = 'Привет! Я Telegram бот проекта \"TodoList\"\n' \
@@ -98,10 +150,13 @@ class NotVerifiedState(BaseStateClass):
             пользователя.
         tg_client: Telegram клиент. Предоставляет доступ к функциям получения
             входящих обновлений и отправки сообщений.
+        store: хранилище Telegram пользователей и состояний чатов.
+        callback_query: нажатие кнопки встроенной клавиатуры.
     """
 
-    def __init__(self, tg_user: TgUser, tg_client: TgClient):
-        super().__init__(tg_user, tg_client)
+    def __init__(self, tg_user: TgUser, tg_client: TgClient, store: DbStore | None = None,
+                 callback_query: CallbackQuery | None = None):
+        super().__init__(tg_user, tg_client, store, callback_query)
 
         #: str: Текст приветствия бота
         self._text = 'С возвращением!\n' + self._messages[
@@ -116,38 +171,215 @@ class VerifiedState(BaseStateClass):
             пользователя.
         tg_client: Telegram клиент. Предоставляет доступ к функциям получения
             входящих обновлений и отправки сообщений.
+        chat_msg (str): текст полученного сообщения.
+        store: хранилище Telegram пользователей и состояний чатов.
+        callback_query: нажатие кнопки встроенной клавиатуры.
     """
 
     def __init__(self, tg_user: TgUser, tg_client: TgClient,
-                 chat_msg: str = None):
-        super().__init__(tg_user, tg_client)
+                 chat_msg: str = None, store: DbStore | None = None,
+                 callback_query: CallbackQuery | None = None):
+        super().__init__(tg_user, tg_client, store, callback_query)
         self.__chat_msg = chat_msg
-        self.__chat_state, _ = TgChatState.objects.get_or_create(
-            tg_user=tg_user)
+        self.__chat_state = self._store.get_chat_state(tg_user)
+
+    def _set_default(self) -> None:
+        self.__chat_state.set_default(commit=False)
+        self._store.save_chat_state(self.__chat_state, update_fields=('category', 'is_create_command',))
+
+    def _send_goals_page(self, after: int | None = None, before: int | None = None) -> None:
+        """Отправляет страницу списка целей
+
+        Страницы выбираются по ключу (id > after или id < before) одним запросом не более
+        чем GOALS_PAGE_SIZE + 1 строк; страница дополнительно ограничена длиной сообщения Telegram.
+        Границы отправленной страницы сохраняются в состоянии чата для команд /next и /prev.
+
+        Args:
+            after (int | None): id последней цели предыдущей страницы (None - первая страница)
+            before (int | None): id первой цели следующей страницы (для /prev)
+        """
+        goals = Goal.objects.filter(
+            category__board__participants__user_id=self._tg_user.user_id,
+            category__is_deleted=False,
+            status__lt=Goal.Status.archived,
+        )
+        if before is None:
+            goals = goals.filter(id__gt=after or 0).order_by('id')
+        else:
+            goals = goals.filter(id__lt=before).order_by('-id')
+        rows = list(goals.values_list('id', 'title')[:GOALS_PAGE_SIZE + 1])
+        if before is None:
+            has_prev, has_next = bool(after), len(rows) > GOALS_PAGE_SIZE
+        else:
+            has_prev, has_next = len(rows) > GOALS_PAGE_SIZE, True
+        rows = rows[:GOALS_PAGE_SIZE]
+
+        if not rows:
+            self._send_message(text='[goals not found]' if after is None and before is None else '[no more goals]')
+            return
+
+        #: Место под строку навигации
+        limit = MAX_MESSAGE_LENGTH - 100
+        page: list[tuple[int, str]] = []
+        length = 0
+        for row in rows:
+            length += len(row[1]) + 1
+            if length > limit:
+                if before is None:
+                    has_next = True
+                else:
+                    has_prev = True
+                break
+            page.append(row)
+        if before is not None:
+            page.reverse()
+
+        navigation = []
+        if has_prev:
+            navigation.append('/prev - предыдущая страница')
+        if has_next:
+            navigation.append('/next - следующая страница')
+        text = '\n'.join(title for _, title in page)
+        if navigation:
+            text += '\n\n' + '\n'.join(navigation)
+
+        self.__chat_state.goals_first_id, self.__chat_state.goals_last_id = page[0][0], page[-1][0]
+        self._store.save_chat_state(self.__chat_state, update_fields=('goals_first_id', 'goals_last_id',))
+        self._send_message(text=text)
+
+    def _send_search_results(self, text: str) -> None:
+        """Отправляет цели, найденные по словам запроса в заголовке и описании
+
+        Каждое слово ищется как префикс (отчет найдет 'отчеты'); поиск выполняется одним запросом
+        по индексу goal_search_idx, результаты упорядочены по релевантности.
+
+        Args:
+            text (str): текст запроса
+        """
+        words = _word_re.findall(text)[:FIND_MAX_WORDS]
+        if not words:
+            self._send_message(text=self._messages['find_usage'])
+            return
+
+        query = SearchQuery(' & '.join(f'{word}:*' for word in words), config='simple', search_type='raw')
+        rows = Goal.objects.annotate(
+            search=GOAL_SEARCH_VECTOR,
+            rank=SearchRank(GOAL_SEARCH_VECTOR, query),
+        ).filter(
+            search=query,
+            category__board__participants__user_id=self._tg_user.user_id,
+            category__is_deleted=False,
+            status__lt=Goal.Status.archived,
+        ).order_by('-rank', '-id').values_list('id', 'title')[:FIND_LIMIT]
+
+        lines = [f'#{pk} {title}' for pk, title in rows]
+        self._send_message(text='\n'.join(lines)[:MAX_MESSAGE_LENGTH] if lines else '[goals not found]')
+
+    def _categories_keyboard(self, after: int | None = None, before: int | None = None) -> dict | None:
+        """Возвращает страницу встроенной клавиатуры выбора категории (None - категорий нет)
+
+        Кнопка категории передает в callback_data ее id ('category:<id>'), кнопки навигации -
+        границу страницы ('categories:><id>' и 'categories:<<id>'). Страница выбирается по ключу
+        одним запросом не более чем CATEGORIES_PAGE_SIZE + 1 строк.
+
+        Args:
+            after (int | None): id последней категории предыдущей страницы (None - первая страница)
+            before (int | None): id первой категории следующей страницы
+        """
+        categories = Category.objects.filter(user_id=self._tg_user.user_id, is_deleted=False)
+        if before is None:
+            categories = categories.filter(id__gt=after or 0).order_by('id')
+        else:
+            categories = categories.filter(id__lt=before).order_by('-id')
+        rows = list(categories.values_list('id', 'title')[:CATEGORIES_PAGE_SIZE + 1])
+        if before is None:
+            has_prev, has_next = bool(after), len(rows) > CATEGORIES_PAGE_SIZE
+        else:
+            has_prev, has_next = len(rows) > CATEGORIES_PAGE_SIZE, True
+        rows = rows[:CATEGORIES_PAGE_SIZE]
+        if not rows:
+            return None
+        if before is not None:
+            rows.reverse()
+
+        keyboard = [[{'text': title, 'callback_data': f'category:{pk}'}] for pk, title in rows]
+        navigation = []
+        if has_prev:
+            navigation.append({'text': '«', 'callback_data': f'categories:<{rows[0][0]}'})
+        if has_next:
+            navigation.append({'text': '»', 'callback_data': f'categories:>{rows[-1][0]}'})
+        if navigation:
+            keyboard.append(navigation)
+        return {'inline_keyboard': keyboard}
+
+    def _send_categories(self) -> None:
+        keyboard = self._categories_keyboard()
+        if keyboard:
+            self._send_message(text=self._messages['select_category'], reply_markup=keyboard)
+        else:
+            self._send_message(text=self._messages['categories_not_found'])
+
+    def _select_category(self, category_id: int) -> None:
+        self.__chat_state.category_id = category_id
+        self._store.save_chat_state(self.__chat_state, update_fields=('category_id',))
+        self._send_message(text=self._messages['goal_title'])
+
+    def _run_callback(self) -> None:
+        """Обрабатывает нажатие кнопки клавиатуры выбора категории"""
+        action, _, value = (self._callback_query.data or '').partition(':')
+        if not self.__chat_state.is_create_command or self.__chat_state.category_id \
+                or action not in ('category', 'categories'):
+            self._answer_callback(text=self._messages['keyboard_expired'])
+            self._edit_keyboard(reply_markup=None)
+            return
+
+        if action == 'categories':
+            bound = int(value[1:]) if value[1:].isdigit() else None
+            if value[:1] == '<' and bound:
+                keyboard = self._categories_keyboard(before=bound)
+            else:
+                keyboard = self._categories_keyboard(after=bound)
+            self._answer_callback()
+            if keyboard:
+                self._edit_keyboard(reply_markup=keyboard)
+            return
+
+        category_id = None
+        if value.isdigit():
+            category_id = Category.objects.filter(
+                pk=int(value),
+                user_id=self._tg_user.user_id,
+                is_deleted=False,
+            ).values_list('id', flat=True).first()
+        if category_id is None:
+            self._answer_callback(text=self._messages['category_not_found'])
+            return
+        self._answer_callback()
+        self._edit_keyboard(reply_markup=None)
+        self._select_category(category_id)
 
     def run_actions(self) -> None:
         """Выполняет характерные для определенного состояния действия"""
 
+        if self._callback_query:
+            self._run_callback()
+            return
+
         #: bool: Флаг выполнения команды /create
         is_create_command = self.__chat_state.is_create_command
 
         if self.__chat_msg == '/create':
             self.__chat_state.is_create_command = True
-            self.__chat_state.save(update_fields=('is_create_command',))
+            self._store.save_chat_state(self.__chat_state, update_fields=('is_create_command',))
+            self._send_categories()
 
-            categories: list = Category.objects.all().filter(
-                user_id=self._tg_user.user_id,
-                is_deleted=False
-            ).values_list('title', flat=True)
+        if not is_create_command:
+            command, _, argument = (self.__chat_msg or '').partition(' ')
 
-            self._send_message(
-                text=self._messages['select_category'] + '\n'.join(
-                    categories) if categories
-                else '[categories not found]'
-            )
+            if command == '/find':
+                self._send_search_results(argument)
 
-        if not is_create_command:
-            if self.__chat_msg not in self._allowed_commands:
+            elif self.__chat_msg not in self._allowed_commands:
                 self._send_message(
                     text=self._messages['unknown_command'] + self._messages[
                         'allowed_commands'])
@@ -156,47 +388,42 @@ class VerifiedState(BaseStateClass):
                 self._send_message(text=self._messages['allowed_commands'])
 
             if self.__chat_msg == '/goals':
-                goals: list = Goal.objects.all().filter(
-                    category__board__participants__user_id=self._tg_user.user_id,
-                    category__is_deleted=False,
-                    status__lt=Goal.Status.archived,
-                ).values_list('title', flat=True)
+                self._send_goals_page()
 
-                self._send_message(
-                    text='\n'.join(goals) if goals else '[goals not found]')
+            if self.__chat_msg == '/next':
+                self._send_goals_page(after=self.__chat_state.goals_last_id)
+
+            if self.__chat_msg == '/prev':
+                if self.__chat_state.goals_first_id is None:
+                    self._send_goals_page()
+                else:
+                    self._send_goals_page(before=self.__chat_state.goals_first_id)
 
         elif self.__chat_msg == '/cancel':
-            self.__chat_state.set_default()
+            self._set_default()
             self._send_message(text=self._messages['successful'])
 
         else:
             if not self.__chat_state.category_id:
-                categories: list = Category.objects.all().filter(
+                #: Название категории, отправленное текстом вместо нажатия кнопки
+                category_id = Category.objects.filter(
                     user_id=self._tg_user.user_id,
-                    is_deleted=False
-                ).values_list('title', flat=True)
-
-                if self.__chat_msg not in categories:
-                    self._send_message(
-                        text=self._messages['select_category'] + '\n'.join(
-                            categories) if categories
-                        else '[categories not found]'
-                    )
+                    is_deleted=False,
+                    title=self.__chat_msg,
+                ).values_list('id', flat=True).first()
+
+                if category_id is None:
+                    self._send_categories()
                 else:
-                    category = Category.objects.all().filter(
-                        user_id=self._tg_user.user_id).get(
-                        title=self.__chat_msg)
-                    self.__chat_state.category_id = category.id
-                    self.__chat_state.save(update_fields=('category_id',))
-                    self._send_message(text=self._messages['goal_title'])
+                    self._select_category(category_id)
             else:
-                goal = Goal.objects.create(
+                is_created = self._store.add_goal(Goal(
                     user_id=self._tg_user.user_id,
                     category_id=self.__chat_state.category_id,
                     title=self.__chat_msg
-                )
-                if goal.id:
-                    self.__chat_state.set_default()
+                ))
+                if is_created:
+                    self._set_default()
                     self._send_message(text=self._messages['successful'])
                 else:
                     self._send_message(text=self._messages['failure'])
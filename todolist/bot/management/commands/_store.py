@@ -0,0 +1,234 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.db import DatabaseError, close_old_connections, transaction
+
+from bot.models import TgUser, TgChatState
+from bot.tg.dc import MessageFrom
+from goals import events
+from goals.events import Action, Entity
+from goals.models import Goal
+
+#: tuple: Поля состояния чата, сохраняемые при отложенной записи
+CHAT_STATE_FIELDS = ('category', 'is_create_command', 'goals_first_id', 'goals_last_id',)
+
+
+class DbStore:
+    """Хранилище Telegram пользователей и состояний чатов без кэширования
+
+    Каждое обращение выполняет запрос к БД. Используется по умолчанию и как источник данных
+    для CachedStore.
+    """
+
+    def get_tg_user(self, message_from: MessageFrom) -> tuple[TgUser, bool]:
+        """Возвращает Telegram пользователя, создавая его при первом обращении
+
+        Returns:
+            tuple: (Telegram пользователь, создан ли пользователь)
+        """
+        tg_user, created = TgUser.objects.get_or_create(
+            tg_id=message_from.id,
+            defaults={'tg_username': message_from.username},
+        )
+        if not created and tg_user.tg_username != message_from.username:
+            tg_user.tg_username = message_from.username
+            tg_user.save(update_fields=('tg_username',))
+        return tg_user, created
+
+    def save_tg_user(self, tg_user: TgUser, update_fields: tuple) -> None:
+        """Сохраняет поля Telegram пользователя"""
+        tg_user.save(update_fields=update_fields)
+
+    def get_chat_state(self, tg_user: TgUser) -> TgChatState:
+        """Возвращает состояние чата Telegram пользователя, создавая его при первом обращении"""
+        chat_state, _ = TgChatState.objects.get_or_create(tg_user=tg_user)
+        return chat_state
+
+    def save_chat_state(self, chat_state: TgChatState, update_fields: tuple) -> None:
+        """Сохраняет поля состояния чата"""
+        chat_state.save(update_fields=update_fields)
+
+    def add_goal(self, goal: Goal) -> bool:
+        """Сохраняет цель, созданную в чате
+
+        Returns:
+            bool: принята ли цель к сохранению
+        """
+        goal.save()
+        events.record(events.event(
+            Entity.goal, Action.created, events.category_board_id(goal.category_id), goal.id, goal.user_id,
+        ))
+        return goal.id is not None
+
+    def flush(self) -> None:
+        """Записывает в БД отложенные изменения (для DbStore изменения записываются сразу)"""
+
+    def invalidate(self, tg_id: int) -> None:
+        """Сбрасывает данные Telegram пользователя, измененные в откаченной транзакции (DbStore их не хранит)"""
+
+
+@dataclass
+class _Entry:
+    tg_user: TgUser
+    chat_state: TgChatState | None = None
+    dirty: bool = False
+
+
+class CachedStore(DbStore):
+    """Кэш Telegram пользователей и состояний чатов в памяти процесса с отложенной записью
+
+    Записи хранятся по tg_id в LRU-порядке, их количество ограничено max_size. Изменения состояний
+    чатов накапливаются и записываются в БД пачкой (INSERT ... ON CONFLICT DO UPDATE) фоновым потоком
+    раз в flush_interval секунд, а также при вытеснении записи из кэша и при остановке (метод stop).
+
+    Согласованность с БД:
+        - код верификации записывается в БД сразу: его проверяет веб-приложение;
+        - для неверифицированного пользователя привязка к пользователю проекта перечитывается из БД
+          при каждом обращении, так как верификация выполняется вне процесса бота;
+        - при ошибке записи пачки записи вытесняются из кэша и при следующем обращении загружаются из БД.
+
+    При аварийном завершении процесса теряются изменения состояний чатов не старше flush_interval.
+    В режиме write_through состояния чатов записываются сразу, в транзакции обработки обновления
+    (кэш сокращает только чтения), а при откате транзакции данные пользователя сбрасываются из кэша
+    методом invalidate.
+
+    Args:
+        max_size (int): максимальное количество Telegram пользователей в кэше
+        flush_interval (float): максимальная задержка записи изменений в БД, секунды
+        write_through (bool): записывать изменения состояний чатов сразу
+    """
+
+    def __init__(self, max_size: int = 10_000, flush_interval: float = 1.0, write_through: bool = False):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.write_through = write_through
+        self.logger = logging.getLogger(__name__)
+
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def start(self) -> 'CachedStore':
+        """Запускает поток периодической записи изменений"""
+        self._thread = threading.Thread(target=self._flush_periodically, name='bot-store-flush', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает поток записи и записывает оставшиеся изменения"""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            close_old_connections()
+            self.flush()
+        close_old_connections()
+
+    def _get_entry(self, tg_id: int) -> _Entry | None:
+        entry = self._entries.get(tg_id)
+        if entry is not None:
+            self._entries.move_to_end(tg_id)
+        return entry
+
+    def _add_entry(self, entry: _Entry) -> None:
+        self._entries[entry.tg_user.tg_id] = entry
+        if len(self._entries) > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            if evicted.dirty:
+                self._write([evicted])
+
+    def get_tg_user(self, message_from: MessageFrom) -> tuple[TgUser, bool]:
+        with self._lock:
+            entry = self._get_entry(message_from.id)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            tg_user, created = super().get_tg_user(message_from)
+            with self._lock:
+                self._add_entry(_Entry(tg_user=tg_user))
+            return tg_user, created
+
+        tg_user = entry.tg_user
+        if not tg_user.user_id:
+            tg_user.user_id = TgUser.objects.filter(pk=tg_user.pk).values_list('user_id', flat=True).first()
+        if tg_user.tg_username != message_from.username:
+            tg_user.tg_username = message_from.username
+            tg_user.save(update_fields=('tg_username',))
+        return tg_user, False
+
+    def get_chat_state(self, tg_user: TgUser) -> TgChatState:
+        with self._lock:
+            entry = self._get_entry(tg_user.tg_id)
+            if entry is not None and entry.chat_state is not None:
+                return entry.chat_state
+
+        chat_state = TgChatState.objects.filter(tg_user=tg_user).first() or TgChatState(tg_user=tg_user)
+        if self.write_through and chat_state.pk is None:
+            chat_state.save()
+        with self._lock:
+            entry = self._get_entry(tg_user.tg_id)
+            if entry is None:
+                entry = _Entry(tg_user=tg_user)
+                self._add_entry(entry)
+            entry.chat_state = chat_state
+            #: Новое состояние записывается в БД вместе с остальными изменениями
+            entry.dirty = entry.dirty or chat_state.pk is None
+        return chat_state
+
+    def save_chat_state(self, chat_state: TgChatState, update_fields: tuple) -> None:
+        with self._lock:
+            entry = self._get_entry(chat_state.tg_user.tg_id)
+            if entry is not None and entry.chat_state is chat_state and not self.write_through:
+                entry.dirty = True
+                return
+        super().save_chat_state(chat_state, update_fields)
+
+    def invalidate(self, tg_id: int) -> None:
+        with self._lock:
+            self._entries.pop(tg_id, None)
+
+    def flush(self) -> None:
+        """Записывает в БД все накопленные изменения состояний чатов"""
+        with self._lock:
+            dirty = [entry for entry in self._entries.values() if entry.dirty]
+            if dirty:
+                self._write(dirty)
+
+    def _write(self, entries: list[_Entry]) -> None:
+        """Записывает состояния чатов одним запросом (вызывается под блокировкой)"""
+        try:
+            with transaction.atomic():
+                TgChatState.objects.bulk_create(
+                    [entry.chat_state for entry in entries],
+                    update_conflicts=True,
+                    unique_fields=('tg_user',),
+                    update_fields=CHAT_STATE_FIELDS,
+                )
+        except DatabaseError:
+            self.logger.exception('Failed to flush %s chat states', len(entries))
+            for entry in entries:
+                self._entries.pop(entry.tg_user.tg_id, None)
+        else:
+            for entry in entries:
+                entry.dirty = False
+
+    def stats(self) -> dict:
+        """Возвращает показатели кэша: размер, попадания, промахи, количество несохраненных состояний"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'dirty': sum(entry.dirty for entry in self._entries.values()),
+            }
@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from bot.management.commands._digest import generate_digests, send_digests
+from bot.models import TgUser
+from bot.tg.dispatcher import get_dispatcher
+from bot.tg.fake import FakeTelegramServer
+from bot.tg.metrics import QueryCounter
+from core.models import User
+from goals.models import Board, BoardParticipant, Category, Goal
+
+
+class Command(BaseCommand):
+    """Класс команды для нагрузочного тестирования формирования ежедневной сводки
+
+    Создает временную базу данных с заданным количеством верифицированных пользователей (у каждого - доска,
+    категория и несколько целей в разных разделах сводки), формирует сводки при разном количестве
+    процессов и выводит время формирования и количество запросов к БД. С параметром --send сводки
+    отправляются через очередь исходящих сообщений в локальную заглушку Telegram API.
+    """
+
+    help = 'Benchmarks daily digest generation on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--goals', type=int, default=6, help='Goals per user')
+        parser.add_argument('--processes', type=int, nargs='+', default=[1, 4])
+        parser.add_argument('--send', action='store_true', help='Send the digests to a local fake Telegram API')
+        parser.add_argument('--global-rate', type=float, default=10_000,
+                            help='Outgoing message rate limit for --send')
+
+    def _seed(self, users: int, goals: int) -> None:
+        now = timezone.now()
+        batch = 10_000
+        for offset in range(0, users, batch):
+            count = min(batch, users - offset)
+            created = User.objects.bulk_create([User(username=f'digest-{offset + number}') for number in range(count)])
+            boards = Board.objects.bulk_create([Board(title='Digest board') for _ in created])
+            BoardParticipant.objects.bulk_create([
+                BoardParticipant(board=board, user=user) for board, user in zip(boards, created)
+            ])
+            categories = Category.objects.bulk_create([
+                Category(board=board, user=user, title='Digest category') for board, user in zip(boards, created)
+            ])
+            #: Цели распределены по разделам: просроченные, со сроком сегодня, выполненные вчера, без срока
+            Goal.objects.bulk_create([
+                Goal(
+                    user=user, category=category, title=f'Goal {number}',
+                    status=Goal.Status.done if number % 4 == 2 else Goal.Status.to_do,
+                    due_date=(now - timedelta(days=number + 1), now, None, None)[number % 4],
+                )
+                for user, category in zip(created, categories) for number in range(goals)
+            ], batch_size=5000)
+            TgUser.objects.bulk_create([
+                TgUser(tg_id=1_000_000 + offset + number, verification_code=f'digest-{offset + number}', user=user)
+                for number, user in enumerate(created)
+            ])
+        #: Выполненные цели - "вчера"
+        Goal.objects.filter(status=Goal.Status.done).update(updated=now - timedelta(days=1))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        counter = QueryCounter()
+        try:
+            started = time.perf_counter()
+            self._seed(options['users'], options['goals'])
+            self.stdout.write(f'seeded users={options["users"]} in {time.perf_counter() - started:.1f}s')
+            connections.close_all()
+            connection_created.connect(counter.install)
+            day = timezone.localdate()
+            for processes in options['processes']:
+                counter.count = 0
+                started = time.perf_counter()
+                messages = [message for batch in generate_digests(day, partitions=processes * 4, processes=processes)
+                            for message in batch]
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'processes={processes} digests={len(messages)} elapsed={elapsed:.2f}s '
+                    f'rate={len(messages) / elapsed:.0f} digests/s queries(parent)={counter.count}'
+                )
+            if options['send']:
+                self._send(messages, options)
+        finally:
+            connection_created.disconnect(counter.install)
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _send(self, messages: list[tuple[int, str]], options) -> None:
+        fake = FakeTelegramServer().start()
+        settings.TG_API_URL = fake.url
+        dispatcher = get_dispatcher(global_rate=options['global_rate'], chat_rate=options['global_rate'],
+                                    report_interval=None)
+        try:
+            started = time.perf_counter()
+            send_digests([messages], sender=dispatcher)
+            dispatcher.stop(timeout=None)
+            elapsed = time.perf_counter() - started
+        finally:
+            fake.stop()
+        self.stdout.write(f'sent={len(fake.sent)} elapsed={elapsed:.2f}s rate={len(fake.sent) / elapsed:.0f} messages/s')
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+
+from bot.management.commands import runbot
+from bot.management.commands._store import CachedStore
+from bot.models import TgUser
+from bot.tg.dispatcher import get_dispatcher
+from bot.tg.fake import FakeTelegramServer, load_updates, synthetic_updates
+from bot.tg.metrics import QueryCounter
+from core.models import User
+from goals.models import Board, BoardParticipant, Category
+
+#: tuple: Сообщения синтетического диалога верифицированного пользователя
+CONVERSATION = ('/goals', '/create', 'Bench category', 'Bench goal', '/start')
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    """Класс команды для нагрузочного тестирования цикла runbot на локальной заглушке Telegram API
+
+    Создает временную базу данных, синтетических пользователей (или использует записанный поток обновлений),
+    запускает цикл обработки обновлений runbot против FakeTelegramServer и выводит пропускную способность,
+    перцентили сквозной задержки (от публикации обновления до первого ответа в чат) и количество запросов
+    к БД на одно обновление.
+    """
+
+    help = 'Benchmarks the runbot loop against a local fake Telegram Bot API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of synthetic verified users')
+        parser.add_argument('--replay', help='Recorded updates to replay instead of the synthetic conversation '
+                                             '(getUpdates response, JSON array or NDJSON)')
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Updates per second published by the fake API (default: all at once)')
+        parser.add_argument('--batch', action='store_true', help='Process each getUpdates response as one batch')
+        parser.add_argument('--global-rate', type=float, default=10_000,
+                            help='Outgoing message rate limit (the real API limit would dominate the result)')
+        parser.add_argument('--timeout', type=float, default=300)
+
+    def _seed(self, users: int) -> None:
+        """Создает верифицированных пользователей с доской и категорией"""
+        suffix = int(time.time())
+        created = User.objects.bulk_create([User(username=f'bench-{suffix}-{number}') for number in range(users)])
+        boards = Board.objects.bulk_create([Board(title='Bench board') for _ in created])
+        BoardParticipant.objects.bulk_create([
+            BoardParticipant(board=board, user=user, role=BoardParticipant.Role.owner)
+            for board, user in zip(boards, created)
+        ])
+        Category.objects.bulk_create([
+            Category(board=board, user=user, title=CONVERSATION[2]) for board, user in zip(boards, created)
+        ])
+        TgUser.objects.bulk_create([
+            TgUser(tg_id=1_000_000 + number, tg_username=f'user{1_000_000 + number}',
+                   verification_code=f'bench-{suffix}-{number}', user=user)
+            for number, user in enumerate(created)
+        ])
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        fake = FakeTelegramServer().start()
+        settings.TG_API_URL = fake.url
+        counter = QueryCounter()
+        try:
+            if options['replay']:
+                updates = load_updates(options['replay'])
+            else:
+                self._seed(options['users'])
+                updates = synthetic_updates(options['users'], CONVERSATION)
+            connections.close_all()
+            connection_created.connect(counter.install)
+            self._run(fake, updates, counter, options)
+        finally:
+            connection_created.disconnect(counter.install)
+            fake.stop()
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _run(self, fake: FakeTelegramServer, updates: list[dict], counter: QueryCounter, options) -> None:
+        dispatcher = get_dispatcher(global_rate=options['global_rate'], chat_rate=options['global_rate'],
+                                    chat_burst=10, report_interval=None)
+        store = None
+        if not options['batch']:
+            store = CachedStore(max_size=settings.BOT_STATE_CACHE_SIZE,
+                                flush_interval=settings.BOT_STATE_FLUSH_INTERVAL, write_through=True).start()
+        command = runbot.Command()
+        stop = threading.Event()
+
+        def poll():
+            try:
+                command.poll(sender=dispatcher, store=store, batch=options['batch'], stop=stop)
+            finally:
+                connections.close_all()
+
+        bot = threading.Thread(target=poll, name='bench-runbot', daemon=True)
+        bot.start()
+
+        started = time.perf_counter()
+        fake.replay(updates, rate=options['rate'])
+        completed = fake.wait(timeout=options['timeout'])
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        bot.join()
+        if store:
+            store.stop()
+        dispatcher.stop()
+        command.tg_client.close()
+
+        processed = fake.answered
+        latencies = fake.latencies
+        self.stdout.write(
+            f'mode={"batch" if options["batch"] else "sequential"} '
+            f'updates={processed}/{fake.expected}{"" if completed else " (timeout)"} '
+            f'elapsed={elapsed:.2f}s throughput={processed / elapsed:.0f} updates/s'
+        )
+        self.stdout.write(
+            'latency ' + ' '.join(
+                f'p{percent}={_percentile(latencies, percent) * 1000:.1f}ms' for percent in (50, 95, 99)
+            ) + f' max={max(latencies, default=0) * 1000:.1f}ms'
+        )
+        self.stdout.write(
+            f'db queries={counter.count} per update={counter.count / processed if processed else 0:.2f} '
+            f'messages sent={len(fake.sent)}'
+        )
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+from django.core.management import BaseCommand
+
+from bot.tg.client import TgClient
+from bot.tg.dc import SendMessageResponseSchema
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Локальная заглушка Telegram API: отвечает на sendMessage успешным ответом"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = json.dumps({
+            'ok': True,
+            'result': {
+                'message_id': 1,
+                'from': {'id': 1, 'is_bot': True, 'first_name': 'bot'},
+                'date': int(time.time()),
+                'chat': {'id': 1, 'type': 'private'},
+                'text': 'ok',
+            },
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    """Класс команды для сравнения производительности Telegram клиента
+
+    Сравнивает отправку сообщений отдельными запросами requests.get (без повторного
+    использования соединений) и через постоянную сессию TgClient на локальной заглушке API.
+    """
+
+    help = 'Benchmarks TgClient.send_message against a local HTTP stand-in'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=1)
+
+    def _measure(self, name: str, send, messages: int, threads: int) -> None:
+        per_thread = messages // threads
+
+        def worker():
+            for number in range(per_thread):
+                send(number)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = per_thread * threads
+        self.stdout.write(f'{name}: {total} messages in {elapsed:.2f}s, {total / elapsed:.0f} msg/s')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        token = 'bench'
+
+        #: Прежняя реализация TgClient.send_message: новый запрос (и соединение) на каждое сообщение
+        def send_per_request(number: int) -> None:
+            response = requests.get(
+                f'{base_url}/bot{token}/sendMessage',
+                params={'chat_id': 1, 'text': f'message {number}'}
+            )
+            SendMessageResponseSchema.load(response.json())
+
+        client = TgClient(token=token, base_url=base_url, pool_size=options['threads'])
+
+        def send_session(number: int) -> None:
+            client.send_message(chat_id=1, text=f'message {number}')
+
+        try:
+            self._measure('requests.get per call', send_per_request, options['messages'], options['threads'])
+            self._measure('TgClient (keep-alive session)', send_session, options['messages'], options['threads'])
+        finally:
+            client.close()
+            server.shutdown()
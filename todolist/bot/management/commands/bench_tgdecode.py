@@ -0,0 +1,67 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management import BaseCommand
+
+from bot.tg.dc import (
+    GetUpdatesResponseSchema, GetUpdatesResponseDecoder,
+    SendMessageResponseSchema, SendMessageResponseDecoder
+)
+
+#: Path: Каталог с записанными ответами Telegram API
+SAMPLES_DIR = Path(__file__).resolve().parents[2] / 'tg' / 'samples'
+
+
+class Command(BaseCommand):
+    """Класс команды для сравнения производительности декодирования ответов Telegram API
+
+    Сравнивает marshmallow схемы dataclasses_json и быстрые декодеры на записанных ответах
+    getUpdates и sendMessage (bot/tg/samples). Измеряется только декодирование уже разобранного JSON.
+    Ответ getUpdates дополняется до --updates обновлений.
+    """
+
+    help = 'Benchmarks decoding of recorded Telegram API responses: dataclasses_json schema vs Decoder'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--updates', type=int, default=100,
+                            help='Number of updates in the getUpdates response (the recorded sample is repeated)')
+
+    def _measure(self, name: str, load, data: dict, iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            load(data)
+        elapsed = time.perf_counter() - started
+        per_second = iterations / elapsed
+        self.stdout.write(f'  {name:<10} {elapsed:8.3f}s {per_second:12.0f} responses/s')
+        return elapsed
+
+    def _compare(self, title: str, schema, decoder, data: dict, iterations: int) -> None:
+        if schema.load(data) != decoder.load(data):
+            raise AssertionError(f'{title}: decoders disagree')
+
+        self.stdout.write(f'{title}:')
+        baseline = self._measure('schema', schema.load, data, iterations)
+        elapsed = self._measure('decoder', decoder.load, data, iterations)
+        self.stdout.write(f'  speedup    {baseline / elapsed:8.1f}x')
+
+    def handle(self, *args, **options):
+        get_updates = json.loads((SAMPLES_DIR / 'get_updates.json').read_text(encoding='utf-8'))
+        updates = get_updates['result']
+        get_updates['result'] = [
+            {**updates[number % len(updates)], 'update_id': updates[0]['update_id'] + number}
+            for number in range(options['updates'])
+        ]
+        send_message = json.loads((SAMPLES_DIR / 'send_message.json').read_text(encoding='utf-8'))
+
+        self._compare(
+            f'getUpdates, {options["updates"]} updates',
+            GetUpdatesResponseSchema, GetUpdatesResponseDecoder,
+            get_updates, options['iterations'],
+        )
+        self._compare(
+            'sendMessage',
+            SendMessageResponseSchema, SendMessageResponseDecoder,
+            send_message, options['iterations'] * 100,
+        )
@@ -0,0 +1,46 @@
+from django.core.management import BaseCommand, CommandError
+
+from bot.broadcast import Broadcaster
+from bot.models import TgBroadcast
+
+
+class Command(BaseCommand):
+    """Класс команды для рассылки сообщения всем верифицированным Telegram пользователям
+
+    Создает и выполняет новую рассылку или продолжает прерванную (--resume) с сохраненного места.
+    """
+
+    help = 'Sends a message to every verified Telegram user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('text', nargs='?', help='Message text (creates a new broadcast)')
+        parser.add_argument('--resume', type=int, help='Id of a stopped broadcast to continue')
+        parser.add_argument('--force', action='store_true',
+                            help='Continue a broadcast left running by a crashed process')
+        parser.add_argument('--rate', type=float, default=None, help='Messages per second (default: BOT_GLOBAL_RATE)')
+        parser.add_argument('--workers', type=int, default=8, help='Number of sending threads')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Recipients between progress checkpoints')
+
+    def handle(self, *args, **options):
+        if bool(options['text']) == bool(options['resume']):
+            raise CommandError('Pass either the message text or --resume ID')
+        if options['text']:
+            broadcast_id = TgBroadcast.objects.create(text=options['text']).pk
+        else:
+            broadcast_id = options['resume']
+        if not Broadcaster.claim(broadcast_id, force=options['force']):
+            raise CommandError(f'Broadcast {broadcast_id} does not exist, is running or is finished')
+
+        broadcaster = Broadcaster(rate=options['rate'], workers=options['workers'], chunk_size=options['chunk_size'])
+        try:
+            broadcast = broadcaster.run(TgBroadcast.objects.get(pk=broadcast_id))
+        except KeyboardInterrupt:
+            TgBroadcast.objects.filter(pk=broadcast_id, status=TgBroadcast.Status.running).update(
+                status=TgBroadcast.Status.paused,
+            )
+            self.stdout.write(f'Broadcast {broadcast_id} stopped, continue with --resume {broadcast_id}')
+            return
+        self.stdout.write(
+            f'Broadcast {broadcast.pk} {broadcast.get_status_display()}: '
+            f'delivered={broadcast.delivered} failed={broadcast.failed} total={broadcast.total}'
+        )
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management import BaseCommand
+
+from bot.tg.fake import FakeTelegramServer, load_updates, synthetic_updates
+
+
+class Command(BaseCommand):
+    """Класс команды для запуска локальной заглушки Telegram Bot API
+
+    Публикует записанный (--replay) или синтетический поток обновлений с заданной частотой и периодически
+    выводит количество ответов бота и перцентили задержки. Бот подключается к заглушке через настройку
+    TG_API_URL, например: TG_API_URL=http://127.0.0.1:8081 python manage.py runbot --processes 4
+    """
+
+    help = 'Runs a local fake Telegram Bot API that replays an update stream'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--replay', help='Recorded updates (getUpdates response, JSON array or NDJSON)')
+        parser.add_argument('--users', type=int, default=100,
+                            help='Number of synthetic users (when --replay is not given)')
+        parser.add_argument('--messages', nargs='+', default=['/start', '/goals'],
+                            help='Messages sent by every synthetic user')
+        parser.add_argument('--rate', type=float, default=None, help='Updates per second (default: all at once)')
+        parser.add_argument('--report-interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        fake = FakeTelegramServer(port=options['port']).start()
+        if options['replay']:
+            updates = load_updates(options['replay'])
+        else:
+            updates = synthetic_updates(options['users'], options['messages'])
+        fake.replay(updates, rate=options['rate'])
+        self.stdout.write(f'Fake Telegram API at {fake.url}, {len(updates)} updates')
+
+        try:
+            while True:
+                time.sleep(options['report_interval'])
+                latencies = sorted(fake.latencies)
+                p50 = latencies[len(latencies) // 2] if latencies else 0.0
+                p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+                self.stdout.write(
+                    f'answered={fake.answered}/{fake.expected} sent={len(fake.sent)} '
+                    f'latency p50={p50 * 1000:.1f}ms p95={p95 * 1000:.1f}ms'
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            fake.stop()
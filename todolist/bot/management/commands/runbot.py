@@ -1,9 +1,20 @@
 import logging
+import threading
+import time
+
 from django.core.management import BaseCommand
 
-from bot.management.commands._chat import Chat
-from bot.tg.client import TgClient
+from bot.management.commands._async import AsyncRunner
+from bot.management.commands._batch import process_batch
+from bot.management.commands._sharded import ShardedRunner
+from bot.management.commands._offset import UpdateLog
+from bot.management.commands._store import CachedStore
+from bot.tg.client import TgClientError, get_tg_client
 from bot.tg.dc import GetUpdatesResponse
+from bot.tg.dispatcher import get_dispatcher
+from bot.tg.metrics import (
+    POLL_UPDATES, REGISTRY, MetricsServer, dispatcher_collector, store_collector, workers_collector
+)
 from todolist import settings
 
 
@@ -12,28 +23,116 @@ class Command(BaseCommand):
 
     help = 'Runs Telegram bot'
 
-    def __init__(self):
-        super().__init__()
-        self.tg_client = TgClient(token=settings.TG_TOKEN)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tg_client = get_tg_client()
         self.logger = logging.getLogger(__name__)
-        self.logger.info('Bot start pooling')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--async', dest='use_async', action='store_true',
+                            help='Process updates of different chats concurrently (asyncio runtime)')
+        parser.add_argument('--concurrency', type=int, default=settings.BOT_CONCURRENCY,
+                            help='Max number of chats processed at the same time (--async)')
+        parser.add_argument('--orm-workers', type=int, default=settings.BOT_ORM_WORKERS,
+                            help='Size of the thread pool for database work (--async)')
+        parser.add_argument('--max-pending', type=int, default=settings.BOT_MAX_PENDING,
+                            help='Max number of received but unprocessed updates; polling pauses at the limit '
+                                 '(--async)')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Number of worker processes; chats are partitioned between them by chat id')
+        parser.add_argument('--batch', action='store_true',
+                            help='Process each getUpdates response as one batch with bulk database writes')
+        parser.add_argument('--metrics-port', type=int, default=settings.BOT_METRICS_PORT,
+                            help='Serve Prometheus metrics on PORT at /metrics (0 - disabled); '
+                                 'with --processes, worker N serves on PORT + 1 + N')
 
     def handle(self, *args, **options):
+        self.logger.info('Bot start pooling')
+        metrics_port = options['metrics_port']
 
-        #: int: идентификатор первого возвращаемого обновления
-        offset = 0
-        while True:
-            response: GetUpdatesResponse = self.tg_client.get_updates(offset=offset)
-            for item in response.result:
-                offset = item.update_id + 1
+        if options['processes'] > 1:
+            #: Очереди исходящих сообщений и кэши состояний создаются в процессах-обработчиках
+            runner = ShardedRunner(
+                tg_client=self.tg_client,
+                processes=options['processes'],
+                report_interval=settings.BOT_REPORT_INTERVAL,
+                metrics_port=metrics_port,
+            )
+            server = None
+            if metrics_port:
+                REGISTRY.add_collector(workers_collector(runner))
+                server = MetricsServer(port=metrics_port).start()
+            try:
+                runner.run()
+            finally:
+                if server:
+                    server.stop()
+            return
+
+        #: Исходящие сообщения отправляются через очередь с ограничением частоты
+        dispatcher = get_dispatcher()
+        #: Состояния чатов кэшируются в памяти и записываются в транзакции обработки обновления
+        #: (в режиме --batch состояния загружаются и записываются пачкой обновлений, см. BatchStore)
+        store = None
+        if not options['batch'] or options['use_async']:
+            store = CachedStore(
+                max_size=settings.BOT_STATE_CACHE_SIZE,
+                flush_interval=settings.BOT_STATE_FLUSH_INTERVAL,
+                write_through=True,
+            ).start()
+        server = None
+        if metrics_port:
+            REGISTRY.add_collector(dispatcher_collector(dispatcher))
+            if store:
+                REGISTRY.add_collector(store_collector(store))
+            server = MetricsServer(port=metrics_port).start()
+        try:
+            if options['use_async']:
+                AsyncRunner(
+                    tg_client=self.tg_client,
+                    sender=dispatcher,
+                    store=store,
+                    concurrency=options['concurrency'],
+                    orm_workers=options['orm_workers'],
+                    max_pending=options['max_pending'],
+                ).run()
+            else:
+                self.poll(sender=dispatcher, store=store, batch=options['batch'])
+        finally:
+            if server:
+                server.stop()
+            if store:
+                store.stop()
+            dispatcher.stop()
+
+    def poll(self, sender, store=None, batch: bool = False, stop: threading.Event | None = None) -> None:
+        """Последовательно обрабатывает обновления, получаемые методом long polling
 
-                #: Старт чата
-                self.logger.info(item.message)
-                if item.message:
-                    chat = Chat(message=item.message)
+        Args:
+            sender: объект с методом send_message для отправки ответов
+            store: хранилище Telegram пользователей и состояний чатов
+            batch (bool): обрабатывать ответ getUpdates одной пачкой (см. process_batch)
+            stop: событие остановки цикла (по умолчанию цикл не завершается)
+        """
+        log = UpdateLog()
+        #: int: идентификатор первого необработанного обновления (сохраняется в БД вместе с результатами обработки)
+        offset = log.get_offset()
+        while not (stop and stop.is_set()):
+            try:
+                response: GetUpdatesResponse = self.tg_client.get_updates(offset=offset)
+            except TgClientError as e:
+                self.logger.warning('getUpdates failed: %s', e)
+                time.sleep(self.tg_client.backoff)
+                continue
+            log.cleanup()
+            POLL_UPDATES.observe(len(response.result))
 
-                    #: Инициализация текущего состояния чата
-                    chat.set_state(tg_client=self.tg_client)
+            if batch and response.result:
+                process_batch(updates=response.result, tg_client=sender, log=log)
+                offset = response.result[-1].update_id + 1
+                continue
 
-                    #: Выполнение действий для текущего состояния
-                    chat.state.run_actions()
+            for item in response.result:
+                #: Обновление подтверждается следующим вызовом getUpdates только после обработки (с повторами)
+                log.process(update=item, tg_client=sender, store=store, offset=item.update_id + 1)
+                offset = item.update_id + 1
@@ -0,0 +1,58 @@
+import logging
+import threading
+import time
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from bot.management.commands._queue import QueueWorker
+from bot.tg.dispatcher import get_dispatcher
+
+
+class Command(BaseCommand):
+    """Класс команды для обработки очереди обновлений, полученных через webhook"""
+
+    help = 'Processes Telegram updates received by the webhook'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of worker threads')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--idle-sleep', type=float, default=0.5,
+                            help='Pause in seconds when the queue is empty')
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger(__name__)
+        dispatcher = get_dispatcher()
+
+        def run(partition: int) -> None:
+            worker = QueueWorker(
+                tg_client=dispatcher,
+                partition=partition,
+                partitions=options['workers'],
+                batch_size=options['batch_size'],
+            )
+            while True:
+                close_old_connections()
+                try:
+                    processed = worker.drain()
+                    #: Устаревшие обновления всех частей удаляет один обработчик
+                    if partition == 0:
+                        worker.cleanup()
+                except Exception:
+                    logger.exception('Worker %s failed', partition)
+                    processed = 0
+                if not processed:
+                    time.sleep(options['idle_sleep'])
+
+        threads = [
+            threading.Thread(target=run, args=(partition,), name=f'bot-worker-{partition}', daemon=True)
+            for partition in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info('Bot queue workers started: %s', len(threads))
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            dispatcher.stop()
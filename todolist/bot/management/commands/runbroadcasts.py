@@ -0,0 +1,53 @@
+import logging
+import time
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from bot.broadcast import Broadcaster
+from bot.models import TgBroadcast
+
+
+class Command(BaseCommand):
+    """Класс команды для выполнения рассылок, поставленных в очередь в панели администратора
+
+    Также продолжает рассылки в статусе running, прогресс которых не сохранялся дольше --stale секунд
+    (процесс, выполнявший рассылку, завершился аварийно). Можно запускать несколько экземпляров.
+    """
+
+    help = 'Runs broadcasts queued from the admin and resumes abandoned ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale', type=float, default=600,
+                            help='Seconds without progress after which a running broadcast is resumed')
+        parser.add_argument('--rate', type=float, default=None, help='Messages per second (default: BOT_GLOBAL_RATE)')
+        parser.add_argument('--workers', type=int, default=8, help='Number of sending threads')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Recipients between progress checkpoints')
+        parser.add_argument('--idle-sleep', type=float, default=5,
+                            help='Pause in seconds when there is nothing to send')
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger(__name__)
+        broadcaster = Broadcaster(rate=options['rate'], workers=options['workers'], chunk_size=options['chunk_size'])
+        logger.info('Broadcast worker started')
+        while True:
+            close_old_connections()
+            broadcast = None
+            try:
+                broadcast = Broadcaster.claim_next(stale=options['stale'])
+                if broadcast is not None:
+                    broadcaster.run(broadcast)
+            except KeyboardInterrupt:
+                if broadcast is not None:
+                    TgBroadcast.objects.filter(pk=broadcast.pk, status=TgBroadcast.Status.running).update(
+                        status=TgBroadcast.Status.queued,
+                    )
+                return
+            except Exception:
+                logger.exception('Broadcast worker failed')
+                if broadcast is not None:
+                    TgBroadcast.objects.filter(pk=broadcast.pk, status=TgBroadcast.Status.running).update(
+                        status=TgBroadcast.Status.paused,
+                    )
+            if broadcast is None:
+                time.sleep(options['idle_sleep'])
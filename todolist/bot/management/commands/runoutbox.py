@@ -0,0 +1,51 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from bot.management.commands._outbox import OutboxWorker
+from bot.tg.client import TgClient
+
+
+class Command(BaseCommand):
+    """Класс команды для доставки исходящих уведомлений из очереди TgOutbox"""
+
+    help = 'Delivers queued Telegram notifications with retries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--lease', type=float, default=300,
+                            help='Seconds a claimed batch is hidden from other workers while it is being sent')
+        parser.add_argument('--idle-sleep', type=float, default=0.5,
+                            help='Pause in seconds when there is nothing to send')
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger(__name__)
+        #: Повторы выполняет очередь: запрос не блокирует пачку ожиданием между попытками
+        tg_client = TgClient(
+            token=settings.TG_TOKEN,
+            base_url=settings.TG_API_URL,
+            timeout=settings.TG_TIMEOUT,
+            max_retries=0,
+            retry_rate_limited=False,
+        )
+        worker = OutboxWorker(
+            tg_client=tg_client,
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            lease=options['lease'],
+        )
+        logger.info('Outbox worker started')
+        while True:
+            close_old_connections()
+            try:
+                processed = worker.drain()
+                worker.cleanup()
+            except Exception:
+                logger.exception('Outbox worker failed')
+                processed = 0
+            if not processed:
+                time.sleep(options['idle_sleep'])
@@ -0,0 +1,43 @@
+import logging
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from bot.management.commands._reminders import ReminderScheduler
+from bot.tg.dispatcher import get_dispatcher
+
+
+class Command(BaseCommand):
+    """Класс команды для отправки напоминаний о сроках целей привязанным Telegram пользователям
+
+    Должен работать один экземпляр команды (повторная отправка при одновременной работе нескольких
+    экземпляров предотвращается уникальностью отметок TgReminder, но часть напоминаний может быть пропущена).
+    """
+
+    help = 'Sends goal due date reminders to linked Telegram users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead', type=int, default=settings.BOT_REMINDER_LEAD,
+                            help='Seconds before the due date to send the reminder')
+        parser.add_argument('--window', type=int, default=settings.BOT_REMINDER_WINDOW,
+                            help='Seconds of upcoming reminders loaded per database scan')
+        parser.add_argument('--tick', type=float, default=1.0, help='Timer resolution in seconds')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger(__name__)
+        dispatcher = get_dispatcher()
+        scheduler = ReminderScheduler(
+            sender=dispatcher,
+            lead=options['lead'],
+            window=options['window'],
+            tick=options['tick'],
+            batch_size=options['batch_size'],
+        )
+        logger.info('Reminder scheduler started')
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.stop()
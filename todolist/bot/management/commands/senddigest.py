@@ -0,0 +1,46 @@
+import logging
+from datetime import date
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from bot.management.commands._digest import generate_digests, send_digests
+from bot.tg.dispatcher import get_dispatcher
+
+
+class Command(BaseCommand):
+    """Класс команды для отправки ежедневной сводки целей верифицированным Telegram пользователям
+
+    Запускается раз в день (например, по cron). Сводка содержит просроченные цели, цели со сроком
+    в течение дня и цели, выполненные накануне.
+    """
+
+    help = 'Sends the daily goals digest to verified Telegram users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None,
+                            help='Digest date, YYYY-MM-DD (default: today)')
+        parser.add_argument('--processes', type=int, default=1, help='Number of processes building digests')
+        parser.add_argument('--partitions', type=int, default=None,
+                            help='Number of user id ranges (default: 4 per process)')
+        parser.add_argument('--max-pending', type=int, default=10_000,
+                            help='Maximum number of digests waiting in the outgoing queue')
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger(__name__)
+        day = options['date'] or timezone.localdate()
+        partitions = options['partitions'] or options['processes'] * 4
+        dispatcher = get_dispatcher()
+        try:
+            count = send_digests(
+                generate_digests(day, partitions=partitions, processes=options['processes']),
+                sender=dispatcher,
+                max_pending=options['max_pending'],
+            )
+        except BaseException:
+            dispatcher.stop()
+            raise
+        #: Ожидание отправки всех сообщений очереди
+        dispatcher.stop(timeout=None)
+        logger.info('Sent %s digests for %s', count, day)
+        self.stdout.write(f'Digests sent: {count}')
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from bot.tg.client import get_tg_client
+
+
+class Command(BaseCommand):
+    """Класс команды для регистрации (или удаления) webhook Telegram бота"""
+
+    help = 'Registers the bot webhook URL in Telegram (or deletes it with --delete)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', type=str, help='Public HTTPS URL of POST: /bot/webhook')
+        parser.add_argument('--delete', action='store_true', help='Delete the webhook and return to long polling')
+
+    def handle(self, *args, **options):
+        tg_client = get_tg_client()
+
+        if options['delete']:
+            tg_client.delete_webhook()
+            self.stdout.write(self.style.SUCCESS('Webhook deleted'))
+            return
+
+        if not options['url']:
+            raise CommandError('Webhook URL is required')
+        if not settings.TG_WEBHOOK_SECRET:
+            raise CommandError('TG_WEBHOOK_SECRET is not set')
+
+        tg_client.set_webhook(url=options['url'], secret_token=settings.TG_WEBHOOK_SECRET)
+        self.stdout.write(self.style.SUCCESS(f'Webhook set: {options["url"]}'))
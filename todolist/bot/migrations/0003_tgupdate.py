@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0002_tgchatstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('update_id', models.BigIntegerField(unique=True, verbose_name='ID обновления')),
+                ('chat_id', models.BigIntegerField(null=True, verbose_name='ID чата')),
+                ('payload', models.JSONField(verbose_name='Обновление')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Ожидает обработки'), (2, 'Обработано'), (3, 'Ошибка')], default=1, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Количество попыток')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата получения')),
+                ('processed', models.DateTimeField(null=True, verbose_name='Дата обработки')),
+            ],
+            options={
+                'verbose_name': 'Входящее обновление',
+                'verbose_name_plural': 'Входящие обновления',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tgupdate',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['update_id'], name='tgupdate_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_tgupdate'),
+    ]
+
+    operations = [
+        #: Удаление дубликатов состояний чата (остается последнее)
+        migrations.RunSQL(
+            sql='DELETE FROM bot_tgchatstate a USING bot_tgchatstate b '
+                'WHERE a.tg_user_id = b.tg_user_id AND a.id < b.id',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='tgchatstate',
+            constraint=models.UniqueConstraint(fields=('tg_user',), name='unique_tg_chat_state'),
+        ),
+    ]
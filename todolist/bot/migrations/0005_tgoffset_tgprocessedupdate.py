@@ -0,0 +1,37 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_tgchatstate_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Получатель обновлений')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Следующее обновление')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Offset обновлений',
+                'verbose_name_plural': 'Offset обновлений',
+            },
+        ),
+        migrations.CreateModel(
+            name='TgProcessedUpdate',
+            fields=[
+                ('update_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID обновления')),
+                ('processed', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата обработки')),
+            ],
+            options={
+                'verbose_name': 'Обработанное обновление',
+                'verbose_name_plural': 'Обработанные обновления',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_tgoffset_tgprocessedupdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tgchatstate',
+            name='goals_first_id',
+            field=models.BigIntegerField(null=True, verbose_name='Первая цель текущей страницы /goals'),
+        ),
+        migrations.AddField(
+            model_name='tgchatstate',
+            name='goals_last_id',
+            field=models.BigIntegerField(null=True, verbose_name='Последняя цель текущей страницы /goals'),
+        ),
+    ]
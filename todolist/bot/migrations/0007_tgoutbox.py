@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0006_tgchatstate_goals_page'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(verbose_name='ID чата')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Ожидает отправки'), (2, 'Отправлено'), (3, 'Ошибка')], default=1, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Количество попыток')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('sent', models.DateTimeField(null=True, verbose_name='Дата отправки')),
+            ],
+            options={
+                'verbose_name': 'Исходящее уведомление',
+                'verbose_name_plural': 'Исходящие уведомления',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tgoutbox',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['next_attempt'], name='tgoutbox_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_goal_due_date_updated_idx'),
+        ('bot', '0007_tgoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateTimeField(db_index=True, verbose_name='Дедлайн')),
+                ('sent', models.DateTimeField(auto_now_add=True, verbose_name='Дата отправки')),
+                ('goal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tg_reminders', to='goals.goal', verbose_name='Цель')),
+            ],
+            options={
+                'verbose_name': 'Напоминание',
+                'verbose_name_plural': 'Напоминания',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tgreminder',
+            constraint=models.UniqueConstraint(fields=('goal', 'due_date'), name='unique_tg_reminder'),
+        ),
+    ]
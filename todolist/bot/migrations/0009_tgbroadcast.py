@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0008_tgreminder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(max_length=4096, verbose_name='Текст')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Новая'), (2, 'Выполняется'), (3, 'Остановлена'), (4, 'Завершена')], default=1, verbose_name='Статус')),
+                ('last_tg_user_id', models.BigIntegerField(default=0, verbose_name='Последний обработанный получатель')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Получателей')),
+                ('delivered', models.PositiveIntegerField(default=0, verbose_name='Доставлено')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Не доставлено')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Дата запуска')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+            ],
+            options={
+                'verbose_name': 'Рассылка',
+                'verbose_name_plural': 'Рассылки',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0009_tgbroadcast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tgbroadcast',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последнее сохранение прогресса'),
+        ),
+        migrations.AlterField(
+            model_name='tgbroadcast',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Новая'), (2, 'Выполняется'), (3, 'Остановлена'), (4, 'Завершена'), (5, 'В очереди')], default=1, verbose_name='Статус'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
+from django.utils import timezone
 
 from core.models import User
-from goals.models import Category
+from goals.models import Category, Goal
 
 
 class TgUser(models.Model):
@@ -46,15 +47,189 @@ class TgChatState(models.Model):
                                  on_delete=models.CASCADE
                                  )
     is_create_command = models.BooleanField(verbose_name='Выполняется команда /create', default=False)
+    goals_first_id = models.BigIntegerField(verbose_name='Первая цель текущей страницы /goals', null=True)
+    goals_last_id = models.BigIntegerField(verbose_name='Последняя цель текущей страницы /goals', null=True)
 
     class Meta:
         verbose_name = 'Состояние чата'
         verbose_name_plural = 'Состояния чата'
+        constraints = [
+            models.UniqueConstraint(fields=('tg_user',), name='unique_tg_chat_state'),
+        ]
 
-    def set_default(self):
+    def set_default(self, commit: bool = True):
         self.category = None
         self.is_create_command = False
-        self.save(update_fields=('category', 'is_create_command',))
+        if commit:
+            self.save(update_fields=('category', 'is_create_command',))
 
     def __str__(self):
         return str(self.tg_user.tg_id)
+
+
+class TgUpdate(models.Model):
+    """Модель очереди входящих обновлений (режим webhook)
+
+    Обновления сохраняются эндпоинтом POST: /bot/webhook и обрабатываются командой runbotworker
+    """
+
+    class Status(models.IntegerChoices):
+        pending = 1, 'Ожидает обработки'
+        done = 2, 'Обработано'
+        failed = 3, 'Ошибка'
+
+    update_id = models.BigIntegerField(verbose_name='ID обновления', unique=True)
+    chat_id = models.BigIntegerField(verbose_name='ID чата', null=True)
+    payload = models.JSONField(verbose_name='Обновление')
+    status = models.PositiveSmallIntegerField(verbose_name='Статус', choices=Status.choices, default=Status.pending)
+    attempts = models.PositiveSmallIntegerField(verbose_name='Количество попыток', default=0)
+    created = models.DateTimeField(verbose_name='Дата получения', auto_now_add=True)
+    processed = models.DateTimeField(verbose_name='Дата обработки', null=True)
+
+    class Meta:
+        verbose_name = 'Входящее обновление'
+        verbose_name_plural = 'Входящие обновления'
+        indexes = [
+            models.Index(
+                fields=('update_id',),
+                name='tgupdate_pending_idx',
+                condition=models.Q(status=1),
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.update_id)
+
+
+class TgOutbox(models.Model):
+    """Модель очереди исходящих уведомлений
+
+    Уведомление записывается в одной транзакции с изменением, о котором оно сообщает, и доставляется
+    командой runoutbox с повторами, поэтому запросы к API проекта не ожидают ответа Telegram
+    """
+
+    class Status(models.IntegerChoices):
+        pending = 1, 'Ожидает отправки'
+        sent = 2, 'Отправлено'
+        failed = 3, 'Ошибка'
+
+    chat_id = models.BigIntegerField(verbose_name='ID чата')
+    text = models.TextField(verbose_name='Текст')
+    status = models.PositiveSmallIntegerField(verbose_name='Статус', choices=Status.choices, default=Status.pending)
+    attempts = models.PositiveSmallIntegerField(verbose_name='Количество попыток', default=0)
+    next_attempt = models.DateTimeField(verbose_name='Следующая попытка', default=timezone.now)
+    error = models.CharField(verbose_name='Последняя ошибка', max_length=255, blank=True)
+    created = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
+    sent = models.DateTimeField(verbose_name='Дата отправки', null=True)
+
+    class Meta:
+        verbose_name = 'Исходящее уведомление'
+        verbose_name_plural = 'Исходящие уведомления'
+        indexes = [
+            models.Index(
+                fields=('next_attempt',),
+                name='tgoutbox_pending_idx',
+                condition=models.Q(status=1),
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.chat_id)
+
+
+class TgReminder(models.Model):
+    """Модель журнала отправленных напоминаний о сроке цели
+
+    Запись создается в одной транзакции с постановкой напоминания в очередь отправки, поэтому после
+    перезапуска планировщика напоминание о том же сроке не отправляется повторно. При переносе срока
+    цели отправляется новое напоминание.
+    """
+
+    goal = models.ForeignKey(Goal, verbose_name='Цель', related_name='tg_reminders', on_delete=models.CASCADE)
+    due_date = models.DateTimeField(verbose_name='Дедлайн', db_index=True)
+    sent = models.DateTimeField(verbose_name='Дата отправки', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Напоминание'
+        verbose_name_plural = 'Напоминания'
+        constraints = [
+            models.UniqueConstraint(fields=('goal', 'due_date',), name='unique_tg_reminder'),
+        ]
+
+    def __str__(self):
+        return str(self.goal_id)
+
+
+class TgBroadcast(models.Model):
+    """Модель рассылки сообщения всем верифицированным Telegram пользователям
+
+    Хранит текст, статус и прогресс рассылки: получатели обрабатываются по возрастанию id
+    Telegram пользователя, после каждой пачки сохраняются id последнего обработанного получателя
+    и количество доставленных и недоставленных сообщений, поэтому прерванная рассылка продолжается
+    с места остановки (сообщения последней незавершенной пачки могут быть отправлены повторно).
+    Выполняющий рассылку процесс обновляет heartbeat при каждом сохранении прогресса: рассылка
+    в статусе running с устаревшим heartbeat (процесс завершился аварийно) продолжается командой runbroadcasts
+    """
+
+    class Status(models.IntegerChoices):
+        new = 1, 'Новая'
+        running = 2, 'Выполняется'
+        paused = 3, 'Остановлена'
+        done = 4, 'Завершена'
+        queued = 5, 'В очереди'
+
+    text = models.TextField(verbose_name='Текст', max_length=4096)
+    status = models.PositiveSmallIntegerField(verbose_name='Статус', choices=Status.choices, default=Status.new)
+    last_tg_user_id = models.BigIntegerField(verbose_name='Последний обработанный получатель', default=0)
+    total = models.PositiveIntegerField(verbose_name='Получателей', default=0)
+    delivered = models.PositiveIntegerField(verbose_name='Доставлено', default=0)
+    failed = models.PositiveIntegerField(verbose_name='Не доставлено', default=0)
+    created = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
+    started = models.DateTimeField(verbose_name='Дата запуска', null=True, blank=True)
+    finished = models.DateTimeField(verbose_name='Дата завершения', null=True, blank=True)
+    heartbeat = models.DateTimeField(verbose_name='Последнее сохранение прогресса', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Рассылка'
+        verbose_name_plural = 'Рассылки'
+
+    def __str__(self):
+        text = str(self.text)
+        return text if len(text) <= 20 else text[:20] + "..."
+
+
+class TgOffset(models.Model):
+    """Модель для хранения offset метода getUpdates
+
+    Хранит идентификатор следующего ожидаемого обновления, чтобы после перезапуска бот
+    продолжал получение обновлений без повторной обработки
+    """
+
+    name = models.CharField(verbose_name='Получатель обновлений', max_length=50, unique=True)
+    offset = models.BigIntegerField(verbose_name='Следующее обновление', default=0)
+    updated = models.DateTimeField(verbose_name='Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Offset обновлений'
+        verbose_name_plural = 'Offset обновлений'
+
+    def __str__(self):
+        return self.name
+
+
+class TgProcessedUpdate(models.Model):
+    """Модель журнала обработанных обновлений
+
+    Запись создается в одной транзакции с изменениями, выполненными при обработке обновления,
+    поэтому повторно доставленное обновление не обрабатывается дважды
+    """
+
+    update_id = models.BigIntegerField(verbose_name='ID обновления', primary_key=True)
+    processed = models.DateTimeField(verbose_name='Дата обработки', auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Обработанное обновление'
+        verbose_name_plural = 'Обработанные обновления'
+
+    def __str__(self):
+        return str(self.update_id)
@@ -1,20 +1,87 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from django.conf import settings
 from requests import exceptions
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 from bot.tg.dc import (
     GetUpdatesResponse, SendMessageResponse,
-    SendMessageResponseSchema, GetUpdatesResponseSchema
+    SendMessageResponseDecoder, GetUpdatesResponseDecoder
+)
+from bot.tg.metrics import TG_REQUEST_DURATION, TG_REQUEST_ERRORS
+
+#: frozenset: Методы API, повтор которых после отправки запроса может выполнить действие дважды
+#: (например, отправить сообщение повторно): для них запрос повторяется только при ошибке соединения
+NOT_IDEMPOTENT_METHODS = frozenset({'sendMessage'})
+
+#: tuple: Сетевые ошибки, после которых запрос мог быть выполнен API (ответ не получен или не прочитан)
+_RESPONSE_ERRORS = (
+    exceptions.ConnectionError, exceptions.Timeout, exceptions.ChunkedEncodingError, exceptions.ContentDecodingError,
 )
 
 
+class TgClientError(exceptions.RequestException):
+    """Ошибка обращения к Telegram API
+
+    Args:
+        description (str): описание ошибки
+        error_code (int | None): код ошибки Telegram API (или HTTP статус)
+        retry_after (int | None): через сколько секунд можно повторить запрос (для кода 429)
+    """
+    def __init__(self, description: str, error_code: int | None = None, retry_after: int | None = None):
+        super().__init__(description)
+        self.description = description
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
 class TgClient:
     """Telegram клиент
 
+    Использует постоянную HTTP-сессию (keep-alive, пул соединений). Запросы выполняются методом POST
+    с JSON-телом; при сетевых ошибках, ответах 5xx и 429 запрос повторяется с экспоненциальной
+    задержкой со случайным разбросом (для 429 - не меньше значения retry_after из ответа API).
+    Методы из NOT_IDEMPOTENT_METHODS после сетевой ошибки повторяются, только если соединение
+    не было установлено. Любая ошибка requests передается вызывающему коду как TgClientError.
+
     Args:
         token (str): токен для доступа к Telegram API
+        base_url (str): адрес Telegram API
+        timeout (float): таймаут запроса в секундах (для getUpdates добавляется к таймауту long polling)
+        max_retries (int): количество повторов запроса
+        backoff (float): базовая задержка перед повтором в секундах
+        max_backoff (float): максимальная задержка перед повтором в секундах
+        pool_size (int): максимальное количество соединений в пуле
+        retry_rate_limited (bool): повторять ли запрос при ответе 429
     """
-    def __init__(self, token: str):
+    def __init__(
+            self,
+            token: str,
+            base_url: str = 'https://api.telegram.org',
+            timeout: float = 10,
+            max_retries: int = 3,
+            backoff: float = 0.5,
+            max_backoff: float = 30,
+            pool_size: int = 10,
+            retry_rate_limited: bool = True,
+    ):
         self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_rate_limited = retry_rate_limited
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def get_url(self, method: str) -> str:
         """Возвращает URL для доступа к Telegram API
@@ -24,7 +91,76 @@ class TgClient:
         Returns:
              str: URL
         """
-        return f'https://api.telegram.org/bot{self.token}/{method}'
+        return f'{self.base_url}/bot{self.token}/{method}'
+
+    def _get_delay(self, attempt: int, retry_after: int | None = None) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after:
+            delay += retry_after
+        return delay
+
+    @staticmethod
+    def _can_retry(method: str, e: exceptions.RequestException) -> bool:
+        """Можно ли повторить запрос после сетевой ошибки"""
+        reason = e.args[0] if e.args else None
+        #: Соединение не установлено (адаптер оборачивает причину в MaxRetryError) - запрос не отправлен
+        if isinstance(e, exceptions.ConnectTimeout):
+            return True
+        if isinstance(getattr(reason, 'reason', reason), NewConnectionError):
+            return True
+        return isinstance(e, _RESPONSE_ERRORS) and method not in NOT_IDEMPOTENT_METHODS
+
+    def _request(self, method: str, payload: dict, timeout: float | None = None) -> dict:
+        """Выполняет запрос к Telegram API с повторами
+
+        Returns:
+            dict: тело успешного ответа
+        Raises:
+            TgClientError: запрос не выполнен после всех повторов или отклонен API
+        """
+        url = self.get_url(method=method)
+        timeout = timeout or self.timeout
+        error: TgClientError | None = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self._get_delay(attempt - 1, error.retry_after))
+            started = time.perf_counter()
+            response = None
+            try:
+                response = self.session.post(url=url, json=payload, timeout=timeout)
+                data = response.json()
+            except (exceptions.RequestException, ValueError) as e:
+                if response is not None:
+                    #: Ответ получен, но его тело - не JSON
+                    error = TgClientError(description='Invalid response', error_code=response.status_code)
+                    TG_REQUEST_ERRORS.inc(method, response.status_code)
+                    if response.status_code >= 500:
+                        continue
+                    raise error
+                error = TgClientError(description=str(e))
+                TG_REQUEST_ERRORS.inc(method, 'network')
+                if self._can_retry(method, e):
+                    continue
+                raise error from e
+            finally:
+                TG_REQUEST_DURATION.observe(time.perf_counter() - started, method)
+
+            if data.get('ok'):
+                return data
+
+            error = TgClientError(
+                description=data.get('description', ''),
+                error_code=data.get('error_code', response.status_code),
+                retry_after=(data.get('parameters') or {}).get('retry_after'),
+            )
+            TG_REQUEST_ERRORS.inc(method, error.error_code)
+            if error.error_code == 429 and not self.retry_rate_limited:
+                raise error
+            if error.error_code != 429 and error.error_code < 500:
+                raise error
+
+        raise error
 
     def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
         """Реализует метод 'getUpdates' API
@@ -38,18 +174,14 @@ class TgClient:
         Returns:
              массив объектов класса Update, содержащий атрибуты принятого сообщения
         """
-        url = self.get_url(method='getUpdates')
-        try:
-            response = requests.get(
-                url=url,
-                params={'offset': offset, 'timeout': timeout}
-            )
-        except exceptions.RequestException:
-            raise exceptions.RequestException
-        else:
-            return GetUpdatesResponseSchema.load(response.json())
+        data = self._request(
+            method='getUpdates',
+            payload={'offset': offset, 'timeout': timeout},
+            timeout=timeout + self.timeout,
+        )
+        return GetUpdatesResponseDecoder.load(data)
 
-    def send_message(self, chat_id: int, text: str) -> SendMessageResponse:
+    def send_message(self, chat_id: int, text: str, reply_markup: dict | None = None) -> SendMessageResponse:
         """Реализует метод 'sendMessage' API
 
         Для отправки сообщения участникам чата
@@ -57,16 +189,106 @@ class TgClient:
         Args:
             chat_id (int): идентификатор чата или имя пользователя целевого чата
             text (str): текст сообщения
+            reply_markup (dict | None): клавиатура, например {'inline_keyboard': [[{'text', 'callback_data'}]]}
         Returns:
              объект класса Message, содержащий атрибуты отправленного сообщения
         """
-        url = self.get_url(method='sendMessage')
-        try:
-            response = requests.get(
-                url=url,
-                params={'chat_id': chat_id, 'text': text}
-            )
-        except exceptions.RequestException:
-            raise exceptions.RequestException
-        else:
-            return SendMessageResponseSchema.load(response.json())
+        payload = {'chat_id': chat_id, 'text': text}
+        if reply_markup is not None:
+            payload['reply_markup'] = reply_markup
+        data = self._request(method='sendMessage', payload=payload)
+        return SendMessageResponseDecoder.load(data)
+
+    def answer_callback_query(self, callback_query_id: str, text: str | None = None) -> bool:
+        """Реализует метод 'answerCallbackQuery' API
+
+        Для подтверждения нажатия кнопки встроенной клавиатуры
+
+        Args:
+            callback_query_id (str): идентификатор нажатия (CallbackQuery.id)
+            text (str | None): текст уведомления для пользователя
+        Returns:
+             bool: результат выполнения
+        """
+        payload = {'callback_query_id': callback_query_id}
+        if text:
+            payload['text'] = text
+        return self._request(method='answerCallbackQuery', payload=payload)['result']
+
+    def edit_message_reply_markup(self, chat_id: int, message_id: int, reply_markup: dict | None = None) -> None:
+        """Реализует метод 'editMessageReplyMarkup' API
+
+        Для замены (или удаления при reply_markup=None) встроенной клавиатуры отправленного сообщения
+
+        Args:
+            chat_id (int): идентификатор чата
+            message_id (int): идентификатор сообщения с клавиатурой
+            reply_markup (dict | None): новая клавиатура
+        """
+        payload = {'chat_id': chat_id, 'message_id': message_id}
+        if reply_markup is not None:
+            payload['reply_markup'] = reply_markup
+        self._request(method='editMessageReplyMarkup', payload=payload)
+
+    def set_webhook(self, url: str, secret_token: str | None = None) -> bool:
+        """Реализует метод 'setWebhook' API
+
+        Для получения входящих обновлений на указанный URL вместо getUpdates
+
+        Args:
+            url (str): HTTPS адрес эндпоинта POST: /bot/webhook
+            secret_token (str): значение заголовка X-Telegram-Bot-Api-Secret-Token в запросах Telegram
+        Returns:
+             bool: результат выполнения
+        """
+        payload = {'url': url, 'allowed_updates': ['message', 'edited_message', 'callback_query']}
+        if secret_token:
+            payload['secret_token'] = secret_token
+        return self._request(method='setWebhook', payload=payload)['result']
+
+    def delete_webhook(self) -> bool:
+        """Реализует метод 'deleteWebhook' API (возврат к получению обновлений через getUpdates)"""
+        return self._request(method='deleteWebhook', payload={})['result']
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def get_tg_client() -> TgClient:
+    """Возвращает Telegram клиент, настроенный по параметрам проекта (settings.TG_*)"""
+    return TgClient(
+        token=settings.TG_TOKEN,
+        base_url=settings.TG_API_URL,
+        timeout=settings.TG_TIMEOUT,
+        max_retries=settings.TG_MAX_RETRIES,
+    )
+
+
+class AsyncTgClient:
+    """Асинхронный Telegram клиент
+
+    Выполняет блокирующие вызовы TgClient в отдельном пуле потоков,
+    не блокируя цикл событий asyncio.
+
+    Args:
+        tg_client (TgClient): синхронный Telegram клиент
+        max_workers (int): количество потоков для HTTP-запросов
+    """
+    def __init__(self, tg_client: TgClient, max_workers: int = 4):
+        self.tg_client = tg_client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tg-http')
+
+    async def _call(self, func, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(**kwargs))
+
+    async def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
+        """Асинхронная версия TgClient.get_updates"""
+        return await self._call(self.tg_client.get_updates, offset=offset, timeout=timeout)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> SendMessageResponse:
+        """Асинхронная версия TgClient.send_message"""
+        return await self._call(self.tg_client.send_message, chat_id=chat_id, text=text, **kwargs)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -2,9 +2,11 @@ from dataclasses import dataclass, field
 from dataclasses_json import dataclass_json, config, Undefined
 from typing import Optional
 
+from bot.tg.decoder import Decoder
+
 
 @dataclass_json(undefined=Undefined.EXCLUDE)
-@dataclass
+@dataclass(slots=True)
 class MessageFrom:
     """Отправитель сообщения"""
 
@@ -19,7 +21,7 @@ class MessageFrom:
 
 
 @dataclass_json(undefined=Undefined.EXCLUDE)
-@dataclass
+@dataclass(slots=True)
 class Chat:
     """Чат"""
 
@@ -32,7 +34,7 @@ class Chat:
 
 
 @dataclass_json(undefined=Undefined.EXCLUDE)
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Сообщение"""
 
@@ -44,17 +46,50 @@ class Message:
 
 
 @dataclass_json(undefined=Undefined.EXCLUDE)
-@dataclass
+@dataclass(slots=True)
+class CallbackQuery:
+    """Нажатие кнопки встроенной клавиатуры"""
+
+    id: str
+    message_from: MessageFrom = field(metadata=config(field_name='from'))
+    message: Optional[Message] = None
+    chat_instance: Optional[str] = None
+    data: Optional[str] = None
+
+
+@dataclass_json(undefined=Undefined.EXCLUDE)
+@dataclass(slots=True)
 class Update:
     """Входящее обновление"""
 
     update_id: int
     message: Optional[Message] = None
     edited_message: Optional[Message] = None
+    callback_query: Optional[CallbackQuery] = None
+
+    @property
+    def sender(self) -> Optional[MessageFrom]:
+        """Отправитель сообщения или пользователь, нажавший кнопку (None - обновление не обрабатывается ботом)"""
+        if self.message:
+            return self.message.message_from
+        if self.callback_query:
+            return self.callback_query.message_from
+        return None
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        """Идентификатор чата, к которому относится обрабатываемое ботом обновление"""
+        if self.message:
+            return self.message.chat.id
+        if self.callback_query:
+            if self.callback_query.message:
+                return self.callback_query.message.chat.id
+            return self.callback_query.message_from.id
+        return None
 
 
 @dataclass_json(undefined=Undefined.EXCLUDE)
-@dataclass
+@dataclass(slots=True)
 class GetUpdatesResponse:
     """Ответ API на метод 'getUpdates'"""
 
@@ -63,7 +98,7 @@ class GetUpdatesResponse:
 
 
 @dataclass_json(undefined=Undefined.EXCLUDE)
-@dataclass
+@dataclass(slots=True)
 class SendMessageResponse:
     """Ответ API на метод 'sendMessage'"""
 
@@ -71,5 +106,11 @@ class SendMessageResponse:
     result: Message
 
 
+UpdateSchema = Update.schema()
 GetUpdatesResponseSchema = GetUpdatesResponse.schema()
 SendMessageResponseSchema = SendMessageResponse.schema()
+
+#: Быстрые декодеры ответов (см. bot.tg.decoder.Decoder), метод load совместим со схемами выше
+UpdateDecoder = Decoder(Update)
+GetUpdatesResponseDecoder = Decoder(GetUpdatesResponse)
+SendMessageResponseDecoder = Decoder(SendMessageResponse)
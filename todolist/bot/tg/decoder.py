@@ -0,0 +1,128 @@
+import dataclasses
+import types
+import typing
+
+_MISSING = dataclasses.MISSING
+
+
+class DecodeError(ValueError):
+    """Ошибка декодирования ответа Telegram API"""
+
+
+def _json_name(field: dataclasses.Field) -> str:
+    """Возвращает имя поля в JSON (с учетом config(field_name=...) из dataclasses_json)"""
+    letter_case = field.metadata.get('dataclasses_json', {}).get('letter_case')
+    return letter_case(field.name) if letter_case else field.name
+
+
+def _unwrap_optional(annotation):
+    """Возвращает X для аннотации Optional[X] (X | None), иначе саму аннотацию"""
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+class Decoder:
+    """Декодер JSON-ответов Telegram API в dataclass-объекты
+
+    Для каждого dataclass при создании декодера один раз генерируется функция, которая обращается
+    только к объявленным полям (остальные ключи ответа не просматриваются) и создает объект
+    позиционными аргументами, минуя обертку __init__ из dataclasses_json. Типы скалярных значений не проверяются: ответ Telegram API считается
+    корректным, проверяется только наличие обязательных полей.
+
+    Предоставляет метод load с той же сигнатурой, что и marshmallow схема dataclasses_json.
+
+    Args:
+        cls: dataclass, в который декодируется ответ
+    """
+
+    def __init__(self, cls: type):
+        self.cls = cls
+        namespace: dict = {'DecodeError': DecodeError, '_new': object.__new__}
+        self._compile(cls, namespace)
+        self._decode = namespace[self._function_name(cls)]
+
+    @staticmethod
+    def _function_name(cls: type) -> str:
+        return f'_decode_{cls.__name__}'
+
+    def _compile(self, cls: type, namespace: dict) -> None:
+        name = self._function_name(cls)
+        if name in namespace:
+            return
+        namespace[name] = None
+
+        hints = typing.get_type_hints(cls)
+        lines = [f'def {name}(data):', '    get = data.get']
+        arguments = []
+        for number, field in enumerate(dataclasses.fields(cls)):
+            key = _json_name(field)
+            annotation = _unwrap_optional(hints[field.name])
+            required = field.default is _MISSING and field.default_factory is _MISSING
+            variable = f'v{number}'
+
+            if required:
+                lines += [
+                    f'    {variable} = get({key!r})',
+                    f'    if {variable} is None:',
+                    f'        raise DecodeError({cls.__name__ + "." + key!r} + ": missing required field")',
+                ]
+            else:
+                default = f'_default_{cls.__name__}_{number}'
+                if field.default_factory is not _MISSING:
+                    namespace[default] = field.default_factory
+                    default += '()'
+                else:
+                    namespace[default] = field.default
+                lines += [
+                    f'    {variable} = get({key!r})',
+                    f'    if {variable} is None:',
+                    f'        {variable} = {default}',
+                ]
+
+            decode = self._value_decoder(annotation, variable, namespace)
+            if decode != variable:
+                if required:
+                    lines.append(f'    {variable} = {decode}')
+                else:
+                    lines += [
+                        f'    if {variable} is not None:',
+                        f'        {variable} = {decode}',
+                    ]
+            arguments.append(variable)
+
+        #: dataclasses_json (undefined=EXCLUDE) оборачивает __init__ функцией, разбирающей сигнатуру
+        #: при каждом вызове; аргументы декодера заведомо совпадают с полями, поэтому вызывается исходный __init__
+        namespace[cls.__name__] = cls
+        namespace[f'_init_{cls.__name__}'] = getattr(cls.__init__, '__wrapped__', cls.__init__)
+        lines += [
+            f'    obj = _new({cls.__name__})',
+            f'    _init_{cls.__name__}(obj, {", ".join(arguments)})',
+            '    return obj',
+        ]
+        exec('\n'.join(lines), namespace)
+
+    def _value_decoder(self, annotation, variable: str, namespace: dict) -> str:
+        """Возвращает выражение, декодирующее значение переменной variable"""
+        if dataclasses.is_dataclass(annotation):
+            self._compile(annotation, namespace)
+            return f'{self._function_name(annotation)}({variable})'
+        if typing.get_origin(annotation) is list:
+            (item,) = typing.get_args(annotation)
+            if dataclasses.is_dataclass(item):
+                self._compile(item, namespace)
+                return f'[{self._function_name(item)}(item) for item in {variable}]'
+        return variable
+
+    def load(self, data: dict):
+        """Декодирует JSON-объект (словарь) в объект dataclass
+
+        Raises:
+            DecodeError: в ответе отсутствует обязательное поле или значение имеет неверную структуру
+        """
+        try:
+            return self._decode(data)
+        except (AttributeError, TypeError) as e:
+            raise DecodeError(f'{self.cls.__name__}: invalid payload ({e})') from e
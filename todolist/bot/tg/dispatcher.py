@@ -0,0 +1,311 @@
+import heapq
+import logging
+import threading
+import time
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from bot.tg.client import TgClient, TgClientError, get_tg_client
+
+#: int: Максимальная длина текста сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    """Ограничитель частоты "маркерная корзина"
+
+    Args:
+        rate (float): скорость пополнения, маркеров в секунду
+        capacity (float): емкость корзины (допустимый всплеск)
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Возвращает время ожидания маркера в секундах (0 - маркер доступен)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass
+class _Outgoing:
+    text: str
+    kwargs: dict
+    method: str = 'send_message'
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class MessageDispatcher:
+    """Очередь исходящих сообщений с ограничением частоты отправки
+
+    Предоставляет метод send_message с той же сигнатурой, что и TgClient, но не блокирует вызывающий
+    код: сообщение помещается в очередь и отправляется пулом потоков с соблюдением общего ограничения
+    (около 30 сообщений в секунду) и ограничения на чат. Несколько текстовых сообщений одному чату,
+    поставленных в очередь в пределах coalesce_window, объединяются в одно. При ответе 429 сообщения
+    возвращаются в очередь и отправляются повторно не раньше, чем через retry_after секунд.
+
+    Args:
+        tg_client: Telegram клиент
+        global_rate (float): общее количество сообщений в секунду
+        chat_rate (float): количество сообщений в секунду для одного чата
+        chat_burst (int): допустимый всплеск сообщений одному чату
+        coalesce_window (float): окно объединения сообщений одному чату, секунды
+        workers (int): количество потоков отправки
+        report_interval (float | None): период записи показателей очереди в журнал, секунды
+    """
+
+    def __init__(
+            self,
+            tg_client: TgClient,
+            global_rate: float = 30,
+            chat_rate: float = 1,
+            chat_burst: int = 3,
+            coalesce_window: float = 0.25,
+            workers: int = 4,
+            report_interval: float | None = None,
+            max_chat_buckets: int = 10_000,
+    ):
+        self.tg_client = tg_client
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.coalesce_window = coalesce_window
+        self.workers = workers
+        self.report_interval = report_interval
+        self.max_chat_buckets = max_chat_buckets
+        self.logger = logging.getLogger(__name__)
+
+        self._global_bucket = TokenBucket(rate=global_rate, capacity=global_rate)
+        self._chat_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._pending: dict[int, deque[_Outgoing]] = {}
+        #: heap: (время готовности, идентификатор чата) - по одной записи на чат с сообщениями в очереди
+        self._schedule: list[tuple[float, int]] = []
+        self._scheduled: set[int] = set()
+        self._in_flight: set[int] = set()
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+
+        self._sent = 0
+        self._failed = 0
+        self._coalesced = 0
+        self._rate_limited = 0
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    def start(self) -> 'MessageDispatcher':
+        """Запускает потоки отправки"""
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'tg-dispatcher-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.report_interval:
+            threading.Thread(target=self._report, name='tg-dispatcher-report', daemon=True).start()
+        return self
+
+    def stop(self, timeout: float | None = 10) -> None:
+        """Отправляет оставшиеся сообщения (включая отправляемые и отложенные после 429) и останавливает потоки"""
+        deadline = time.monotonic() + (timeout or 0)
+        with self._condition:
+            while (self._pending or self._in_flight) and (timeout is None or time.monotonic() < deadline):
+                self._condition.wait(0.1)
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+    def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        """Ставит сообщение в очередь на отправку"""
+        with self._condition:
+            self._pending.setdefault(chat_id, deque()).append(_Outgoing(text=text, kwargs=kwargs))
+            if chat_id not in self._scheduled and chat_id not in self._in_flight:
+                self._push(chat_id, time.monotonic() + self.coalesce_window)
+            self._condition.notify()
+
+    def edit_message_reply_markup(self, chat_id: int, message_id: int, reply_markup: dict | None = None) -> None:
+        """Ставит изменение клавиатуры сообщения в очередь чата (после ранее поставленных сообщений)"""
+        with self._condition:
+            self._pending.setdefault(chat_id, deque()).append(_Outgoing(
+                text='',
+                kwargs={'message_id': message_id, 'reply_markup': reply_markup},
+                method='edit_message_reply_markup',
+            ))
+            if chat_id not in self._scheduled and chat_id not in self._in_flight:
+                self._push(chat_id, time.monotonic())
+            self._condition.notify()
+
+    def answer_callback_query(self, callback_query_id: str, text: str | None = None) -> None:
+        """Подтверждает нажатие кнопки сразу, без очереди: ответ не учитывается в ограничениях на сообщения"""
+        try:
+            self.tg_client.answer_callback_query(callback_query_id=callback_query_id, text=text)
+        except TgClientError as e:
+            self.logger.warning('Failed to answer callback query %s: %s', callback_query_id, e)
+
+    def stats(self) -> dict:
+        """Возвращает показатели очереди: глубину, количество отправленных сообщений, задержку отправки"""
+        with self._condition:
+            latencies = sorted(self._latencies)
+            return {
+                'queue_depth': sum(len(messages) for messages in self._pending.values()),
+                'chats_pending': len(self._pending),
+                'sent': self._sent,
+                'failed': self._failed,
+                'coalesced': self._coalesced,
+                'rate_limited': self._rate_limited,
+                'latency_avg': sum(latencies) / len(latencies) if latencies else 0.0,
+                'latency_p95': latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            }
+
+    def _report(self) -> None:
+        while not self._stopping:
+            time.sleep(self.report_interval)
+            stats = self.stats()
+            self.logger.info(
+                'Outgoing queue: depth=%(queue_depth)s sent=%(sent)s failed=%(failed)s '
+                'coalesced=%(coalesced)s rate_limited=%(rate_limited)s '
+                'latency avg=%(latency_avg).3fs p95=%(latency_p95).3fs', stats
+            )
+
+    def _push(self, chat_id: int, ready: float) -> None:
+        heapq.heappush(self._schedule, (ready, chat_id))
+        self._scheduled.add(chat_id)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate=self.chat_rate, capacity=self.chat_burst)
+            if len(self._chat_buckets) > self.max_chat_buckets:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def _take(self) -> tuple[int, list[_Outgoing]] | None:
+        """Выбирает чат, готовый к отправке, с учетом ограничений частоты (вызывается под блокировкой)"""
+        while not self._stopping:
+            now = time.monotonic()
+            if not self._schedule:
+                self._condition.wait()
+                continue
+
+            ready, chat_id = self._schedule[0]
+            wait = max(ready - now, self._global_bucket.delay(now))
+            if wait <= 0:
+                wait = self._chat_bucket(chat_id).delay(now)
+                if wait > 0:
+                    heapq.heapreplace(self._schedule, (now + wait, chat_id))
+                    continue
+            if wait > 0:
+                self._condition.wait(wait)
+                continue
+
+            heapq.heappop(self._schedule)
+            self._scheduled.discard(chat_id)
+            self._global_bucket.consume(now)
+            self._chat_bucket(chat_id).consume(now)
+            self._in_flight.add(chat_id)
+            return chat_id, self._coalesce(chat_id)
+        return None
+
+    def _coalesce(self, chat_id: int) -> list[_Outgoing]:
+        """Извлекает из очереди чата первое сообщение и присоединяет к нему следующие текстовые сообщения"""
+        messages = self._pending[chat_id]
+        batch = [messages.popleft()]
+        if batch[0].method == 'send_message' and not batch[0].kwargs:
+            length = len(batch[0].text)
+            while messages and messages[0].method == 'send_message' and not messages[0].kwargs \
+                    and messages[0].enqueued - batch[0].enqueued <= self.coalesce_window \
+                    and length + 2 + len(messages[0].text) <= MAX_MESSAGE_LENGTH:
+                length += 2 + len(messages[0].text)
+                batch.append(messages.popleft())
+        if not messages:
+            del self._pending[chat_id]
+        return batch
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                taken = self._take()
+            if taken is None:
+                return
+            chat_id, batch = taken
+            retry_after = None
+            try:
+                retry_after = self._send(chat_id, batch)
+            finally:
+                #: Чат снова планируется к отправке при любом исходе, иначе его сообщения не будут отправлены
+                with self._condition:
+                    self._in_flight.discard(chat_id)
+                    if retry_after is not None:
+                        self._pending.setdefault(chat_id, deque()).extendleft(reversed(batch))
+                    if chat_id in self._pending:
+                        self._push(chat_id, time.monotonic() + (retry_after or 0))
+                    self._condition.notify_all()
+
+    def _send(self, chat_id: int, batch: list[_Outgoing]) -> float | None:
+        """Отправляет сообщение (объединенное из batch)
+
+        Returns:
+            float | None: задержка перед повторной отправкой при ответе 429, иначе None
+        """
+        text = '\n\n'.join(message.text for message in batch)
+        try:
+            if batch[0].method == 'send_message':
+                self.tg_client.send_message(chat_id=chat_id, text=text, **batch[0].kwargs)
+            else:
+                getattr(self.tg_client, batch[0].method)(chat_id=chat_id, **batch[0].kwargs)
+        except TgClientError as e:
+            if e.error_code == 429:
+                with self._condition:
+                    self._rate_limited += 1
+                return float(e.retry_after or 1)
+            self.logger.warning('Failed to send message to chat %s: %s', chat_id, e)
+            with self._condition:
+                self._failed += len(batch)
+            return None
+        except Exception:
+            #: Непредвиденная ошибка не должна завершать поток отправки
+            self.logger.exception('Failed to send message to chat %s', chat_id)
+            with self._condition:
+                self._failed += len(batch)
+            return None
+
+        now = time.monotonic()
+        with self._condition:
+            self._sent += 1
+            self._coalesced += len(batch) - 1
+            self._latencies.extend(now - message.enqueued for message in batch)
+        return None
+
+
+def get_dispatcher(**options) -> MessageDispatcher:
+    """Возвращает запущенную очередь исходящих сообщений, настроенную по параметрам проекта (settings.BOT_*)
+
+    Повторы при ответе 429 выполняет сама очередь, поэтому клиент не ожидает retry_after в потоке отправки.
+
+    Args:
+        options: параметры MessageDispatcher, заменяющие значения из настроек
+    """
+    tg_client = get_tg_client()
+    tg_client.retry_rate_limited = False
+    return MessageDispatcher(**{
+        'tg_client': tg_client,
+        'global_rate': settings.BOT_GLOBAL_RATE,
+        'chat_rate': settings.BOT_CHAT_RATE,
+        'coalesce_window': settings.BOT_COALESCE_WINDOW,
+        'workers': settings.BOT_SENDERS,
+        'report_interval': settings.BOT_REPORT_INTERVAL,
+        **options,
+    }).start()
@@ -0,0 +1,204 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Iterable
+
+#: int: Максимальное количество обновлений в ответе getUpdates
+MAX_UPDATES = 100
+
+_path_re = re.compile(r'^/bot(?P<token>[^/]+)/(?P<method>\w+)$')
+
+
+def synthetic_updates(users: int, messages: Iterable[str], first_tg_id: int = 1_000_000,
+                      first_update_id: int = 1) -> list[dict]:
+    """Создает поток обновлений: каждый из users пользователей по очереди отправляет сообщения messages
+
+    Сообщения разных пользователей чередуются, как при одновременной работе с ботом.
+    """
+    updates = []
+    update_id = first_update_id
+    for text in messages:
+        for number in range(users):
+            tg_id = first_tg_id + number
+            updates.append({
+                'update_id': update_id,
+                'message': {
+                    'message_id': update_id,
+                    'from': {'id': tg_id, 'is_bot': False, 'first_name': 'User', 'username': f'user{tg_id}'},
+                    'chat': {'id': tg_id, 'type': 'private'},
+                    'date': int(time.time()),
+                    'text': text,
+                },
+            })
+            update_id += 1
+    return updates
+
+
+def load_updates(path: str) -> list[dict]:
+    """Загружает записанный поток обновлений: ответ getUpdates, JSON-массив или NDJSON (одно обновление в строке)"""
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data['result'] if isinstance(data, dict) else data
+
+
+class FakeTelegramServer:
+    """Локальная заглушка Telegram Bot API для нагрузочного тестирования бота
+
+    Поддерживает методы getUpdates (long polling с учетом offset), sendMessage, answerCallbackQuery,
+    editMessageReplyMarkup, setWebhook и deleteWebhook.
+    Обновления добавляются методом replay с заданной частотой. Для каждого обновления запоминается время
+    публикации; первое сообщение бота в чат после выдачи обновления считается ответом на него, что дает
+    сквозную задержку обработки.
+
+    Args:
+        host (str): адрес, на котором принимаются запросы
+        port (int): порт (0 - любой свободный)
+        poll_timeout (float): максимальное время ожидания в getUpdates, секунды
+            (меньше таймаута клиента, чтобы бот быстрее замечал остановку)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, poll_timeout: float = 1.0):
+        self.poll_timeout = poll_timeout
+        self._condition = threading.Condition()
+        self._updates: deque[dict] = deque()
+        #: dict: update_id -> время публикации обновления
+        self._published: dict[int, float] = {}
+        #: dict: идентификатор чата -> выданные боту обновления без ответа
+        self._waiting: dict[int, deque[int]] = {}
+        self._message_id = 0
+        self._replay: threading.Thread | None = None
+
+        self.sent: list[dict] = []
+        self.latencies: list[float] = []
+        self.answered = 0
+        self.expected = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _reply(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}') if length else {}
+                match = _path_re.match(self.path.split('?', 1)[0])
+                status, data = server.handle(match.group('method') if match else '', payload)
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Адрес заглушки для настройки TG_API_URL"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeTelegramServer':
+        threading.Thread(target=self._server.serve_forever, name='fake-tg', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def replay(self, updates: list[dict], rate: float | None = None) -> None:
+        """Публикует обновления с частотой rate в секунду (None - все сразу) в отдельном потоке"""
+        self.expected += sum(1 for update in updates if 'message' in update)
+
+        def publish():
+            started = time.monotonic()
+            for number, update in enumerate(updates):
+                if rate:
+                    delay = started + number / rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                with self._condition:
+                    self._updates.append(update)
+                    self._published[update['update_id']] = time.monotonic()
+                    self._condition.notify_all()
+
+        self._replay = threading.Thread(target=publish, name='fake-tg-replay', daemon=True)
+        self._replay.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Ожидает ответов бота на все опубликованные сообщения
+
+        Returns:
+            bool: получены ли все ответы до истечения timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self.answered < self.expected:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def handle(self, method: str, payload: dict) -> tuple[int, dict]:
+        """Выполняет метод API и возвращает (HTTP статус, тело ответа)"""
+        if method == 'getUpdates':
+            return 200, {'ok': True, 'result': self._get_updates(payload)}
+        if method == 'sendMessage':
+            return 200, {'ok': True, 'result': self._send_message(payload)}
+        if method in ('answerCallbackQuery', 'editMessageReplyMarkup', 'setWebhook', 'deleteWebhook'):
+            return 200, {'ok': True, 'result': True}
+        return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+
+    def _get_updates(self, payload: dict) -> list[dict]:
+        offset = int(payload.get('offset') or 0)
+        timeout = min(float(payload.get('timeout') or 0), self.poll_timeout)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            #: Обновления до offset подтверждены ботом
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+            while not self._updates and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+
+            result = list(self._updates)[:MAX_UPDATES]
+            for update in result:
+                message = update.get('message')
+                if message and update['update_id'] in self._published:
+                    self._waiting.setdefault(message['chat']['id'], deque()).append(update['update_id'])
+            return result
+
+    def _send_message(self, payload: dict) -> dict:
+        now = time.monotonic()
+        with self._condition:
+            self._message_id += 1
+            self.sent.append(payload)
+            waiting = self._waiting.get(payload.get('chat_id'))
+            while waiting:
+                published = self._published.pop(waiting.popleft(), None)
+                if published is not None:
+                    self.latencies.append(now - published)
+                    self.answered += 1
+            self._condition.notify_all()
+            return {
+                'message_id': self._message_id,
+                'from': {'id': 1, 'is_bot': True, 'first_name': 'TodoList'},
+                'chat': {'id': payload.get('chat_id'), 'type': 'private'},
+                'date': int(time.time()),
+                'text': payload.get('text'),
+            }
@@ -0,0 +1,319 @@
+import bisect
+import math
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Iterable
+
+from django.conf import settings
+
+#: tuple: Границы интервалов гистограмм длительности (секунды)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+#: tuple: Границы интервалов гистограмм количества (обновлений в ответе, запросов к БД)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+#: Тип показателя, вычисляемого при запросе: (имя, тип, описание, метки, значение)
+Sample = tuple[str, str, str, dict, float]
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Показатель с набором меток; значения хранятся по кортежу значений меток"""
+
+    kind = ''
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: tuple) -> tuple:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f'{self.name}: expected labels {self.label_names}, got {labels}')
+        return tuple(str(value) for value in labels)
+
+    def samples(self) -> Iterable[tuple[str, dict, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонно возрастающий счетчик"""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f'{self.name}_total', dict(zip(self.label_names, key)), value
+
+
+class Histogram(_Metric):
+    """Гистограмма: количество наблюдений по интервалам, сумма и количество наблюдений
+
+    Args:
+        buckets (tuple): верхние границы интервалов (по возрастанию, без +Inf)
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DURATION_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                #: [количество по интервалам (последний - +Inf)..., сумма]
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        for key, counts in values:
+            labels = dict(zip(self.label_names, key))
+            total = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                total += count
+                yield f'{self.name}_bucket', {**labels, 'le': _format_value(bound)}, total
+            yield f'{self.name}_sum', labels, counts[-1]
+            yield f'{self.name}_count', labels, total
+
+
+class Registry:
+    """Набор показателей процесса в текстовом формате Prometheus
+
+    Кроме показателей (Counter, Histogram) поддерживает сборщики - функции, вычисляющие значения
+    при запросе (например, глубину очереди исходящих сообщений).
+    """
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Добавляет сборщик, возвращающий показатели (имя, тип, описание, метки, значение)"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def reset(self) -> None:
+        """Сбрасывает значения показателей и удаляет сборщики (в процессе, созданном через fork)"""
+        with self._lock:
+            self._collectors.clear()
+            for metric in self._metrics:
+                with metric._lock:
+                    metric._values.clear()
+
+    def render(self) -> str:
+        """Возвращает значения всех показателей в текстовом формате Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            family = f'{metric.name}_total' if metric.kind == 'counter' else metric.name
+            lines.append(f'# HELP {family} {metric.description}')
+            lines.append(f'# TYPE {family} {metric.kind}')
+            lines.extend(
+                f'{name}{_format_labels(labels)} {_format_value(value)}' for name, labels, value in metric.samples()
+            )
+
+        described = set()
+        for collector in collectors:
+            for name, kind, description, labels, value in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f'# HELP {name} {description}')
+                    lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class QueryCounter:
+    """Считает запросы к БД (обертка connection.execute_wrapper)
+
+    Устанавливается на время обработки обновления или, в нагрузочных тестах, во все создаваемые соединения
+    (метод install - обработчик сигнала connection_created), поэтому счетчик защищен блокировкой.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+#: Показатели процесса (у каждого процесса-обработчика runbot --processes - свои)
+REGISTRY = Registry()
+
+POLL_UPDATES = REGISTRY.histogram(
+    'bot_poll_updates', 'Updates returned by one getUpdates call', buckets=COUNT_BUCKETS,
+)
+UPDATE_DURATION = REGISTRY.histogram(
+    'bot_update_duration_seconds', 'Update processing time by chat state class', labels=('state',),
+)
+UPDATE_QUERIES = REGISTRY.histogram(
+    'bot_update_db_queries', 'Database queries per update by chat state class', labels=('state',),
+    buckets=COUNT_BUCKETS,
+)
+UPDATE_LAG = REGISTRY.histogram(
+    'bot_update_lag_seconds', 'Time between the message date and the start of its processing',
+)
+UPDATE_ERRORS = REGISTRY.counter(
+    'bot_update_errors', 'Updates that failed to process',
+)
+TG_REQUEST_DURATION = REGISTRY.histogram(
+    'bot_tg_request_duration_seconds', 'Telegram Bot API request time (one attempt) by method', labels=('method',),
+)
+TG_REQUEST_ERRORS = REGISTRY.counter(
+    'bot_tg_request_errors', 'Failed Telegram Bot API requests (one attempt) by method and error code',
+    labels=('method', 'code'),
+)
+
+
+def dispatcher_collector(dispatcher, labels: dict | None = None) -> Callable[[], Iterable[Sample]]:
+    """Возвращает сборщик показателей очереди исходящих сообщений (MessageDispatcher.stats)"""
+    labels = labels or {}
+
+    def collect():
+        stats = dispatcher.stats()
+        yield 'bot_outgoing_queue_depth', 'gauge', 'Messages waiting in the outgoing queue', labels, \
+            stats['queue_depth']
+        yield 'bot_outgoing_chats_pending', 'gauge', 'Chats with messages in the outgoing queue', labels, \
+            stats['chats_pending']
+        for key, description in (
+                ('sent', 'Messages sent by the outgoing queue'),
+                ('failed', 'Messages dropped by the outgoing queue after an API error'),
+                ('coalesced', 'Messages merged into a previous message to the same chat'),
+                ('rate_limited', 'Sends postponed after a 429 response'),
+        ):
+            yield f'bot_outgoing_{key}_total', 'counter', description, labels, stats[key]
+        yield 'bot_outgoing_latency_p95_seconds', 'gauge', \
+            'Queueing plus send time of recent messages, 95th percentile', labels, stats['latency_p95']
+    return collect
+
+
+def store_collector(store, labels: dict | None = None) -> Callable[[], Iterable[Sample]]:
+    """Возвращает сборщик показателей кэша состояний чатов (CachedStore.stats)"""
+    labels = labels or {}
+
+    def collect():
+        stats = store.stats()
+        yield 'bot_state_cache_size', 'gauge', 'Telegram users in the chat state cache', labels, stats['size']
+        yield 'bot_state_cache_dirty', 'gauge', 'Cached chat states not yet written to the database', labels, \
+            stats['dirty']
+        yield 'bot_state_cache_hits_total', 'counter', 'Chat state cache hits', labels, stats['hits']
+        yield 'bot_state_cache_misses_total', 'counter', 'Chat state cache misses', labels, stats['misses']
+    return collect
+
+
+def workers_collector(runner) -> Callable[[], Iterable[Sample]]:
+    """Возвращает сборщик показателей процессов-обработчиков (ShardedRunner.stats)"""
+
+    def collect():
+        for stats in runner.stats():
+            labels = {'worker': stats['worker']}
+            yield 'bot_worker_processed_total', 'counter', 'Updates processed by the worker process', labels, \
+                stats['processed']
+            yield 'bot_worker_failed_total', 'counter', 'Updates that failed in the worker process', labels, \
+                stats['failed']
+            yield 'bot_worker_queue_depth', 'gauge', 'Updates waiting in the worker queue', labels, \
+                stats['queue_depth']
+            yield 'bot_worker_restarts_total', 'counter', 'Worker process restarts', labels, stats['restarts']
+    return collect
+
+
+class MetricsServer:
+    """HTTP-сервер показателей процесса (GET /metrics в текстовом формате Prometheus)
+
+    Args:
+        port (int): порт (0 - любой свободный)
+        host (str | None): адрес, на котором принимаются запросы (по умолчанию - settings.BOT_METRICS_HOST)
+        registry (Registry): набор показателей
+    """
+
+    def __init__(self, port: int, host: str | None = None, registry: Registry = REGISTRY):
+        host = settings.BOT_METRICS_HOST if host is None else host
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+    def start(self) -> 'MetricsServer':
+        threading.Thread(target=self._server.serve_forever, name='bot-metrics', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,9 +1,13 @@
-from rest_framework import permissions, generics, mixins
+import hmac
 
-from bot.models import TgUser
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from rest_framework import permissions, generics, mixins, views, exceptions
+from rest_framework.response import Response
+
+from bot.models import TgUser, TgUpdate, TgOutbox
 from bot.serializers import TgUserSerializer
-from bot.tg.client import TgClient
-from todolist import settings
 
 
 class TgUserUpdateView(mixins.UpdateModelMixin, generics.GenericAPIView):
@@ -29,10 +33,52 @@ class TgUserUpdateView(mixins.UpdateModelMixin, generics.GenericAPIView):
     def patch(self, request, *args, **kwargs):
         return self.partial_update(request, *args, **kwargs)
 
-    #: Переопределяем метод для реализации отправки сообщения об удачной верификации Telegram пользователя
+    #: Переопределяем метод для постановки сообщения об удачной верификации Telegram пользователя
+    #: в очередь уведомлений (отправляется командой runoutbox после фиксации транзакции)
     def perform_update(self, serializer):
-        tg_user: TgUser = serializer.save()
-        TgClient(token=settings.TG_TOKEN).send_message(
-            chat_id=tg_user.tg_id,
-            text='[verification was successful]'
-        )
+        with transaction.atomic():
+            tg_user: TgUser = serializer.save()
+            TgOutbox.objects.create(
+                chat_id=tg_user.tg_id,
+                text='[verification was successful]'
+            )
+
+
+class TgWebhookView(views.APIView):
+    """Представление для обработки запросов на эндпоинт POST: /bot/webhook
+
+    Прием входящих обновлений от Telegram (режим webhook). Обновление только сохраняется
+    в очередь TgUpdate и обрабатывается командой runbotworker.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        if not settings.TG_WEBHOOK_SECRET:
+            raise Http404
+
+        token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not hmac.compare_digest(token.encode(), settings.TG_WEBHOOK_SECRET.encode()):
+            raise exceptions.PermissionDenied
+
+        update = request.data
+        if not isinstance(update, dict) or not isinstance(update.get('update_id'), int):
+            raise exceptions.ValidationError({'update_id': ['This field is required.']})
+
+        message = update.get('message') or update.get('edited_message') or {}
+        callback_query = update.get('callback_query') or {}
+        chat_id = (message.get('chat') or {}).get('id')
+        if chat_id is None and callback_query:
+            chat_id = ((callback_query.get('message') or {}).get('chat') or {}).get('id') \
+                or (callback_query.get('from') or {}).get('id')
+        #: Повторная доставка того же обновления игнорируется
+        TgUpdate.objects.bulk_create([
+            TgUpdate(
+                update_id=update['update_id'],
+                chat_id=chat_id,
+                payload=update,
+            )
+        ], ignore_conflicts=True)
+
+        return Response({})
@@ -0,0 +1,132 @@
+import io
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.urls import resolve, Resolver404
+from rest_framework import status
+
+from core.cache import get_request_cache
+
+#: tuple: Префиксы маршрутов, доступных в пакетном запросе
+ALLOWED_PREFIXES = ('/goals/', '/core/', '/bot/')
+
+logger = logging.getLogger(__name__)
+
+
+def _error(status_code: int, detail: str) -> dict:
+    return {'status': status_code, 'body': {'detail': detail}}
+
+
+def build_subrequest(request: HttpRequest, method: str, path: str, body=None) -> WSGIRequest:
+    """Создает вложенный запрос на основе исходного
+
+    Вложенный запрос использует пользователя, сессию и кэш исходного запроса,
+    поэтому аутентификация и загрузка сессии выполняются один раз на весь пакет.
+    Проверка CSRF уже выполнена для исходного запроса.
+    """
+    url = urlsplit(path)
+    payload = b'' if body is None else json.dumps(body).encode()
+
+    environ = {
+        key: value for key, value in request.META.items()
+        if not key.startswith('HTTP_CONTENT') and key not in ('CONTENT_TYPE', 'CONTENT_LENGTH')
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': io.BytesIO(payload),
+    })
+
+    subrequest = WSGIRequest(environ)
+    subrequest.user = request.user
+    subrequest.session = request.session
+    subrequest.cache = get_request_cache(request)
+    subrequest._dont_enforce_csrf_checks = True
+    return subrequest
+
+
+def _to_result(response: HttpResponse) -> dict:
+    if getattr(response, 'streaming', False):
+        response.close()
+        return _error(status.HTTP_400_BAD_REQUEST, 'Streaming responses are not supported in batch requests.')
+
+    if hasattr(response, 'render'):
+        response.render()
+
+    body = None
+    if response.content:
+        if response.get('Content-Type', '').startswith('application/json'):
+            body = json.loads(response.content)
+        else:
+            body = response.content.decode(response.charset or 'utf-8', errors='replace')
+    return {'status': response.status_code, 'body': body}
+
+
+def dispatch(request: HttpRequest, method: str, path: str, body=None) -> dict:
+    """Выполняет один вложенный запрос через URL resolver без сетевого обращения
+
+    Returns:
+        dict: {'status': код ответа, 'body': тело ответа}
+    """
+    if not path.startswith(ALLOWED_PREFIXES):
+        return _error(status.HTTP_400_BAD_REQUEST, f'Path must start with one of: {", ".join(ALLOWED_PREFIXES)}')
+
+    subrequest = build_subrequest(request, method, path, body)
+    try:
+        match = resolve(subrequest.path_info)
+    except Resolver404:
+        return _error(status.HTTP_404_NOT_FOUND, 'Not found.')
+
+    subrequest.resolver_match = match
+    response = match.func(subrequest, *match.args, **match.kwargs)
+    return _to_result(response)
+
+
+def _dispatch_safely(request: HttpRequest, operation: dict) -> dict:
+    """Выполняет вложенный запрос в отдельной точке сохранения
+
+    Исключение вложенного представления (например, IntegrityError) откатывает только его изменения
+    и возвращается как результат с кодом 500; остальные запросы пакета получают свои результаты.
+    """
+    try:
+        with transaction.atomic():
+            return dispatch(request, **operation)
+    except Exception:
+        logger.exception('Batch request %s %s failed', operation.get('method'), operation.get('path'))
+        return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, 'A server error occurred.')
+
+
+def run_batch(request: HttpRequest, operations: list[dict], atomic: bool = False) -> list[dict]:
+    """Последовательно выполняет вложенные запросы пакета
+
+    Args:
+        request: исходный (внешний) запрос
+        operations: список словарей с ключами method, path, body
+        atomic (bool): все или ничего - при первом ответе с кодом >= 400
+            изменения откатываются, а оставшиеся запросы не выполняются;
+            иначе каждый запрос выполняется в своей точке сохранения
+    Returns:
+        list: результаты в порядке запросов
+    """
+    if not atomic:
+        return [_dispatch_safely(request, operation) for operation in operations]
+
+    results = []
+    with transaction.atomic():
+        for operation in operations:
+            result = _dispatch_safely(request, operation)
+            results.append(result)
+            if result['status'] >= status.HTTP_400_BAD_REQUEST:
+                transaction.set_rollback(True)
+                break
+
+    skipped = _error(status.HTTP_424_FAILED_DEPENDENCY, 'Not executed: previous request failed.')
+    results += [skipped] * (len(operations) - len(results))
+    return results
@@ -0,0 +1,99 @@
+from django.db import models
+from django.http import HttpRequest
+
+from goals.models import BoardParticipant
+
+
+def get_request_cache(request: HttpRequest) -> dict:
+    """Возвращает кэш уровня запроса
+
+    Кэш хранится в исходном HttpRequest и является общим для всех вложенных запросов POST: /batch.
+    """
+    request = getattr(request, '_request', request)
+    if not hasattr(request, 'cache'):
+        request.cache = {}
+    return request.cache
+
+
+class IdentityMap:
+    """Карта идентичности объектов в пределах одного запроса
+
+    Хранит загруженные экземпляры моделей по первичному ключу, поэтому повторные
+    обращения к одному и тому же объекту (в том числе через внешние ключи) не выполняют запросов к БД.
+    Также кэширует роли участников досок.
+    """
+
+    def __init__(self):
+        self._objects: dict[tuple[str, int], models.Model] = {}
+        self._roles: dict[tuple[int, int], int | None] = {}
+
+    def add(self, obj: models.Model) -> models.Model:
+        """Добавляет (или заменяет более свежим) экземпляр модели"""
+        self._objects[(obj._meta.label, obj.pk)] = obj
+        return obj
+
+    def get(self, model: type[models.Model], pk: int) -> models.Model:
+        """Возвращает экземпляр модели по первичному ключу, загружая его из БД при отсутствии в карте"""
+        key = (model._meta.label, pk)
+        if key not in self._objects:
+            self._objects[key] = model._default_manager.get(pk=pk)
+        return self._objects[key]
+
+    def related(self, obj: models.Model, *path: str) -> models.Model:
+        """Проходит по цепочке внешних ключей через карту идентичности
+
+        Пример: identity_map.related(goal, 'category', 'board')
+
+        Уже загруженные связанные объекты (select_related) добавляются в карту,
+        отсутствующие берутся из карты или загружаются по первичному ключу.
+        """
+        for name in path:
+            field = obj._meta.get_field(name)
+            if field.is_cached(obj):
+                related = self.add(field.get_cached_value(obj))
+            else:
+                related = self.get(field.related_model, getattr(obj, field.attname))
+                field.set_cached_value(obj, related)
+            obj = related
+        return obj
+
+    def register(self, obj: models.Model) -> None:
+        """Добавляет объект и все уже загруженные вместе с ним связанные объекты"""
+        self.add(obj)
+        for related in obj._state.fields_cache.values():
+            if isinstance(related, models.Model):
+                self.register(related)
+
+    def get_role(self, board_id: int, user_id: int) -> int | None:
+        """Возвращает роль пользователя на доске (None - не участник)"""
+        key = (board_id, user_id)
+        if key not in self._roles:
+            self._roles[key] = BoardParticipant.objects.filter(
+                board_id=board_id, user_id=user_id
+            ).values_list('role', flat=True).first()
+        return self._roles[key]
+
+    def forget_roles(self, board_id: int) -> None:
+        """Сбрасывает кэш ролей участников доски (после изменения списка участников)"""
+        for key in [key for key in self._roles if key[0] == board_id]:
+            del self._roles[key]
+
+
+def get_identity_map(request: HttpRequest) -> IdentityMap:
+    """Возвращает карту идентичности текущего запроса"""
+    cache = get_request_cache(request)
+    if 'identity_map' not in cache:
+        identity_map = IdentityMap()
+        if request.user.is_authenticated:
+            identity_map.add(request.user)
+        cache['identity_map'] = identity_map
+    return cache['identity_map']
+
+
+class IdentityMapMixin:
+    """Примесь для представлений: регистрирует полученный объект в карте идентичности запроса"""
+
+    def get_object(self):
+        obj = super().get_object()
+        get_identity_map(self.request).register(obj)
+        return obj
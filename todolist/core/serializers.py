@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, hashers
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
@@ -60,6 +61,21 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = ("id", "username", "first_name", "last_name", "email")
 
 
+class NestedProfileSerializer(ProfileSerializer):
+    """Сериализатор пользователя для вложения в другие сериализаторы
+
+    Запоминает представление каждого пользователя по id на время жизни сериализатора (одного ответа),
+    поэтому автор сотен объектов на странице сериализуется один раз.
+    """
+
+    def to_representation(self, instance: User):
+        if not hasattr(self, '_memo'):
+            self._memo: dict = {}
+        if instance.pk not in self._memo:
+            self._memo[instance.pk] = super().to_representation(instance)
+        return self._memo[instance.pk]
+
+
 class UpdatePasswordSerializer(serializers.Serializer):
     """Сериализатор представления UpdatePasswordView"""
 
@@ -81,3 +97,36 @@ class UpdatePasswordSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         raise NotImplementedError
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Сериализатор одного вложенного запроса представления BatchView"""
+
+    method = serializers.ChoiceField(choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'))
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, default=None)
+
+    #: Метод HTTP принимается в любом регистре
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get('method'), str):
+            data = {**data, 'method': data['method'].upper()}
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        raise NotImplementedError
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError
+
+
+class BatchSerializer(serializers.Serializer):
+    """Сериализатор представления BatchView"""
+
+    atomic = serializers.BooleanField(default=False)
+    requests = BatchOperationSerializer(many=True, allow_empty=False, max_length=settings.BATCH_MAX_REQUESTS)
+
+    def create(self, validated_data):
+        raise NotImplementedError
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError
@@ -1,12 +1,13 @@
 from django.contrib.auth import login, logout
 from rest_framework import status
-from rest_framework.generics import CreateAPIView, RetrieveUpdateDestroyAPIView, UpdateAPIView
+from rest_framework.generics import CreateAPIView, RetrieveUpdateDestroyAPIView, UpdateAPIView, GenericAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from core import batch
 from core.models import User
 from core.serializers import UserRegistrationSerializer, UserLoginSerializer, ProfileSerializer, \
-    UpdatePasswordSerializer
+    UpdatePasswordSerializer, BatchSerializer
 
 
 class UserCreateView(CreateAPIView):
@@ -64,3 +65,25 @@ class UpdatePasswordView(UpdateAPIView):
 
     def get_object(self):
         return self.request.user
+
+
+class BatchView(GenericAPIView):
+    """Представление для обработки запроса на эндпоинт POST: /batch
+
+    Выполнение нескольких запросов к маршрутам goals, core и bot за одно обращение.
+    Вложенные запросы выполняются по порядку, без сетевых обращений, с общим пользователем и кэшем запроса.
+    При atomic=true выполняются в одной транзакции по принципу "все или ничего".
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = batch.run_batch(
+            request=request._request,
+            operations=serializer.validated_data['requests'],
+            atomic=serializer.validated_data['atomic'],
+        )
+        return Response({'responses': results}, status=status.HTTP_200_OK)
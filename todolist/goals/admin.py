@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from goals.models import Category, Goal, Comment, Board
+from goals.models import Category, Goal, Comment, Board, Event
 
 
 @admin.register(Board)
@@ -33,3 +33,12 @@ class CommentAdmin(admin.ModelAdmin):
 
     list_display = ('text', 'user', 'goal', 'created',)
     search_fields = ('text', 'user__username',)
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    """Регистрация модели Event для отображения в панели администратора"""
+
+    list_display = ('id', 'entity', 'action', 'board_id', 'object_id', 'user_id', 'created', 'dispatched',)
+    list_filter = ('entity', 'action',)
+    show_full_result_count = False
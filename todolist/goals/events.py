@@ -0,0 +1,120 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from goals.models import Category, Event, Goal
+
+Entity = Event.Entity
+Action = Event.Action
+
+
+def category_board_id(category_id: int) -> Subquery:
+    """Возвращает подзапрос доски категории: доска определяется в запросе записи события"""
+    return Subquery(Category.objects.filter(id=category_id).values('board_id')[:1])
+
+
+def goal_board_id(goal_id: int) -> Subquery:
+    """Возвращает подзапрос доски цели: доска определяется в запросе записи события"""
+    return Subquery(Goal.objects.filter(id=goal_id).values('category__board_id')[:1])
+
+
+def event(entity: Entity, action: Action, board_id: int | Subquery, object_id: int | None = None,
+          user_id: int | None = None, **payload) -> Event:
+    """Создает (не сохраняя) событие журнала изменений
+
+    Args:
+        entity: тип измененного объекта
+        action: действие
+        board_id (int | Subquery): доска, к которой относится объект (или подзапрос, см. goal_board_id)
+        object_id (int | None): идентификатор объекта (None - изменение множества объектов)
+        user_id (int | None): пользователь, выполнивший изменение
+        payload: краткое описание изменения (например, fields - список измененных полей)
+    """
+    return Event(entity=entity, action=action, board_id=board_id, object_id=object_id, user_id=user_id,
+                 payload=payload)
+
+
+def record(*events: Event) -> None:
+    """Записывает события одним запросом (вызывается в транзакции изменения)"""
+    if events:
+        Event.objects.bulk_create(events)
+
+
+def log_events(events: list[Event]) -> None:
+    """Обработчик событий по умолчанию: записывает количество событий пачки в журнал"""
+    logging.getLogger(__name__).info('Dispatched %s events (last id %s)', len(events), events[-1].id)
+
+
+def get_handlers() -> list[Callable[[list[Event]], None]]:
+    """Возвращает обработчики событий из настройки GOALS_EVENT_HANDLERS (пути к функциям)"""
+    return [import_string(path) for path in settings.GOALS_EVENT_HANDLERS]
+
+
+class EventDispatcher:
+    """Обработчик журнала изменений Event
+
+    События выбираются пачками по порядку записи через SELECT ... FOR UPDATE SKIP LOCKED и передаются
+    каждому обработчику в той же транзакции, что и отметка об обработке. Если обработчик завершился
+    с ошибкой, транзакция откатывается и пачка обрабатывается повторно (доставка "хотя бы один раз").
+    Можно запускать несколько диспетчеров: они обрабатывают разные пачки, но тогда порядок обработки
+    событий разных пачек не гарантируется.
+
+    Args:
+        handlers: функции handler(events), вызываемые для каждой пачки (по умолчанию - get_handlers())
+        batch_size (int): количество событий, выбираемых за один раз
+        retention (int | None): срок хранения обработанных событий, секунды
+            (по умолчанию - settings.GOALS_EVENT_RETENTION)
+        cleanup_interval (float): минимальный период удаления устаревших событий, секунды
+    """
+
+    def __init__(self, handlers: Iterable[Callable[[list[Event]], None]] | None = None, batch_size: int = 500,
+                 retention: int | None = None, cleanup_interval: float = 3600):
+        self.handlers = list(get_handlers() if handlers is None else handlers)
+        self.batch_size = batch_size
+        self.retention = settings.GOALS_EVENT_RETENTION if retention is None else retention
+        self.cleanup_interval = cleanup_interval
+        self.logger = logging.getLogger(__name__)
+        self._cleaned: float | None = None
+
+    def get_queryset(self):
+        return Event.objects.filter(dispatched__isnull=True).order_by('id')
+
+    def drain(self) -> int:
+        """Обрабатывает одну пачку событий
+
+        Returns:
+            int: количество обработанных событий
+        """
+        with transaction.atomic():
+            events = list(self.get_queryset().select_for_update(skip_locked=True)[:self.batch_size])
+            if not events:
+                return 0
+            for handler in self.handlers:
+                handler(events)
+            Event.objects.filter(id__in=[item.id for item in events]).update(dispatched=timezone.now())
+        return len(events)
+
+    def cleanup(self, force: bool = False) -> int:
+        """Удаляет обработанные события старше retention (не чаще, чем раз в cleanup_interval)
+
+        Returns:
+            int: количество удаленных событий
+        """
+        now = time.monotonic()
+        if not force and self._cleaned is not None and now - self._cleaned < self.cleanup_interval:
+            return 0
+        self._cleaned = now
+        deleted, _ = Event.objects.filter(
+            created__lt=timezone.now() - timedelta(seconds=self.retention),
+            dispatched__isnull=False,
+        ).delete()
+        if deleted:
+            self.logger.info('Removed %s dispatched events', deleted)
+        return deleted
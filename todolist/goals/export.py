@@ -0,0 +1,193 @@
+import csv
+import zipfile
+from contextlib import contextmanager
+from typing import Iterator, Iterable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from goals.models import Board, Category, Goal, Comment
+
+#: int: Количество строк, получаемых из серверного курсора за одно обращение к БД
+CHUNK_SIZE = 2000
+
+#: Описание выгружаемых сущностей: имя -> (модель, поля)
+ENTITIES: dict[str, tuple] = {
+    'boards': (Board, ('id', 'title', 'created', 'updated')),
+    'categories': (Category, ('id', 'board_id', 'user_id', 'title', 'created', 'updated')),
+    'goals': (Goal, (
+        'id', 'category_id', 'user_id', 'title', 'description',
+        'status', 'priority', 'due_date', 'created', 'updated'
+    )),
+    'comments': (Comment, ('id', 'goal_id', 'user_id', 'text', 'created', 'updated')),
+}
+
+FORMATS = ('ndjson', 'csv', 'zip')
+
+
+def get_querysets(user_id: int) -> dict:
+    """Возвращает наборы данных пользователя для выгрузки
+
+    Фильтры совпадают с фильтрами представлений приложения goals.
+
+    Args:
+        user_id (int): идентификатор пользователя
+    Returns:
+        dict: имя сущности -> QuerySet
+    """
+    return {
+        'boards': Board.objects.filter(
+            is_deleted=False,
+            participants__user_id=user_id,
+        ),
+        'categories': Category.objects.filter(
+            is_deleted=False,
+            board__participants__user_id=user_id,
+        ),
+        'goals': Goal.objects.filter(
+            category__board__participants__user_id=user_id,
+            category__is_deleted=False,
+            status__lt=Goal.Status.archived,
+        ),
+        'comments': Comment.objects.filter(
+            goal__category__board__participants__user_id=user_id,
+            goal__status__lt=Goal.Status.archived,
+        ),
+    }
+
+
+@contextmanager
+def snapshot():
+    """Открывает транзакцию с уровнем изоляции REPEATABLE READ
+
+    Все запросы внутри блока видят один и тот же снимок данных. Серверные курсоры
+    (QuerySet.iterator) в PostgreSQL также требуют открытой транзакции.
+    Если транзакция уже открыта (например, в тестах), уровень изоляции не меняется.
+    """
+    is_outer = not connection.in_atomic_block
+    with transaction.atomic():
+        if is_outer:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def iter_rows(user_id: int, entity: str) -> Iterator[tuple]:
+    """Построчно возвращает данные сущности через серверный курсор
+
+    Args:
+        user_id (int): идентификатор пользователя
+        entity (str): имя сущности (см. ENTITIES)
+    Returns:
+        итератор кортежей значений полей
+    """
+    _, fields = ENTITIES[entity]
+    queryset = get_querysets(user_id)[entity].order_by('id').values_list(*fields)
+    return queryset.iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает записанную строку вместо ее сохранения"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class _StreamBuffer:
+    """Накопитель байтов для потоковой записи zip-архива
+
+    Не поддерживает seek/tell, поэтому zipfile пишет архив последовательно
+    (с дескрипторами данных после каждого файла).
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _to_csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _csv_lines(fields: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_to_csv_value(value) for value in row])
+
+
+def stream_ndjson(user_id: int) -> Iterator[bytes]:
+    """Выгрузка всех данных пользователя в формате NDJSON
+
+    Каждая строка - JSON-объект с полем 'type' (имя сущности).
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    with snapshot():
+        for entity, (_, fields) in ENTITIES.items():
+            lines = []
+            for row in iter_rows(user_id, entity):
+                record = {'type': entity, **dict(zip(fields, row))}
+                lines.append(encoder.encode(record))
+                if len(lines) >= CHUNK_SIZE:
+                    yield ('\n'.join(lines) + '\n').encode()
+                    lines.clear()
+            if lines:
+                yield ('\n'.join(lines) + '\n').encode()
+
+
+def stream_csv(user_id: int, entity: str) -> Iterator[bytes]:
+    """Выгрузка одной сущности пользователя в формате CSV"""
+    _, fields = ENTITIES[entity]
+    with snapshot():
+        lines = []
+        for line in _csv_lines(fields, iter_rows(user_id, entity)):
+            lines.append(line)
+            if len(lines) >= CHUNK_SIZE:
+                yield ''.join(lines).encode()
+                lines.clear()
+        if lines:
+            yield ''.join(lines).encode()
+
+
+def stream_zip(user_id: int) -> Iterator[bytes]:
+    """Выгрузка всех данных пользователя в виде zip-архива с CSV-файлами"""
+    buffer = _StreamBuffer()
+    with snapshot(), zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for entity, (_, fields) in ENTITIES.items():
+            with archive.open(f'{entity}.csv', mode='w', force_zip64=True) as file:
+                for count, line in enumerate(_csv_lines(fields, iter_rows(user_id, entity)), start=1):
+                    file.write(line.encode())
+                    if count % CHUNK_SIZE == 0:
+                        yield buffer.pop()
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def stream_export(user_id: int, file_format: str, entity: str = 'goals') -> Iterator[bytes]:
+    """Возвращает генератор выгрузки в заданном формате
+
+    Args:
+        user_id (int): идентификатор пользователя
+        file_format (str): 'ndjson', 'csv' или 'zip'
+        entity (str): имя сущности для формата 'csv'
+    """
+    if file_format == 'ndjson':
+        return stream_ndjson(user_id)
+    if file_format == 'csv':
+        return stream_csv(user_id, entity)
+    if file_format == 'zip':
+        return stream_zip(user_id)
+    raise ValueError(f'Unknown export format: {file_format}')
@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, IO
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from goals import events
+from goals.events import Action, Entity
+from goals.models import Board, Category, Goal
+
+#: int: Количество строк, проверяемых и сохраняемых за один проход
+BATCH_SIZE = 1000
+
+FORMATS = ('csv', 'ndjson')
+
+_title_max_length = Goal._meta.get_field('title').max_length
+_description_max_length = Goal._meta.get_field('description').max_length
+_category_max_length = Category._meta.get_field('title').max_length
+
+
+@dataclass
+class ImportResult:
+    """Итог импорта целей"""
+
+    created: int = 0
+    categories_created: int = 0
+    errors: list[dict] = field(default_factory=list)
+    elapsed: float = 0.0
+    #: Ошибка чтения файла (кодировка, формат CSV): импорт остановлен, предыдущие пачки сохранены
+    file_error: str | None = None
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def rows_per_second(self) -> float:
+        total = self.created + self.failed
+        return total / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        data = {
+            'created': self.created,
+            'failed': self.failed,
+            'categories_created': self.categories_created,
+            'errors': self.errors,
+        }
+        if self.file_error:
+            data['file_error'] = self.file_error
+        return data
+
+
+def read_rows(file: IO[bytes], file_format: str) -> Iterator[dict]:
+    """Построчно читает загруженный файл
+
+    Args:
+        file: бинарный файловый объект
+        file_format (str): 'csv' или 'ndjson'
+    Returns:
+        итератор словарей (одна строка файла - один словарь)
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        yield from csv.DictReader(text)
+    elif file_format == 'ndjson':
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield row if isinstance(row, dict) else {'__invalid__': line.strip()}
+    else:
+        raise ValueError(f'Unknown import format: {file_format}')
+
+
+def _read_safely(rows: Iterable[dict], result: ImportResult) -> Iterator[dict]:
+    """Передает строки файла до первой ошибки чтения, которая записывается в result.file_error"""
+    number = 0
+    try:
+        for number, row in enumerate(rows, start=1):
+            yield row
+    except UnicodeDecodeError:
+        result.file_error = f'Row {number + 1}: file is not valid UTF-8 text'
+    except csv.Error as e:
+        result.file_error = f'Row {number + 1}: malformed CSV ({e})'
+
+
+def _parse_choice(value, choices, name: str, errors: dict, default):
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = None
+    if value not in choices.values:
+        errors[name] = f'Must be one of: {", ".join(map(str, choices.values))}'
+    return value
+
+
+def _parse_due_date(value, errors: dict):
+    if value in (None, ''):
+        return None
+    if not isinstance(value, str):
+        errors['due_date'] = 'Invalid datetime'
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None and (date := parse_date(value)):
+            parsed = datetime(date.year, date.month, date.day)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        errors['due_date'] = 'Invalid datetime'
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def validate_row(row: dict) -> tuple[dict, dict]:
+    """Проверяет одну строку импорта
+
+    Returns:
+        tuple: (очищенные данные, ошибки по полям)
+    """
+    errors: dict = {}
+    if '__invalid__' in row:
+        return {}, {'non_field_errors': 'Invalid JSON object'}
+
+    title = str(row.get('title') or '').strip()
+    if not title:
+        errors['title'] = 'This field is required.'
+    elif len(title) > _title_max_length:
+        errors['title'] = f'Ensure this field has no more than {_title_max_length} characters.'
+
+    category = str(row.get('category') or '').strip()
+    if not category:
+        errors['category'] = 'This field is required.'
+    elif len(category) > _category_max_length:
+        errors['category'] = f'Ensure this field has no more than {_category_max_length} characters.'
+
+    description = str(row.get('description') or '')
+    if len(description) > _description_max_length:
+        errors['description'] = f'Ensure this field has no more than {_description_max_length} characters.'
+
+    for name, value in (('title', title), ('category', category), ('description', description)):
+        if '\x00' in value:
+            errors[name] = 'Null characters are not allowed.'
+
+    data = {
+        'title': title,
+        'category': category,
+        'description': description,
+        'status': _parse_choice(row.get('status'), Goal.Status, 'status', errors, Goal.Status.to_do),
+        'priority': _parse_choice(row.get('priority'), Goal.Priority, 'priority', errors, Goal.Priority.medium),
+        'due_date': _parse_due_date(row.get('due_date'), errors),
+    }
+    return data, errors
+
+
+def _resolve_categories(board: Board, user_id: int, titles: set[str]) -> tuple[dict, int]:
+    """Возвращает категории доски по названиям, создавая отсутствующие
+
+    Выполняет один запрос на чтение и один bulk_create.
+    """
+    categories: dict = dict(
+        Category.objects.filter(board=board, is_deleted=False, title__in=titles)
+        .order_by('id').values_list('title', 'id')
+    )
+    missing = [title for title in titles if title not in categories]
+    if missing:
+        created = Category.objects.bulk_create(
+            [Category(board=board, user_id=user_id, title=title) for title in missing]
+        )
+        categories.update({category.title: category.id for category in created})
+    return categories, len(missing)
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[tuple[int, dict]]]:
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        batch.append((number, row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_goals(
+        board: Board,
+        user_id: int,
+        rows: Iterable[dict],
+        batch_size: int = BATCH_SIZE,
+        progress: Callable[[ImportResult, int], None] | None = None,
+) -> ImportResult:
+    """Импортирует цели в доску
+
+    Строки проверяются и сохраняются пачками по batch_size: категории
+    разрешаются по названию одним запросом на пачку, цели создаются через bulk_create.
+    Каждая пачка сохраняется в отдельной транзакции. Ошибка чтения файла (не UTF-8, некорректный CSV)
+    останавливает импорт и записывается в ImportResult.file_error; уже прочитанные строки сохраняются.
+
+    Args:
+        board: доска, в которую импортируются цели
+        user_id (int): автор создаваемых целей и категорий
+        rows: итератор словарей с полями title, category, description, status, priority, due_date
+        batch_size (int): размер пачки
+        progress: функция обратного вызова progress(result, rows_processed) после каждой пачки
+    Returns:
+        ImportResult: итог импорта
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    processed = 0
+
+    for batch in _batches(_read_safely(rows, result), batch_size):
+        valid: list[tuple[int, dict]] = []
+        for number, row in batch:
+            data, errors = validate_row(row)
+            if errors:
+                result.errors.append({'row': number, 'errors': errors})
+            else:
+                valid.append((number, data))
+
+        if valid:
+            with transaction.atomic():
+                categories, created = _resolve_categories(board, user_id, {data['category'] for _, data in valid})
+                goals = Goal.objects.bulk_create([
+                    Goal(
+                        user_id=user_id,
+                        category_id=categories[data['category']],
+                        title=data['title'],
+                        description=data['description'],
+                        status=data['status'],
+                        priority=data['priority'],
+                        due_date=data['due_date'],
+                    )
+                    for _, data in valid
+                ], batch_size=batch_size)
+                changes = [events.event(Entity.goal, Action.created, board.id, user_id=user_id,
+                                        ids=[goal.id for goal in goals])]
+                if created:
+                    changes.append(events.event(Entity.category, Action.created, board.id, user_id=user_id,
+                                                count=created))
+                events.record(*changes)
+            result.categories_created += created
+            result.created += len(valid)
+
+        processed += len(batch)
+        if progress:
+            progress(result, processed)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def write_errors(result: ImportResult, file: IO[str]) -> None:
+    """Записывает построчные ошибки импорта в CSV-файл (row, field, error)"""
+    writer = csv.writer(file)
+    writer.writerow(('row', 'field', 'error'))
+    for item in result.errors:
+        for name, message in item['errors'].items():
+            writer.writerow((item['row'], name, message))
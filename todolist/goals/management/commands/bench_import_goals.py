@@ -0,0 +1,55 @@
+import random
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from core.models import User
+from goals import importer
+from goals.models import Board, BoardParticipant, Goal
+
+
+class Command(BaseCommand):
+    """Класс команды для замера производительности импорта целей
+
+    Импортирует синтетические строки во временную доску и откатывает транзакцию.
+    """
+
+    help = 'Benchmarks goal import throughput (rows per second)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, action='append', default=None,
+                            help='Batch size to measure, may be repeated')
+
+    @staticmethod
+    def _rows(count: int, categories: int):
+        for number in range(count):
+            yield {
+                'title': f'Goal {number}',
+                'category': f'Category {number % categories}',
+                'description': 'Imported goal',
+                'status': str(random.choice(Goal.Status.values[:-1])),
+                'priority': str(random.choice(Goal.Priority.values)),
+                'due_date': '2030-01-01T12:00:00',
+            }
+
+    def handle(self, *args, **options):
+        for batch_size in options['batch_size'] or [100, importer.BATCH_SIZE, 5000]:
+            with transaction.atomic():
+                user = User.objects.create_user(username=f'bench-import-{random.getrandbits(32)}')
+                board = Board.objects.create(title='bench')
+                BoardParticipant.objects.create(board=board, user=user, role=BoardParticipant.Role.owner)
+
+                result = importer.import_goals(
+                    board=board,
+                    user_id=user.id,
+                    rows=self._rows(options['rows'], options['categories']),
+                    batch_size=batch_size,
+                )
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f'batch_size={batch_size}: {result.created} rows in {result.elapsed:.2f}s, '
+                f'{result.rows_per_second:.0f} rows/s'
+            )
@@ -0,0 +1,37 @@
+import logging
+import time
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from goals.events import EventDispatcher
+
+
+class Command(BaseCommand):
+    """Класс команды для обработки журнала изменений досок (goals.Event)
+
+    Передает новые события обработчикам из настройки GOALS_EVENT_HANDLERS и удаляет
+    обработанные события старше GOALS_EVENT_RETENTION.
+    """
+
+    help = 'Dispatches goal and board change events to the configured handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--idle-sleep', type=float, default=0.5,
+                            help='Pause in seconds when there are no new events')
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger(__name__)
+        dispatcher = EventDispatcher(batch_size=options['batch_size'])
+        logger.info('Event dispatcher started')
+        while True:
+            close_old_connections()
+            try:
+                processed = dispatcher.drain()
+                dispatcher.cleanup()
+            except Exception:
+                logger.exception('Event dispatcher failed')
+                processed = 0
+            if not processed:
+                time.sleep(options['idle_sleep'])
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management import BaseCommand, CommandError
+
+from core.models import User
+from goals import export
+
+
+class Command(BaseCommand):
+    """Класс команды для выгрузки данных пользователя
+
+    Формирует тот же поток данных, что и эндпоинт GET: /goals/export
+    """
+
+    help = 'Exports boards, categories, goals and comments of the user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str)
+        parser.add_argument('--format', dest='file_format', choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--entity', choices=tuple(export.ENTITIES), default='goals',
+                            help='Entity to export for the csv format')
+        parser.add_argument('--output', '-o', type=str, default=None, help='Output file (stdout by default)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        chunks = export.stream_export(user_id=user.id, file_format=options['file_format'], entity=options['entity'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,64 @@
+from django.core.management import BaseCommand, CommandError
+
+from core.models import User
+from goals import importer
+from goals.models import Board, BoardParticipant
+
+
+class Command(BaseCommand):
+    """Класс команды для массового импорта целей в доску
+
+    Выполняет тот же импорт, что и эндпоинт POST: /goals/import
+    """
+
+    help = 'Imports goals into the board from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str)
+        parser.add_argument('board', type=int, help='Board id')
+        parser.add_argument('path', type=str, help='Path to the CSV or NDJSON file')
+        parser.add_argument('--format', dest='file_format', choices=importer.FORMATS, default=None)
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+        parser.add_argument('--errors', type=str, default=None, help='Path to the per-row error file (CSV)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        board = Board.objects.filter(
+            id=options['board'],
+            is_deleted=False,
+            participants__user_id=user.id,
+            participants__role__in=(BoardParticipant.Role.owner, BoardParticipant.Role.writer,),
+        ).first()
+        if not board:
+            raise CommandError(f'Board {options["board"]} not found or user is not its owner or writer')
+
+        file_format = options['file_format'] or ('csv' if options['path'].endswith('.csv') else 'ndjson')
+
+        def progress(result: importer.ImportResult, processed: int) -> None:
+            self.stdout.write(f'processed: {processed}, created: {result.created}, failed: {result.failed}')
+
+        with open(options['path'], 'rb') as file:
+            result = importer.import_goals(
+                board=board,
+                user_id=user.id,
+                rows=importer.read_rows(file, file_format),
+                batch_size=options['batch_size'],
+                progress=progress,
+            )
+
+        if options['errors'] and result.errors:
+            with open(options['errors'], 'w', newline='') as file:
+                importer.write_errors(result, file)
+
+        if result.file_error:
+            raise CommandError(f'{result.file_error}. Created: {result.created}, failed: {result.failed}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created: {result.created}, failed: {result.failed}, '
+            f'categories created: {result.categories_created}, '
+            f'{result.rows_per_second:.0f} rows/s'
+        ))
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0004_alter_boardparticipant_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="ALTER TABLE goals_goal ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+                "to_tsvector('simple'::regconfig, coalesce(title, '') || ' ' || coalesce(description, ''))"
+                ") STORED",
+            reverse_sql='ALTER TABLE goals_goal DROP COLUMN search_vector',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX goal_search_idx ON goals_goal USING gin (search_vector)',
+            reverse_sql='DROP INDEX goal_search_idx',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0005_goal_search_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), ('status__lt', 3)), fields=['due_date'], name='goal_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['updated'], name='goal_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.1.13 on 2026-10-19 09:13
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_goal_due_date_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.PositiveSmallIntegerField(choices=[(1, 'Доска'), (2, 'Участник'), (3, 'Категория'), (4, 'Цель'), (5, 'Комментарий')], verbose_name='Объект')),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'Создание'), (2, 'Изменение'), (3, 'Удаление')], verbose_name='Действие')),
+                ('board_id', models.PositiveIntegerField(verbose_name='ID доски')),
+                ('object_id', models.PositiveIntegerField(null=True, verbose_name='ID объекта')),
+                ('user_id', models.PositiveIntegerField(null=True, verbose_name='ID пользователя')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Данные')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('dispatched', models.DateTimeField(null=True, verbose_name='Дата обработки')),
+            ],
+            options={
+                'verbose_name': 'Событие',
+                'verbose_name_plural': 'События',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('dispatched__isnull', True)), fields=['id'], name='event_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created'], name='event_created_brin'),
+        ),
+    ]
@@ -1,7 +1,15 @@
+from django.contrib.postgres.indexes import BrinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.expressions import RawSQL
 
 from core.models import User
 
+#: RawSQL: Полнотекстовый вектор цели (заголовок и описание). Столбец search_vector вычисляется самой БД
+#: (GENERATED ... STORED, миграция goals.0005) и проиндексирован goal_search_idx; в модели он не объявлен,
+#: чтобы не попадать в сериализаторы и запросы на запись
+GOAL_SEARCH_VECTOR = RawSQL('"goals_goal"."search_vector"', [], output_field=SearchVectorField())
+
 
 class BaseModel(models.Model):
     """Базовая модель
@@ -95,6 +103,15 @@ class Goal(BaseModel):
     class Meta:
         verbose_name = 'Цель'
         verbose_name_plural = 'Цели'
+        indexes = [
+            #: Для выборки ближайших сроков (напоминания): только незавершенные цели (status < done)
+            models.Index(
+                fields=('due_date',),
+                name='goal_due_date_idx',
+                condition=models.Q(due_date__isnull=False, status__lt=3),
+            ),
+            models.Index(fields=('updated',), name='goal_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -114,3 +131,48 @@ class Comment(BaseModel):
     def __str__(self):
         text = str(self.text)
         return text if len(text) <= 20 else text[:20] + "..."
+
+
+class Event(models.Model):
+    """Модель журнала изменений досок, категорий, целей, комментариев и участников (transactional outbox)
+
+    Событие записывается в одной транзакции с изменением (см. goals.events) и обрабатывается командой
+    dispatchevents, поэтому реакции на изменения не увеличивают время ответа API. Изменение множества
+    объектов одним запросом (например, архивирование целей удаленной категории) записывается одним
+    событием без object_id, с описанием изменения в payload.
+    """
+
+    class Entity(models.IntegerChoices):
+        board = 1, 'Доска'
+        participant = 2, 'Участник'
+        category = 3, 'Категория'
+        goal = 4, 'Цель'
+        comment = 5, 'Комментарий'
+
+    class Action(models.IntegerChoices):
+        created = 1, 'Создание'
+        updated = 2, 'Изменение'
+        deleted = 3, 'Удаление'
+
+    id = models.BigAutoField(primary_key=True)
+    entity = models.PositiveSmallIntegerField(verbose_name='Объект', choices=Entity.choices)
+    action = models.PositiveSmallIntegerField(verbose_name='Действие', choices=Action.choices)
+    board_id = models.PositiveIntegerField(verbose_name='ID доски')
+    object_id = models.PositiveIntegerField(verbose_name='ID объекта', null=True)
+    user_id = models.PositiveIntegerField(verbose_name='ID пользователя', null=True)
+    payload = models.JSONField(verbose_name='Данные', default=dict, blank=True)
+    created = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
+    dispatched = models.DateTimeField(verbose_name='Дата обработки', null=True)
+
+    class Meta:
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
+        indexes = [
+            #: Очередь необработанных событий (по порядку записи)
+            models.Index(fields=('id',), name='event_pending_idx', condition=models.Q(dispatched__isnull=True)),
+            #: Для удаления устаревших событий: журнал пополняется по порядку дат, BRIN-индекс почти не занимает места
+            BrinIndex(fields=('created',), name='event_created_brin'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_entity_display()} {self.object_id or ""}: {self.get_action_display()}'
@@ -1,5 +1,6 @@
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 
+from core.cache import get_identity_map
 from goals.models import BoardParticipant, Category, Board, Goal, Comment
 
 
@@ -12,12 +13,12 @@ class BoardPermissions(IsAuthenticated):
     message = 'Delete or edit boards can owners only.'
 
     def has_object_permission(self, request, view, obj: Board) -> bool:
-        _filters: dict = {'user_id': request.user.id}
+        role = get_identity_map(request).get_role(board_id=obj.id, user_id=request.user.id)
 
         if request.method not in SAFE_METHODS:
-            _filters['role'] = BoardParticipant.Role.owner
+            return role == BoardParticipant.Role.owner
 
-        return obj.participants.filter(**_filters).exists()
+        return role is not None
 
 
 class IsOwnerOrWriter(IsAuthenticated):
@@ -30,21 +31,23 @@ class IsOwnerOrWriter(IsAuthenticated):
     board = None
 
     def has_object_permission(self, request, view, obj) -> bool:
-        _filters: dict = {'user_id': request.user.id}
+        identity_map = get_identity_map(request)
 
         if isinstance(obj, Category):
-            self.board = obj.board
+            self.board = identity_map.related(obj, 'board')
         elif isinstance(obj, Goal):
-            self.board = obj.category.board
+            self.board = identity_map.related(obj, 'category', 'board')
         elif isinstance(obj, Comment):
-            self.board = obj.goal.category.board
+            self.board = identity_map.related(obj, 'goal', 'category', 'board')
         else:
             return False
 
+        role = identity_map.get_role(board_id=self.board.id, user_id=request.user.id)
+
         if request.method not in SAFE_METHODS:
-            _filters['role__in'] = (BoardParticipant.Role.owner, BoardParticipant.Role.writer,)
+            return role in (BoardParticipant.Role.owner, BoardParticipant.Role.writer,)
 
-        return self.board.participants.filter(**_filters).exists()
+        return role is not None
 
 
 class IsCommentOwner(IsAuthenticated):
@@ -58,5 +61,5 @@ class IsCommentOwner(IsAuthenticated):
     def has_object_permission(self, request, view, obj: Comment) -> bool:
         return any((
             request.method in SAFE_METHODS,
-            obj.user.id == request.user.id
+            obj.user_id == request.user.id
         ))
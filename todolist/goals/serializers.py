@@ -1,11 +1,35 @@
 from django.db import transaction
 from rest_framework import serializers, exceptions
 
+from core.cache import get_identity_map
 from core.models import User
-from core.serializers import ProfileSerializer
+from core.serializers import NestedProfileSerializer
+from goals import events, importer
+from goals.events import Action, Entity
 from goals.models import Category, Goal, Comment, Board, BoardParticipant
 
 
+def _is_owner_or_writer(request, board: Board) -> bool:
+    """Проверяет, является ли пользователь владельцем или редактором доски (через кэш ролей запроса)"""
+    role = get_identity_map(request).get_role(board_id=board.id, user_id=request.user.id)
+    return role in (BoardParticipant.Role.owner, BoardParticipant.Role.writer,)
+
+
+class SideloadUsersSerializerMixin:
+    """Примесь для сериализаторов с вложенным пользователем
+
+    При наличии в контексте флага 'sideload_users' поле user заменяется на user_id,
+    а данные пользователей возвращаются представлением один раз в отдельном словаре users.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('sideload_users'):
+            fields.pop('user', None)
+            fields['user_id'] = serializers.IntegerField(read_only=True)
+        return fields
+
+
 class BoardCreateSerializer(serializers.ModelSerializer):
     """Сериализатор представления BoardViewSet
 
@@ -53,25 +77,39 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'created', 'updated',)
 
-    #: Реализация частичного обновления доски
+    #: Реализация частичного обновления доски (изменения участников записываются в журнал изменений)
     def update(self, instance: Board, validated_data: dict) -> Board:
         owner = validated_data.pop('user')
         if new_participants := validated_data.get('participants'):
             new_by_id = {part['user'].id: part for part in new_participants}
             old_participants = instance.participants.exclude(user=owner)
+            changes = []
             with transaction.atomic():
                 for old_participant in old_participants:
                     if old_participant.user_id not in new_by_id:
+                        changes.append(events.event(
+                            Entity.participant, Action.deleted, instance.id, old_participant.id, owner.id,
+                            user=old_participant.user_id,
+                        ))
                         old_participant.delete()
                     else:
                         if old_participant.role != new_by_id[old_participant.user_id]['role']:
                             old_participant.role = new_by_id[old_participant.user_id]['role']
                             old_participant.save()
+                            changes.append(events.event(
+                                Entity.participant, Action.updated, instance.id, old_participant.id, owner.id,
+                                user=old_participant.user_id, role=old_participant.role,
+                            ))
                         new_by_id.pop(old_participant.user_id)
                 for new_part in new_by_id.values():
-                    BoardParticipant.objects.create(
+                    participant = BoardParticipant.objects.create(
                         user=new_part['user'], board=instance, role=new_part['role']
                     )
+                    changes.append(events.event(
+                        Entity.participant, Action.created, instance.id, participant.id, owner.id,
+                        user=participant.user_id, role=participant.role,
+                    ))
+                events.record(*changes)
         if title := validated_data.get('title'):
             instance.title = title
 
@@ -102,10 +140,7 @@ class CategoryCreateSerializer(serializers.ModelSerializer):
         if value.is_deleted:
             raise serializers.ValidationError('Not allowed in deleted category')
         #: Проверка роли пользователя
-        if not value.participants.filter(
-            user_id=self.context['request'].user.id,
-            role__in=(BoardParticipant.Role.owner, BoardParticipant.Role.writer,)
-        ).exists():
+        if not _is_owner_or_writer(self.context['request'], value):
             raise exceptions.PermissionDenied
 
         return value
@@ -116,12 +151,12 @@ class CategoryCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created', 'updated', 'user', 'is_deleted',)
 
 
-class CategoryListSerializer(serializers.ModelSerializer):
+class CategoryListSerializer(SideloadUsersSerializerMixin, serializers.ModelSerializer):
     """Сериализатор представления CategoryViewSet
 
     Actions: list, update, retrieve, partial_update, destroy
     """
-    user = ProfileSerializer(read_only=True)
+    user = NestedProfileSerializer(read_only=True)
 
     class Meta:
         model = Category
@@ -141,10 +176,8 @@ class GoalCreateSerializer(serializers.ModelSerializer):
         if value.is_deleted:
             raise serializers.ValidationError('Not allowed in deleted category')
         #: Проверка роли пользователя
-        if not value.board.participants.filter(
-                user_id=self.context['request'].user.id,
-                role__in=(BoardParticipant.Role.owner, BoardParticipant.Role.writer,)
-        ).exists():
+        board = get_identity_map(self.context['request']).related(value, 'board')
+        if not _is_owner_or_writer(self.context['request'], board):
             raise exceptions.PermissionDenied
 
         return value
@@ -155,12 +188,12 @@ class GoalCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created', 'updated', 'user',)
 
 
-class GoalListSerializer(serializers.ModelSerializer):
+class GoalListSerializer(SideloadUsersSerializerMixin, serializers.ModelSerializer):
     """Сериализатор представления GoalViewSet
 
     Actions: list, update, retrieve, partial_update, destroy
     """
-    user = ProfileSerializer(read_only=True)
+    user = NestedProfileSerializer(read_only=True)
 
     class Meta:
         model = Goal
@@ -180,10 +213,8 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         if value.status == Goal.Status.archived:
             raise serializers.ValidationError('Not allowed in archived goal')
         #: Проверка роли пользователя
-        if not value.category.board.participants.filter(
-                user_id=self.context['request'].user.id,
-                role__in=(BoardParticipant.Role.owner, BoardParticipant.Role.writer,)
-        ).exists():
+        board = get_identity_map(self.context['request']).related(value, 'category', 'board')
+        if not _is_owner_or_writer(self.context['request'], board):
             raise exceptions.PermissionDenied
 
         return value
@@ -194,14 +225,48 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created', 'updated',)
 
 
-class CommentListSerializer(serializers.ModelSerializer):
+class CommentListSerializer(SideloadUsersSerializerMixin, serializers.ModelSerializer):
     """Сериализатор представления CommentViewSet
 
     Actions: list, update, retrieve, partial_update, destroy
     """
-    user = ProfileSerializer(read_only=True)
+    user = NestedProfileSerializer(read_only=True)
 
     class Meta:
         model = Comment
         fields = '__all__'
         read_only_fields = ('id', 'created', 'updated', 'user', 'goal',)
+
+
+class GoalImportSerializer(serializers.Serializer):
+    """Сериализатор представления ImportView
+
+    Проверяет доску и загружаемый файл
+    """
+    board = serializers.PrimaryKeyRelatedField(queryset=Board.objects.filter(is_deleted=False))
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=importer.FORMATS, required=False)
+
+    def validate_board(self, value: Board) -> Board:
+        #: Проверка роли пользователя
+        if not _is_owner_or_writer(self.context['request'], value):
+            raise exceptions.PermissionDenied
+
+        return value
+
+    #: Определение формата файла по расширению, если он не указан явно
+    def validate(self, attrs: dict) -> dict:
+        if not attrs.get('file_format'):
+            extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+            if extension in ('json', 'jsonl'):
+                extension = 'ndjson'
+            if extension not in importer.FORMATS:
+                raise serializers.ValidationError({'file_format': ['Unable to detect file format']})
+            attrs['file_format'] = extension
+        return attrs
+
+    def create(self, validated_data):
+        raise NotImplementedError
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError
@@ -0,0 +1,367 @@
+import asyncio
+import json
+import logging
+from http import cookies
+from importlib import import_module
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.db import close_old_connections, connection, connections
+
+from goals.models import BoardParticipant, Event
+
+#: int: Максимальный размер уведомления NOTIFY (ограничение Postgres - 8000 байт)
+MAX_NOTIFY_SIZE = 7900
+
+
+def _encode(item: Event) -> str:
+    data = {
+        'id': item.id,
+        'board': item.board_id,
+        'entity': Event.Entity(item.entity).name,
+        'action': Event.Action(item.action).name,
+        'object': item.object_id,
+        'user': item.user_id,
+        'payload': item.payload,
+    }
+    text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    if len(text.encode()) > MAX_NOTIFY_SIZE:
+        data['payload'] = {'truncated': True}
+        text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return text
+
+
+def notify_events(events: list[Event]) -> None:
+    """Обработчик событий: публикует события в канал settings.GOALS_EVENT_CHANNEL (NOTIFY)
+
+    Вызывается диспетчером в транзакции обработки пачки, поэтому уведомления доставляются слушателям
+    после ее фиксации, по порядку, одним запросом на пачку.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) WITH ORDINALITY AS t(payload, n) ORDER BY n',
+            [settings.GOALS_EVENT_CHANNEL, [_encode(item) for item in events]],
+        )
+
+
+def _format(data: dict) -> bytes:
+    """Возвращает сообщение Server-Sent Events (id, тип события - измененный объект, данные - JSON)"""
+    return (
+        f'id: {data["id"]}\nevent: {data["entity"]}\n'
+        f'data: {json.dumps(data, separators=(",", ":"), ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+class Subscriber:
+    """Подписка одного SSE-соединения на события досок пользователя
+
+    Args:
+        user_id (int): пользователь
+        boards (set): доски, участником которых является пользователь
+        max_queue (int): максимальное количество недоставленных сообщений; при переполнении
+            соединению отправляется событие resync и оно закрывается
+    """
+
+    def __init__(self, user_id: int, boards: set[int], max_queue: int = 1000):
+        self.user_id = user_id
+        self.boards = boards
+        self.queue: asyncio.Queue[tuple[int, bytes] | None] = asyncio.Queue(maxsize=max_queue)
+        self.overflow = False
+
+    def put(self, event_id: int, message: bytes) -> None:
+        if self.overflow:
+            return
+        try:
+            self.queue.put_nowait((event_id, message))
+        except asyncio.QueueFull:
+            self.overflow = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class BoardEventListener:
+    """Слушатель канала событий досок: одно соединение LISTEN на процесс для всех SSE-соединений
+
+    Работает в цикле событий asyncio: сокет соединения psycopg2 отслеживается через loop.add_reader.
+    Каждое уведомление разбирается и форматируется один раз и передается только подписчикам его доски.
+    События участников изменяют набор досок подписок пользователя (добавление в доску, исключение),
+    удаление доски завершает подписки на нее. При потере соединения с БД слушатель переподключается,
+    а подписчики получают событие resync (пропущенные события нужно запросить заново).
+
+    Args:
+        channel (str): канал NOTIFY (по умолчанию - settings.GOALS_EVENT_CHANNEL)
+        reconnect_delay (float): пауза перед повторным подключением, секунды
+    """
+
+    def __init__(self, channel: str | None = None, reconnect_delay: float = 1.0):
+        self.channel = channel or settings.GOALS_EVENT_CHANNEL
+        self.reconnect_delay = reconnect_delay
+        self.logger = logging.getLogger(__name__)
+        self._by_board: dict[int, set[Subscriber]] = {}
+        self._by_user: dict[int, set[Subscriber]] = {}
+        self._conn = None
+        self._fd: int | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._started: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Подключается к БД (при первом вызове в цикле событий)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._started = loop.create_task(self._connect())
+        await asyncio.shield(self._started)
+
+    async def _connect(self) -> None:
+        while True:
+            try:
+                self._conn = await self._loop.run_in_executor(None, self._open)
+            except psycopg2.Error as e:
+                self.logger.warning('Failed to listen for board events: %s', e)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            self._fd = self._conn.fileno()
+            self._loop.add_reader(self._fd, self._read)
+            return
+
+    def _open(self):
+        conn = psycopg2.connect(**connections['default'].get_connection_params())
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def stop(self) -> None:
+        """Закрывает соединение слушателя"""
+        if self._started is not None:
+            self._started.cancel()
+        if self._conn is not None:
+            self._close()
+        self._loop = None
+
+    def _close(self) -> None:
+        self._loop.remove_reader(self._fd)
+        self._conn.close()
+        self._conn = self._fd = None
+
+    def _read(self) -> None:
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            self.logger.warning('Board events listener disconnected: %s', e)
+            self._close()
+            self._resync()
+            self._started = self._loop.create_task(self._connect())
+            return
+        notifies, self._conn.notifies = self._conn.notifies, []
+        for notify in notifies:
+            self._dispatch(json.loads(notify.payload))
+
+    def _dispatch(self, data: dict) -> None:
+        board = data['board']
+        if data['entity'] == 'participant' and data['action'] in ('created', 'deleted'):
+            #: Подписки участника обновляются до рассылки: добавленный пользователь получает событие
+            for subscriber in self._by_user.get(data['payload'].get('user'), ()):
+                if data['action'] == 'created':
+                    self._follow(subscriber, board)
+
+        message = _format(data)
+        for subscriber in tuple(self._by_board.get(board, ())):
+            subscriber.put(data['id'], message)
+
+        if data['entity'] == 'participant' and data['action'] == 'deleted':
+            for subscriber in self._by_user.get(data['payload'].get('user'), ()):
+                self._unfollow(subscriber, board)
+        elif data['entity'] == 'board' and data['action'] == 'deleted':
+            for subscriber in tuple(self._by_board.get(board, ())):
+                self._unfollow(subscriber, board)
+
+    def _resync(self) -> None:
+        message = b'event: resync\ndata: {}\n\n'
+        for subscribers in self._by_user.values():
+            for subscriber in subscribers:
+                subscriber.put(0, message)
+
+    def _follow(self, subscriber: Subscriber, board: int) -> None:
+        subscriber.boards.add(board)
+        self._by_board.setdefault(board, set()).add(subscriber)
+
+    def _unfollow(self, subscriber: Subscriber, board: int) -> None:
+        subscriber.boards.discard(board)
+        subscribers = self._by_board.get(board)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._by_board[board]
+
+    def subscribe(self, user_id: int, boards: set[int]) -> Subscriber:
+        subscriber = Subscriber(user_id, set(), settings.GOALS_STREAM_QUEUE_SIZE)
+        self._by_user.setdefault(user_id, set()).add(subscriber)
+        for board in boards:
+            self._follow(subscriber, board)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for board in tuple(subscriber.boards):
+            self._unfollow(subscriber, board)
+        subscribers = self._by_user.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._by_user[subscriber.user_id]
+
+    def stats(self) -> dict:
+        return {
+            'connected': self._conn is not None,
+            'users': len(self._by_user),
+            'subscribers': sum(len(subscribers) for subscribers in self._by_user.values()),
+            'boards': len(self._by_board),
+        }
+
+
+def _db(func):
+    """Выполняет функцию с обращением к БД вне цикла событий"""
+    def call(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(call)
+
+
+class _Request:
+    """Минимальный запрос для django.contrib.auth.get_user (сессия из cookie)"""
+
+    def __init__(self, session):
+        self.session = session
+
+
+@_db
+def _get_user_id(session_key: str | None) -> int | None:
+    if not session_key:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = auth.get_user(_Request(session))
+    return user.id if user.is_authenticated else None
+
+
+@_db
+def _get_boards(user_id: int) -> set[int]:
+    return set(BoardParticipant.objects.filter(user_id=user_id, board__is_deleted=False).values_list(
+        'board_id', flat=True,
+    ))
+
+
+@_db
+def _get_missed(boards: set[int], last_id: int, limit: int) -> list[dict]:
+    """Возвращает уже опубликованные события досок после last_id (для переподключения с Last-Event-ID)"""
+    return [
+        json.loads(_encode(item)) for item in Event.objects.filter(
+            id__gt=last_id, board_id__in=boards, dispatched__isnull=False,
+        ).order_by('id')[:limit]
+    ]
+
+
+class BoardEventsApp:
+    """ASGI-приложение GET: /goals/events - поток Server-Sent Events об изменениях досок пользователя
+
+    Пользователь определяется по cookie сессии Django. Сообщения: id - идентификатор события
+    (goals.Event), event - измененный объект (board, participant, category, goal, comment), data - JSON
+    с полями id, board, entity, action, object, user, payload. Событие resync означает, что часть событий
+    могла быть пропущена и данные досок нужно запросить заново. При переподключении с заголовком
+    Last-Event-ID пропущенные события (не более replay_limit) отправляются из журнала изменений.
+
+    Args:
+        listener: слушатель канала событий (один на процесс)
+        heartbeat (float): период отправки комментария для поддержания соединения, секунды
+        replay_limit (int): максимальное количество событий, отправляемых при переподключении
+    """
+
+    def __init__(self, listener: BoardEventListener | None = None, heartbeat: float | None = None,
+                 replay_limit: int = 1000):
+        self.listener = listener or BoardEventListener()
+        self.heartbeat = settings.GOALS_STREAM_HEARTBEAT if heartbeat is None else heartbeat
+        self.replay_limit = replay_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope['method'] != 'GET':
+            await self._reject(send, 405)
+            return
+
+        headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope['headers']}
+        cookie = cookies.SimpleCookie(headers.get('cookie', ''))
+        session = cookie.get(settings.SESSION_COOKIE_NAME)
+        user_id = await _get_user_id(session.value if session else None)
+        if user_id is None:
+            await self._reject(send, 403)
+            return
+
+        await self.listener.start()
+        subscriber = self.listener.subscribe(user_id, await _get_boards(user_id))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            last_id = await self._replay(headers.get('last-event-id'), subscriber, send)
+            await self._stream(subscriber, last_id, receive, send)
+        finally:
+            self.listener.unsubscribe(subscriber)
+
+    async def _replay(self, last_event_id: str | None, subscriber: Subscriber, send) -> int:
+        if not last_event_id or not last_event_id.isdigit() or not subscriber.boards:
+            return 0
+        missed = await _get_missed(set(subscriber.boards), int(last_event_id), self.replay_limit + 1)
+        if len(missed) > self.replay_limit:
+            await send({'type': 'http.response.body', 'body': b'event: resync\ndata: {}\n\n', 'more_body': True})
+            return 0
+        for data in missed:
+            await send({'type': 'http.response.body', 'body': _format(data), 'more_body': True})
+        return missed[-1]['id'] if missed else 0
+
+    async def _stream(self, subscriber: Subscriber, last_id: int, receive, send) -> None:
+        disconnect = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            while True:
+                get = asyncio.ensure_future(subscriber.queue.get())
+                done, _ = await asyncio.wait((get, disconnect), timeout=self.heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnect in done:
+                    get.cancel()
+                    return
+                if get not in done:
+                    get.cancel()
+                    await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                    continue
+
+                item = get.result()
+                if item is None:
+                    #: Очередь переполнена: клиент не успевает получать события
+                    await send({'type': 'http.response.body', 'body': b'event: resync\ndata: {}\n\n'})
+                    return
+                event_id, message = item
+                #: События, уже отправленные из журнала при переподключении, пропускаются
+                if event_id and event_id <= last_id:
+                    continue
+                await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+        finally:
+            disconnect.cancel()
+
+    @staticmethod
+    async def _wait_disconnect(receive) -> None:
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def _reject(send, status: int) -> None:
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b''})
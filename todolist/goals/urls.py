@@ -1,7 +1,7 @@
 from django.urls import path, include
 
 from goals.routers import CustomAPIRouter
-from goals.views import BoardViewSet, CategoryViewSet, GoalViewSet, CommentViewSet
+from goals.views import BoardViewSet, CategoryViewSet, GoalViewSet, CommentViewSet, ExportView, ImportView
 
 board_router = CustomAPIRouter(trailing_slash=False)
 board_router.register('board', BoardViewSet)
@@ -21,4 +21,6 @@ urlpatterns = [
     path('', include(category_router.urls)),
     path('', include(goal_router.urls)),
     path('', include(comment_router.urls)),
+    path('export', ExportView.as_view(), name='export'),
+    path('import', ImportView.as_view(), name='import'),
 ]
@@ -1,17 +1,59 @@
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, filters, permissions
+from rest_framework import viewsets, filters, permissions, views, exceptions, status
+from rest_framework.response import Response
 
+from core.cache import IdentityMapMixin, get_identity_map
+from core.serializers import NestedProfileSerializer
+from goals import events, export, importer
+from goals.events import Action, Entity
 from goals.filters import GoalsFilter
 from goals.models import Category, Goal, Comment, Board
 from goals.permissions import BoardPermissions, IsOwnerOrWriter, IsCommentOwner
 from goals.serializers import (
     CategoryCreateSerializer, CategoryListSerializer, GoalCreateSerializer, GoalListSerializer,
-    CommentCreateSerializer, CommentListSerializer, BoardCreateSerializer, BoardUpdateSerializer, BoardListSerializer
+    CommentCreateSerializer, CommentListSerializer, BoardCreateSerializer, BoardUpdateSerializer, BoardListSerializer,
+    GoalImportSerializer
 )
 
 
-class BoardViewSet(viewsets.ModelViewSet):
+class SideloadUsersMixin:
+    """Примесь для представлений списков с вложенным пользователем
+
+    Параметр запроса ?expand=users: строки содержат только user_id, а пользователи
+    возвращаются один раз в словаре users (id -> профиль).
+    """
+
+    def _sideload_users(self) -> bool:
+        return self.request.query_params.get('expand') == 'users'
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list' and self._sideload_users():
+            context['sideload_users'] = True
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if not self._sideload_users():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = page if page is not None else list(queryset)
+
+        rows = self.get_serializer(objects, many=True).data
+        profile = NestedProfileSerializer()
+        users = {str(obj.user_id): profile.to_representation(obj.user) for obj in objects}
+
+        if page is not None:
+            response = self.get_paginated_response(rows)
+            response.data['users'] = users
+            return response
+        return Response({'results': rows, 'users': users})
+
+
+class BoardViewSet(IdentityMapMixin, viewsets.ModelViewSet):
     """Представление для обработки запроса на эндпоинт /goals/board{/<id>}
 
     Действия над доской
@@ -41,23 +83,42 @@ class BoardViewSet(viewsets.ModelViewSet):
 
     #: Переопределяем метод для добавления в serializer поля user (create).
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            board = serializer.save(user=self.request.user)
+            events.record(events.event(Entity.board, Action.created, board.id, board.id, self.request.user.id))
 
     #: Переопределяем метод для добавления в serializer поля user (retrieve, update).
+    #: События изменения участников записывает сериализатор
     def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            board = serializer.save(user=self.request.user)
+            events.record(events.event(
+                Entity.board, Action.updated, board.id, board.id, self.request.user.id,
+                fields=[name for name in serializer.validated_data if name != 'user'],
+            ))
+        get_identity_map(self.request).forget_roles(serializer.instance.id)
 
     #: Переопределяем метод для исключения удаления доски из базы.
     def perform_destroy(self, instance: Board) -> Board:
+        user_id = self.request.user.id
         with transaction.atomic():
             instance.is_deleted = True
             instance.save(update_fields=('is_deleted',))
-            instance.categories.update(is_deleted=True)
-            Goal.objects.filter(category__board_id=instance.id).update(status=Goal.Status.archived)
+            categories = instance.categories.update(is_deleted=True)
+            goals = Goal.objects.filter(category__board_id=instance.id).update(status=Goal.Status.archived)
+            #: Каскадные изменения записываются одним событием на запрос
+            changes = [events.event(Entity.board, Action.deleted, instance.id, instance.id, user_id)]
+            if categories:
+                changes.append(events.event(Entity.category, Action.deleted, instance.id, user_id=user_id,
+                                            count=categories))
+            if goals:
+                changes.append(events.event(Entity.goal, Action.updated, instance.id, user_id=user_id,
+                                            fields=['status'], status=Goal.Status.archived, count=goals))
+            events.record(*changes)
         return instance
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(IdentityMapMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """Представление для обработки запроса на эндпоинт /goals/goal_category{/<id>}
 
     Действия над категориями.
@@ -90,18 +151,37 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
     #: Переопределяем метод для добавления в serializer поля user.
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            category = serializer.save(user=self.request.user)
+            events.record(events.event(
+                Entity.category, Action.created, category.board_id, category.id, self.request.user.id,
+            ))
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            category = serializer.save()
+            events.record(events.event(
+                Entity.category, Action.updated, category.board_id, category.id, self.request.user.id,
+                fields=list(serializer.validated_data),
+            ))
 
     #: Переопределяем метод для исключения удаления категории из базы.
     def perform_destroy(self, instance: Category) -> Category:
+        user_id = self.request.user.id
         with transaction.atomic():
             instance.is_deleted = True
             instance.save(update_fields=('is_deleted',))
-            instance.goals.update(status=Goal.Status.archived)
+            goals = instance.goals.update(status=Goal.Status.archived)
+            changes = [events.event(Entity.category, Action.deleted, instance.board_id, instance.id, user_id)]
+            if goals:
+                changes.append(events.event(Entity.goal, Action.updated, instance.board_id, user_id=user_id,
+                                            fields=['status'], status=Goal.Status.archived, count=goals,
+                                            category=instance.id))
+            events.record(*changes)
         return instance
 
 
-class GoalViewSet(viewsets.ModelViewSet):
+class GoalViewSet(IdentityMapMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """Представление для обработки запроса на эндпоинт /goals/goal{/<id>}
 
     Действия над целями.
@@ -136,22 +216,37 @@ class GoalViewSet(viewsets.ModelViewSet):
 
     #: Переопределяем метод для добавления в serializer поля user.
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            goal = serializer.save(user=self.request.user)
+            events.record(events.event(
+                Entity.goal, Action.created, goal.category.board_id, goal.id, self.request.user.id,
+            ))
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            goal = serializer.save()
+            events.record(events.event(
+                Entity.goal, Action.updated, goal.category.board_id, goal.id, self.request.user.id,
+                fields=list(serializer.validated_data),
+            ))
 
     #: Переопределяем метод для исключения удаления целей из базы.
     def perform_destroy(self, instance: Goal) -> Goal:
         with transaction.atomic():
             instance.status = Goal.Status.archived
             instance.save(update_fields=('status',))
+            events.record(events.event(
+                Entity.goal, Action.deleted, instance.category.board_id, instance.id, self.request.user.id,
+            ))
         return instance
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(IdentityMapMixin, SideloadUsersMixin, viewsets.ModelViewSet):
     """Представление для обработки запроса на эндпоинт /goals/goal_comment{/<id>}
 
     Действия над комментариями.
     """
-    queryset = Comment.objects.all().select_related('goal')
+    queryset = Comment.objects.all().select_related('goal', 'user')
 
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
     filterset_fields = ['goal']
@@ -179,4 +274,90 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     #: Переопределяем метод для добавления в serializer поля user.
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(user=self.request.user)
+            events.record(events.event(
+                Entity.comment, Action.created, events.goal_board_id(comment.goal_id), comment.id,
+                self.request.user.id, goal=comment.goal_id,
+            ))
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            comment = serializer.save()
+            events.record(events.event(
+                Entity.comment, Action.updated, events.goal_board_id(comment.goal_id), comment.id,
+                self.request.user.id, goal=comment.goal_id, fields=list(serializer.validated_data),
+            ))
+
+    def perform_destroy(self, instance: Comment) -> None:
+        with transaction.atomic():
+            events.record(events.event(
+                Entity.comment, Action.deleted, events.goal_board_id(instance.goal_id), instance.id,
+                self.request.user.id, goal=instance.goal_id,
+            ))
+            instance.delete()
+
+
+class ExportView(views.APIView):
+    """Представление для обработки запроса на эндпоинт GET: /goals/export
+
+    Потоковая выгрузка досок, категорий, целей и комментариев пользователя.
+
+    Query params:
+        file_format: 'ndjson' (по умолчанию), 'csv' или 'zip'
+        entity: выгружаемая сущность для формата 'csv' (по умолчанию 'goals')
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    _content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+        'zip': 'application/zip',
+    }
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format', 'ndjson')
+        entity = request.query_params.get('entity', 'goals')
+
+        if file_format not in export.FORMATS:
+            raise exceptions.ValidationError({'file_format': [f'Must be one of: {", ".join(export.FORMATS)}']})
+        if entity not in export.ENTITIES:
+            raise exceptions.ValidationError({'entity': [f'Must be one of: {", ".join(export.ENTITIES)}']})
+
+        filename = f'{entity}.csv' if file_format == 'csv' else f'export.{file_format}'
+        response = StreamingHttpResponse(
+            export.stream_export(user_id=request.user.id, file_format=file_format, entity=entity),
+            content_type=self._content_types[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ImportView(views.APIView):
+    """Представление для обработки запроса на эндпоинт POST: /goals/import
+
+    Массовый импорт целей в доску из файла CSV или NDJSON.
+    Категории сопоставляются по названию и создаются при отсутствии.
+
+    Form data:
+        board: идентификатор доски
+        file: файл с колонками title, category, description, status, priority, due_date
+        file_format: 'csv' или 'ndjson' (по умолчанию определяется по расширению файла)
+
+    Если файл не удалось прочитать (не UTF-8, некорректный CSV), возвращается 400 с полем file_error;
+    строки, прочитанные до ошибки, импортируются.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = GoalImportSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        result = importer.import_goals(
+            board=serializer.validated_data['board'],
+            user_id=request.user.id,
+            rows=importer.read_rows(serializer.validated_data['file'], serializer.validated_data['file_format']),
+        )
+        if result.file_error:
+            return Response(result.to_dict(), status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.to_dict(), status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK)
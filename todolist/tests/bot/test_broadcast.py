@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from bot.broadcast import Broadcaster
+from bot.models import TgBroadcast, TgUser
+from bot.tg.client import TgClientError
+
+
+class Client:
+    """Telegram клиент: ошибки по идентификатору чата (список - по одной на каждую попытку)"""
+
+    def __init__(self, errors: dict | None = None):
+        self.errors = errors or {}
+        self.calls = []
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        self.calls.append(chat_id)
+        errors = self.errors.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(chat_id)
+
+
+@pytest.mark.django_db()
+class TestBroadcaster:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user_factory):
+        self.recipients = [
+            TgUser.objects.create(tg_id=100 + number, verification_code=str(number), user=user_factory.create())
+            for number in range(5)
+        ]
+        #: Без привязки к пользователю - не получатель
+        TgUser.objects.create(tg_id=999, verification_code='unverified')
+        self.broadcast = TgBroadcast.objects.create(text='Hello')
+
+    def _run(self, client: Client, broadcaster: Broadcaster | None = None) -> TgBroadcast:
+        assert Broadcaster.claim(self.broadcast.pk)
+        broadcaster = broadcaster or Broadcaster(tg_client=client, rate=1000, workers=2, chunk_size=2)
+        return broadcaster.run(TgBroadcast.objects.get(pk=self.broadcast.pk))
+
+    def test_counts(self):
+        """Тест рассылки
+
+        Производит проверку отправки всем верифицированным пользователям, учета недоставленных
+        сообщений и завершения рассылки.
+        """
+        client = Client({101: [TgClientError('Forbidden: bot was blocked by the user', error_code=403)]})
+        broadcast = self._run(client)
+
+        assert sorted(client.calls) == [100, 101, 102, 103, 104]
+        assert (broadcast.status, broadcast.total, broadcast.delivered, broadcast.failed) == (
+            TgBroadcast.Status.done, 5, 4, 1,
+        )
+        assert broadcast.last_tg_user_id == self.recipients[-1].id
+        assert broadcast.heartbeat is not None and broadcast.finished is not None
+
+    def test_rate_limited(self):
+        """Тест рассылки
+
+        Производит проверку паузы и повторной отправки сообщения после ответа 429.
+        """
+        client = Client({102: [TgClientError('Too Many Requests', error_code=429, retry_after=1)]})
+        broadcast = self._run(client)
+
+        assert client.calls.count(102) == 2
+        assert sorted(client.sent) == [100, 101, 102, 103, 104]
+        assert (broadcast.delivered, broadcast.failed) == (5, 0)
+
+    def test_resume(self):
+        """Тест рассылки
+
+        Производит проверку продолжения рассылки с получателя после сохраненного и сохранения
+        ранее учтенного прогресса.
+        """
+        TgBroadcast.objects.filter(pk=self.broadcast.pk).update(
+            status=TgBroadcast.Status.paused, last_tg_user_id=self.recipients[1].id, total=5, delivered=2,
+        )
+        client = Client()
+        broadcast = self._run(client)
+
+        assert sorted(client.calls) == [102, 103, 104]
+        assert (broadcast.status, broadcast.delivered, broadcast.failed) == (TgBroadcast.Status.done, 5, 0)
+
+    def test_stop(self, monkeypatch):
+        """Тест рассылки
+
+        Производит проверку прекращения рассылки после пачки, во время отправки которой рассылка остановлена.
+        """
+        client = Client()
+        broadcaster = Broadcaster(tg_client=client, rate=1000, workers=2, chunk_size=2)
+        flush = broadcaster._flush
+
+        def stop_on_second_chunk(broadcast, chunk, executor):
+            if chunk[0][1] == 102:
+                TgBroadcast.objects.filter(pk=broadcast.pk).update(status=TgBroadcast.Status.paused)
+            return flush(broadcast, chunk, executor)
+
+        monkeypatch.setattr(broadcaster, '_flush', stop_on_second_chunk)
+        broadcast = self._run(client, broadcaster)
+
+        assert sorted(client.calls) == [100, 101, 102, 103]
+        assert broadcast.status == TgBroadcast.Status.paused
+        assert broadcast.last_tg_user_id == self.recipients[3].id
+        assert broadcast.delivered == 4
+
+
+@pytest.mark.django_db()
+class TestClaimNext:
+    def test_queued(self):
+        """Тест выбора рассылки для выполнения
+
+        Производит проверку выбора рассылки в очереди и отсутствия повторного выбора.
+        """
+        TgBroadcast.objects.create(text='New')
+        queued = TgBroadcast.objects.create(text='Queued', status=TgBroadcast.Status.queued)
+
+        claimed = Broadcaster.claim_next(stale=600)
+        assert claimed.pk == queued.pk
+        assert claimed.status == TgBroadcast.Status.running and claimed.heartbeat is not None
+        assert Broadcaster.claim_next(stale=600) is None
+
+    def test_stale(self):
+        """Тест выбора рассылки для выполнения
+
+        Производит проверку продолжения выполняемой рассылки с устаревшим heartbeat
+        и пропуска рассылки, прогресс которой сохранялся недавно.
+        """
+        now = timezone.now()
+        TgBroadcast.objects.create(text='Fresh', status=TgBroadcast.Status.running, heartbeat=now)
+        stale = TgBroadcast.objects.create(text='Stale', status=TgBroadcast.Status.running,
+                                           heartbeat=now - timedelta(minutes=20), started=now - timedelta(hours=1))
+
+        claimed = Broadcaster.claim_next(stale=600)
+        assert claimed.pk == stale.pk
+        assert claimed.started == stale.started
+        assert claimed.heartbeat > stale.heartbeat
+        assert Broadcaster.claim_next(stale=600) is None
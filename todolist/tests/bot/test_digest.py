@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+
+import pytest
+
+from bot.management.commands._digest import (
+    DIGEST_SECTION_LIMIT, DIGEST_TITLE_LENGTH, build_digests, format_digest, get_day_bounds
+)
+from bot.models import TgUser
+from goals.models import BoardParticipant, Goal
+
+DAY = date(2030, 1, 10)
+
+
+@pytest.mark.django_db()
+class TestBuildDigests:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, user_factory, board_factory, category_factory):
+        self.start, self.end = get_day_bounds(DAY)
+        self.user = user
+        TgUser.objects.create(tg_id=1, verification_code='code', user=user)
+        #: Своя доска и доска другого пользователя (без Telegram), где пользователь - читатель
+        self.category = category_factory.create(board=board_factory.create(with_owner=user), user=user)
+        self.other = user_factory.create()
+        self.other_category = category_factory.create(board=board_factory.create(with_owner=self.other),
+                                                      user=self.other)
+        BoardParticipant.objects.create(board=self.other_category.board, user=user,
+                                        role=BoardParticipant.Role.reader)
+
+    def _goal(self, title: str, category=None, status=Goal.Status.to_do, due_date=None, updated=None) -> Goal:
+        category = category or self.category
+        goal = Goal.objects.create(title=title, category=category, user=category.user, status=status,
+                                   due_date=due_date)
+        if updated is not None:
+            Goal.objects.filter(pk=goal.pk).update(updated=updated)
+        return goal
+
+    def test_sections(self):
+        """Тест формирования сводки
+
+        Производит проверку разделов сводки (просроченные, со сроком сегодня, выполненные вчера)
+        по целям всех досок пользователя и границ разделов.
+        """
+        self._goal('Overdue', due_date=self.start - timedelta(days=3))
+        self._goal('Overdue other board', category=self.other_category, due_date=self.start - timedelta(seconds=1))
+        self._goal('Overdue done', status=Goal.Status.done, due_date=self.start - timedelta(days=1))
+        self._goal('Overdue archived', status=Goal.Status.archived, due_date=self.start - timedelta(days=1))
+        self._goal('Today', due_date=self.start)
+        self._goal('Today other board', category=self.other_category, status=Goal.Status.in_progress,
+                   due_date=self.end - timedelta(seconds=1))
+        self._goal('Tomorrow', due_date=self.end)
+        self._goal('Completed', status=Goal.Status.done, updated=self.start - timedelta(hours=2))
+        self._goal('Completed early', status=Goal.Status.done, updated=self.start - timedelta(days=1))
+        self._goal('Completed today', status=Goal.Status.done, updated=self.start)
+        self._goal('Completed two days ago', status=Goal.Status.done,
+                   updated=self.start - timedelta(days=1, seconds=1))
+
+        assert build_digests(DAY, low=0) == {
+            self.user.id: {
+                'overdue': (['Overdue', 'Overdue other board'], 2),
+                'due_today': (['Today', 'Today other board'], 2),
+                'completed': (['Completed early', 'Completed'], 2),
+            },
+        }
+
+    def test_deleted_board_and_category(self, category_factory):
+        """Тест формирования сводки
+
+        Производит проверку исключения целей удаленных досок и категорий.
+        """
+        deleted_category = category_factory.create(board=self.category.board, user=self.user, is_deleted=True)
+        self._goal('Deleted category', category=deleted_category, due_date=self.start - timedelta(days=1))
+        self.other_category.board.is_deleted = True
+        self.other_category.board.save(update_fields=('is_deleted',))
+        self._goal('Deleted board', category=self.other_category, due_date=self.start - timedelta(days=1))
+        self._goal('Visible', due_date=self.start - timedelta(days=1))
+
+        assert build_digests(DAY, low=0) == {self.user.id: {'overdue': (['Visible'], 1)}}
+
+    def test_section_limit(self):
+        """Тест формирования сводки
+
+        Производит проверку ограничения количества заголовков раздела при полном количестве целей.
+        """
+        total = DIGEST_SECTION_LIMIT + 3
+        for number in range(total):
+            self._goal(f'Overdue {number:02}', due_date=self.start - timedelta(hours=total - number))
+
+        titles, count = build_digests(DAY, low=0)[self.user.id]['overdue']
+        assert titles == [f'Overdue {number:02}' for number in range(DIGEST_SECTION_LIMIT)]
+        assert count == total
+
+    def test_user_range(self):
+        """Тест формирования сводки
+
+        Производит проверку выбора пользователей из диапазона user_id [low, high) и сводки
+        по общей доске для каждого участника.
+        """
+        TgUser.objects.create(tg_id=2, verification_code='other', user=self.other)
+        self._goal('Shared', category=self.other_category, due_date=self.start - timedelta(days=1))
+        assert self.user.id < self.other.id
+
+        shared = {'overdue': (['Shared'], 1)}
+        assert build_digests(DAY, low=0) == {self.user.id: shared, self.other.id: shared}
+        assert build_digests(DAY, low=self.other.id) == {self.other.id: shared}
+        assert build_digests(DAY, low=0, high=self.other.id) == {self.user.id: shared}
+
+def test_format_digest():
+    """Тест текста сводки
+
+    Производит проверку сокращения длинных заголовков, количества не показанных целей и порядка разделов.
+    """
+    long_title = 'x' * (DIGEST_TITLE_LENGTH + 1)
+    text = format_digest(DAY, {
+        'completed': (['Done'], 1),
+        'overdue': ([long_title, 'y' * DIGEST_TITLE_LENGTH], 5),
+    })
+    assert text == (
+        'Сводка на 10.01.2030\n\n'
+        'Просрочены (5):\n'
+        f'- {"x" * (DIGEST_TITLE_LENGTH - 1)}…\n'
+        f'- {"y" * DIGEST_TITLE_LENGTH}\n'
+        '... и еще 3\n\n'
+        'Выполнены вчера (1):\n'
+        '- Done'
+    )
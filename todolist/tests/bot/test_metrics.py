@@ -0,0 +1,70 @@
+from bot.tg.metrics import Registry
+
+
+def test_histogram_samples():
+    """Тест формата гистограммы
+
+    Производит проверку накопительных значений интервалов (включая +Inf), суммы и количества наблюдений.
+    """
+    registry = Registry()
+    histogram = registry.histogram('test_duration_seconds', 'Test duration', labels=('state',), buckets=(0.1, 1))
+    histogram.observe(0.05, 'idle')
+    histogram.observe(0.1, 'idle')
+    histogram.observe(0.5, 'idle')
+    histogram.observe(3, 'idle')
+
+    assert list(histogram.samples()) == [
+        ('test_duration_seconds_bucket', {'state': 'idle', 'le': '0.1'}, 2),
+        ('test_duration_seconds_bucket', {'state': 'idle', 'le': '1'}, 3),
+        ('test_duration_seconds_bucket', {'state': 'idle', 'le': '+Inf'}, 4),
+        ('test_duration_seconds_sum', {'state': 'idle'}, 3.65),
+        ('test_duration_seconds_count', {'state': 'idle'}, 4),
+    ]
+
+
+def test_render():
+    """Тест текстового формата Prometheus
+
+    Производит проверку описаний и значений счетчика, гистограммы и сборщика, а также экранирования
+    значений меток.
+    """
+    registry = Registry()
+    counter = registry.counter('test_errors', 'Test errors', labels=('code',))
+    counter.inc('429')
+    counter.inc('429', amount=2)
+    counter.inc('say "hi"\n')
+    registry.histogram('test_size', 'Test size', buckets=(1,)).observe(1)
+    registry.add_collector(lambda: [
+        ('test_depth', 'gauge', 'Test depth', {'queue': 'a'}, 5),
+        ('test_depth', 'gauge', 'Test depth', {'queue': 'b'}, 0.5),
+    ])
+
+    assert registry.render() == (
+        '# HELP test_errors_total Test errors\n'
+        '# TYPE test_errors_total counter\n'
+        'test_errors_total{code="429"} 3\n'
+        'test_errors_total{code="say \\"hi\\"\\n"} 1\n'
+        '# HELP test_size Test size\n'
+        '# TYPE test_size histogram\n'
+        'test_size_bucket{le="1"} 1\n'
+        'test_size_bucket{le="+Inf"} 1\n'
+        'test_size_sum 1\n'
+        'test_size_count 1\n'
+        '# HELP test_depth Test depth\n'
+        '# TYPE test_depth gauge\n'
+        'test_depth{queue="a"} 5\n'
+        'test_depth{queue="b"} 0.5\n'
+    )
+
+
+def test_render_after_reset():
+    """Тест текстового формата Prometheus
+
+    Производит проверку сброса значений и сборщиков: остаются только описания показателей.
+    """
+    registry = Registry()
+    registry.counter('test_errors', 'Test errors').inc()
+    registry.add_collector(lambda: [('test_depth', 'gauge', 'Test depth', {}, 1)])
+    registry.reset()
+
+    assert registry.render() == '# HELP test_errors_total Test errors\n# TYPE test_errors_total counter\n'
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from bot.management.commands._outbox import OutboxWorker
+from bot.models import TgOutbox
+from bot.tg.client import TgClientError
+
+
+class Client:
+    def __init__(self, errors: dict):
+        self.errors = errors
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        if chat_id in self.errors:
+            raise self.errors[chat_id]
+        self.sent.append(chat_id)
+
+
+@pytest.mark.django_db()
+class TestOutboxWorker:
+    def test_drain(self):
+        """Тест отправки пачки уведомлений
+
+        Производит проверку записи результата каждого уведомления: отправлено, повтор после временной
+        или непредвиденной ошибки, окончательная ошибка API.
+        """
+        for chat_id in (1, 2, 3, 4):
+            TgOutbox.objects.create(chat_id=chat_id, text='text')
+        client = Client({
+            2: TgClientError('Bad Gateway', error_code=502),
+            3: RuntimeError('unexpected'),
+            4: TgClientError('Forbidden: bot was blocked by the user', error_code=403),
+        })
+
+        assert OutboxWorker(client).drain() == 4
+        assert client.sent == [1]
+        items = {item.chat_id: item for item in TgOutbox.objects.all()}
+        assert [items[chat_id].attempts for chat_id in (1, 2, 3, 4)] == [1, 1, 1, 1]
+        assert items[1].status == TgOutbox.Status.sent and items[1].sent
+        assert items[2].status == TgOutbox.Status.pending and items[2].next_attempt > timezone.now()
+        assert items[3].status == TgOutbox.Status.pending and items[3].error == 'unexpected'
+        assert items[4].status == TgOutbox.Status.failed
+
+    def test_cleanup(self):
+        """Тест удаления завершенных уведомлений
+
+        Производит проверку удаления отправленных и неотправленных уведомлений старше срока хранения.
+        """
+        for chat_id, item_status in enumerate(TgOutbox.Status.values):
+            TgOutbox.objects.create(chat_id=chat_id, text='text', status=item_status)
+        TgOutbox.objects.create(chat_id=10, text='text', status=TgOutbox.Status.sent)
+        TgOutbox.objects.exclude(chat_id=10).update(created=timezone.now() - timedelta(days=2))
+
+        worker = OutboxWorker(Client({}), retention=24 * 60 * 60)
+        assert worker.cleanup() == 2
+        assert sorted(TgOutbox.objects.values_list('chat_id', flat=True)) == [0, 10]
+        assert worker.cleanup() == 0
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from bot.management.commands._reminders import ReminderScheduler, TimingWheel
+from bot.models import TgReminder, TgUser
+from goals.models import Goal
+
+
+class TestTimingWheel:
+    def test_add(self):
+        """Тест добавления таймера
+
+        Производит проверку учета ключей: повторно таймер с тем же ключом не добавляется.
+        """
+        wheel = TimingWheel(tick=1, slots=10)
+        assert wheel.add(5, ('goal', 1), 'first')
+        assert not wheel.add(7, ('goal', 1), 'duplicate')
+        assert wheel.add(5, ('goal', 2), 'second')
+
+        assert len(wheel) == 2
+        assert ('goal', 1) in wheel
+        assert ('goal', 3) not in wheel
+
+    def test_advance(self):
+        """Тест продвижения колеса
+
+        Производит проверку срабатывания таймеров не раньше их времени и повторного добавления
+        сработавшего ключа.
+        """
+        wheel = TimingWheel(tick=1, slots=10)
+        wheel.add(3.5, ('goal', 1), 'first')
+        wheel.add(4.2, ('goal', 2), 'second')
+
+        assert wheel.advance(3) == []
+        assert wheel.advance(4) == ['first']
+        assert wheel.advance(4.5) == ['second']
+        assert len(wheel) == 0
+        assert wheel.add(8, ('goal', 1), 'again')
+
+    def test_advance_next_rotation(self):
+        """Тест продвижения колеса
+
+        Производит проверку таймера, срабатывающего через полный оборот колеса и позже: он остается
+        в ячейке до своего оборота.
+        """
+        wheel = TimingWheel(tick=1, slots=10)
+        wheel.add(25, ('goal', 1), 'late')
+
+        assert wheel.advance(4) == []
+        assert wheel.advance(15) == []
+        assert wheel.advance(24.9) == []
+        assert wheel.advance(25) == ['late']
+
+    def test_advance_skipped_ticks(self):
+        """Тест продвижения колеса
+
+        Производит проверку срабатывания всех просроченных таймеров при пропуске больше одного оборота
+        и таймера, добавленного со временем в прошлом.
+        """
+        wheel = TimingWheel(tick=1, slots=10)
+        wheel.advance(0)
+        for second in range(1, 30, 3):
+            wheel.add(second, ('goal', second), second)
+
+        assert sorted(wheel.advance(100)) == list(range(1, 30, 3))
+        wheel.add(50, ('goal', 50), 'overdue')
+        assert wheel.advance(100.5) == ['overdue']
+
+
+class Sender:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text):
+        self.messages.append((chat_id, text))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fire_recorded_concurrently(goal_factory, monkeypatch):
+    """Тест отправки пачки напоминаний
+
+    Производит проверку отправки напоминаний пачки, часть которой уже записана другим экземпляром
+    планировщика: конфликт не отменяет остальные напоминания пачки.
+    """
+    due_date = timezone.now() + timedelta(hours=1)
+    recorded, pending = goal_factory.create_batch(2, due_date=due_date)
+    TgUser.objects.create(tg_id=1, verification_code='first', user=recorded.user)
+    TgUser.objects.create(tg_id=2, verification_code='second', user=pending.user)
+    TgReminder.objects.create(goal=recorded, due_date=due_date)
+
+    sender = Sender()
+    scheduler = ReminderScheduler(sender=sender, lead=3600)
+    #: Первая выборка не видит записанное напоминание (запись зафиксирована после нее)
+    querysets = [Goal.objects.all()]
+    get_queryset = scheduler.get_queryset
+    monkeypatch.setattr(scheduler, 'get_queryset', lambda: querysets.pop() if querysets else get_queryset())
+
+    assert scheduler.fire([(recorded.id, due_date), (pending.id, due_date)]) == 1
+    assert [chat_id for chat_id, _ in sender.messages] == [2]
+    assert TgReminder.objects.filter(goal=pending, due_date=due_date).exists()
+
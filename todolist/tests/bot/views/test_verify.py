@@ -0,0 +1,34 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from bot.models import TgUser, TgOutbox
+
+
+@pytest.mark.django_db()
+class TestVerify:
+    url = reverse('update-tguser')
+
+    def test_success(self, auth_client, user):
+        """Тест на эндпоинт PATCH: /bot/verify
+
+        Производит проверку привязки Telegram пользователя и постановки уведомления в очередь
+        без обращения к Telegram API.
+        """
+        TgUser.objects.create(tg_id=42, verification_code='code')
+        response = auth_client.patch(self.url, {'verification_code': 'code'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        assert TgUser.objects.get().user == user
+        notification = TgOutbox.objects.get()
+        assert notification.chat_id == 42
+        assert notification.status == TgOutbox.Status.pending
+
+    def test_wrong_code(self, auth_client):
+        """Тест на эндпоинт PATCH: /bot/verify
+
+        Производит проверку ответа на неизвестный код верификации.
+        """
+        response = auth_client.patch(self.url, {'verification_code': 'wrong'}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not TgOutbox.objects.exists()
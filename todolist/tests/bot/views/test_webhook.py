@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from bot.management.commands._queue import QueueWorker
+from bot.models import TgUpdate
+
+
+@pytest.fixture()
+def update() -> dict:
+    return {
+        'update_id': 100,
+        'message': {
+            'message_id': 1,
+            'from': {'id': 42, 'is_bot': False, 'first_name': 'User'},
+            'date': 1700000000,
+            'chat': {'id': 42, 'type': 'private'},
+            'text': '/goals',
+        },
+    }
+
+
+@pytest.mark.django_db()
+class TestWebhook:
+    url = reverse('webhook')
+    secret = 'webhook-secret'
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.TG_WEBHOOK_SECRET = self.secret
+
+    def test_disabled_without_secret(self, client, settings, update):
+        """Тест на эндпоинт POST: /bot/webhook
+
+        Производит проверку недоступности эндпоинта, если секретный токен не настроен.
+        """
+        settings.TG_WEBHOOK_SECRET = ''
+        response = client.post(self.url, update, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_invalid_secret(self, client, update):
+        """Тест на эндпоинт POST: /bot/webhook
+
+        Производит проверку секретного токена Telegram.
+        """
+        response = client.post(self.url, update, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='wrong')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not TgUpdate.objects.exists()
+
+    def test_success(self, client, update):
+        """Тест на эндпоинт POST: /bot/webhook
+
+        Производит проверку сохранения обновления в очередь без повторов при повторной доставке.
+        """
+        for _ in range(2):
+            response = client.post(self.url, update, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN=self.secret)
+            assert response.status_code == status.HTTP_200_OK
+
+        item = TgUpdate.objects.get()
+        assert item.update_id == update['update_id']
+        assert item.chat_id == update['message']['chat']['id']
+        assert item.status == TgUpdate.Status.pending
+        assert item.payload == update
+
+    def test_group_chat_partition(self, client, update):
+        """Тест на эндпоинт POST: /bot/webhook
+
+        Производит проверку обработки обновления группового чата (отрицательный chat_id) обработчиком
+        своей части чатов при нескольких обработчиках.
+        """
+        update['message']['chat'] = {'id': -100123, 'type': 'group', 'title': 'Group'}
+        response = client.post(self.url, update, format='json', HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN=self.secret)
+        assert response.status_code == status.HTTP_200_OK
+
+        drained = [
+            QueueWorker(tg_client=None, partition=partition, partitions=4).drain() for partition in range(4)
+        ]
+        assert drained == [0, 0, 0, 1]
+        assert TgUpdate.objects.get().status == TgUpdate.Status.done
+
+    def test_cleanup(self, update):
+        """Тест удаления завершенных обновлений очереди webhook
+
+        Производит проверку удаления обработанных и неудачных обновлений старше срока хранения.
+        """
+        for update_id, item_status in enumerate(TgUpdate.Status.values):
+            TgUpdate.objects.create(update_id=update_id, payload=update, status=item_status)
+        TgUpdate.objects.create(update_id=10, payload=update, status=TgUpdate.Status.done)
+        TgUpdate.objects.exclude(update_id=10).update(created=timezone.now() - timedelta(days=2))
+
+        worker = QueueWorker(tg_client=None, retention=24 * 60 * 60)
+        assert worker.cleanup() == 2
+        assert sorted(TgUpdate.objects.values_list('update_id', flat=True)) == [0, 10]
+        assert worker.cleanup() == 0
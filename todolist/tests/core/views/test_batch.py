@@ -0,0 +1,136 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import Category, Board, Goal, Comment
+from goals.views import CommentViewSet
+
+
+@pytest.mark.django_db()
+class TestBatch:
+    url = reverse('batch')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, category_factory, user):
+        self.board: Board = board_factory.create(with_owner=user)
+        self.category: Category = category_factory.create(board=self.board)
+
+    def test_auth_required(self, client):
+        """Тест на эндпоинт POST: /batch
+
+        Производит проверку требований аутентификации.
+        """
+        response = client.post(self.url, {'requests': []}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_success(self, auth_client, user):
+        """Тест на эндпоинт POST: /batch
+
+        Производит проверку последовательного выполнения вложенных запросов
+        с общим пользователем и возврата ответов в порядке запросов.
+        """
+        response = auth_client.post(self.url, {
+            'requests': [
+                {'method': 'post', 'path': '/goals/goal/create',
+                 'body': {'title': 'Goal', 'category': self.category.id}},
+                {'method': 'get', 'path': '/core/profile'},
+                {'method': 'get', 'path': f'/goals/goal_category/list?board={self.board.id}'},
+            ]
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()['responses']
+        assert [result['status'] for result in results] == [
+            status.HTTP_201_CREATED, status.HTTP_200_OK, status.HTTP_200_OK
+        ]
+        goal = Goal.objects.get(title='Goal')
+        assert results[0]['body']['id'] == goal.id
+        assert goal.user_id == user.id
+        assert results[1]['body']['username'] == user.username
+        assert [category['id'] for category in results[2]['body']] == [self.category.id]
+
+    def test_path_not_allowed(self, auth_client):
+        """Тест на эндпоинт POST: /batch
+
+        Производит проверку ограничения вложенных запросов маршрутами goals, core и bot.
+        """
+        response = auth_client.post(self.url, {
+            'requests': [{'method': 'get', 'path': '/admin/'}, {'method': 'get', 'path': '/goals/unknown'}]
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert [result['status'] for result in response.json()['responses']] == [
+            status.HTTP_400_BAD_REQUEST, status.HTTP_404_NOT_FOUND
+        ]
+
+    @pytest.mark.parametrize('atomic, goals_count', [(True, 0), (False, 1)], ids=['atomic', 'not atomic'])
+    def test_atomic(self, auth_client, atomic, goals_count):
+        """Тест на эндпоинт POST: /batch
+
+        Производит проверку отката всех изменений пакета при ошибке вложенного запроса в режиме atomic.
+        """
+        response = auth_client.post(self.url, {
+            'atomic': atomic,
+            'requests': [
+                {'method': 'post', 'path': '/goals/goal/create',
+                 'body': {'title': 'Goal', 'category': self.category.id}},
+                {'method': 'post', 'path': '/goals/goal_comment/create', 'body': {'text': 'Comment'}},
+                {'method': 'get', 'path': '/core/profile'},
+            ]
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        statuses = [result['status'] for result in response.json()['responses']]
+        assert statuses[:2] == [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST]
+        assert statuses[2] == (status.HTTP_424_FAILED_DEPENDENCY if atomic else status.HTTP_200_OK)
+        assert Goal.objects.count() == goals_count
+        assert not Comment.objects.exists()
+
+    def test_identity_map(self, auth_client, goal_factory):
+        """Тест на эндпоинт POST: /batch
+
+        Производит проверку однократной загрузки доски и роли пользователя
+        при нескольких вложенных запросах к объектам одной доски.
+        """
+        goals = goal_factory.create_batch(size=3, category=self.category)
+
+        with CaptureQueriesContext(connection) as context:
+            response = auth_client.post(self.url, {
+                'requests': [{'method': 'patch', 'path': f'/goals/goal/{goal.id}', 'body': {'priority': 3}}
+                             for goal in goals]
+            }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert [result['status'] for result in response.json()['responses']] == [status.HTTP_200_OK] * 3
+
+        queries = [query['sql'] for query in context.captured_queries]
+        assert len([sql for sql in queries if 'FROM "goals_board"' in sql]) == 1
+        assert len([sql for sql in queries if 'FROM "goals_boardparticipant"' in sql]) == 1
+
+    @pytest.mark.parametrize('atomic, goals_count', [(True, 0), (False, 1)], ids=['atomic', 'not atomic'])
+    def test_server_error(self, auth_client, monkeypatch, atomic, goals_count):
+        """Тест на эндпоинт POST: /batch
+
+        Производит проверку результата 500 для вложенного запроса, завершившегося исключением,
+        без потери результатов остальных запросов пакета.
+        """
+        def fail(*args, **kwargs):
+            raise ValueError('Unexpected error')
+
+        monkeypatch.setattr(CommentViewSet, 'create', fail)
+        response = auth_client.post(self.url, {
+            'atomic': atomic,
+            'requests': [
+                {'method': 'post', 'path': '/goals/goal/create',
+                 'body': {'title': 'Goal', 'category': self.category.id}},
+                {'method': 'post', 'path': '/goals/goal_comment/create', 'body': {'text': 'Comment'}},
+                {'method': 'get', 'path': '/core/profile'},
+            ]
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()['responses']
+        assert results[1] == {'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                              'body': {'detail': 'A server error occurred.'}}
+        assert results[2]['status'] == (status.HTTP_424_FAILED_DEPENDENCY if atomic else status.HTTP_200_OK)
+        assert Goal.objects.count() == goals_count
@@ -2,7 +2,7 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 
-from goals.models import BoardParticipant, Category, Goal
+from goals.models import BoardParticipant, Category, Event, Goal
 from tests.utils import BaseTestCase
 
 
@@ -161,3 +161,20 @@ class TestBoardDestroy(BoardTestCase):
         assert self.board.is_deleted
         assert self.cat.is_deleted
         assert self.goal.status == Goal.Status.archived
+
+    def test_events_on_delete_board(self, auth_client, user):
+        """Тест на эндпоинт DELETE: /goals/board/<id>
+
+        Производит проверку записи в журнал изменений удаления доски и каскадных изменений
+        категорий и целей (по одному событию на запрос).
+        """
+        response = auth_client.delete(self.url)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        assert list(Event.objects.order_by('id').values_list('entity', 'action', 'object_id', 'payload')) == [
+            (Event.Entity.board, Event.Action.deleted, self.board.id, {}),
+            (Event.Entity.category, Event.Action.deleted, None, {'count': 1}),
+            (Event.Entity.goal, Event.Action.updated, None,
+             {'fields': ['status'], 'status': Goal.Status.archived, 'count': 1}),
+        ]
+        assert set(Event.objects.values_list('board_id', 'user_id', 'dispatched')) == {(self.board.id, user.id, None)}
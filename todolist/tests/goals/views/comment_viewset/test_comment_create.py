@@ -2,7 +2,7 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 
-from goals.models import Category, Board, BoardParticipant, Goal
+from goals.models import Category, Board, BoardParticipant, Event, Goal
 from tests.utils import BaseTestCase
 
 
@@ -61,3 +61,21 @@ class TestCommentCreate(BaseTestCase):
             'goal': self.goal.id
         })
         assert response.status_code == status.HTTP_201_CREATED
+
+    def test_event_on_create_comment(self, auth_client, user, faker):
+        """Тест на endpoint POST: /goals/goal_comment/create
+
+        Производит проверку записи создания комментария в журнал изменений с доской цели.
+        """
+        response = auth_client.post(self.url, data={
+            'text': faker.text(),
+            'goal': self.goal.id
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+
+        event = Event.objects.get()
+        assert (event.entity, event.action) == (Event.Entity.comment, Event.Action.created)
+        assert event.object_id == response.json()['id']
+        assert event.board_id == self.board.id
+        assert event.user_id == user.id
+        assert event.payload == {'goal': self.goal.id}
@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import Category, Board, Goal, Comment
+
+
+@pytest.fixture()
+def another_user(user_factory):
+    return user_factory.create()
+
+
+@pytest.mark.django_db()
+class TestExport:
+    url = reverse('goals:export')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, category_factory, goal_factory, comment_factory, user):
+        self.board: Board = board_factory.create(with_owner=user)
+        self.category: Category = category_factory.create(board=self.board)
+        self.goals: list[Goal] = goal_factory.create_batch(size=3, category=self.category)
+        self.comment: Comment = comment_factory.create(goal=self.goals[0])
+
+    def test_auth_required(self, client):
+        """Тест на endpoint GET: /goals/export
+
+        Производит проверку требований аутентификации.
+        """
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_invalid_format(self, auth_client):
+        """Тест на endpoint GET: /goals/export
+
+        Производит проверку валидации формата выгрузки.
+        """
+        response = auth_client.get(self.url, {'file_format': 'xml'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_ndjson(self, auth_client):
+        """Тест на endpoint GET: /goals/export
+
+        Производит проверку выгрузки всех сущностей пользователя в формате NDJSON.
+        """
+        response = auth_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        by_type: dict = {}
+        for record in records:
+            by_type.setdefault(record['type'], []).append(record['id'])
+
+        assert by_type == {
+            'boards': [self.board.id],
+            'categories': [self.category.id],
+            'goals': sorted(goal.id for goal in self.goals),
+            'comments': [self.comment.id],
+        }
+
+    def test_csv_only_participant_data(self, client, another_user, board_factory, category_factory, goal_factory):
+        """Тест на endpoint GET: /goals/export
+
+        Производит проверку выгрузки в формате CSV только данных досок, где пользователь является участником.
+        """
+        another_board: Board = board_factory.create(with_owner=another_user)
+        another_goal: Goal = goal_factory.create(category=category_factory.create(board=another_board))
+
+        client.force_login(another_user)
+        response = client.get(self.url, {'file_format': 'csv', 'entity': 'goals'})
+        assert response.status_code == status.HTTP_200_OK
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert [int(row['id']) for row in rows] == [another_goal.id]
+        assert rows[0]['title'] == another_goal.title
+
+    def test_zip(self, auth_client):
+        """Тест на endpoint GET: /goals/export
+
+        Производит проверку выгрузки в виде zip-архива с CSV-файлами.
+        """
+        response = auth_client.get(self.url, {'file_format': 'zip'})
+        assert response.status_code == status.HTTP_200_OK
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        assert sorted(archive.namelist()) == ['boards.csv', 'categories.csv', 'comments.csv', 'goals.csv']
+
+        goals = list(csv.DictReader(io.StringIO(archive.read('goals.csv').decode())))
+        assert len(goals) == len(self.goals)
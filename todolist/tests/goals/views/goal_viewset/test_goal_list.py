@@ -76,3 +76,28 @@ class TestGoalList(BaseTestCase):
         response = auth_client.get(self.url)
         assert response.status_code == status.HTTP_200_OK
         assert [goal['priority'] for goal in response.json()] == [1, 2, 3, 4]
+
+    def test_expand_users(self, auth_client, goal_factory, user_factory):
+        """Тест на endpoint GET: /goals/goal/list?expand=users
+
+        Производит проверку передачи пользователей один раз в словаре users,
+        при этом цели содержат только user_id.
+        """
+        author = user_factory.create()
+        goals = goal_factory.create_batch(size=3, category=self.category, user=author)
+
+        response = auth_client.get(self.url, {'expand': 'users', 'limit': 10})
+        assert response.status_code == status.HTTP_200_OK
+
+        data = response.json()
+        assert data['count'] == len(goals)
+        assert all('user' not in row and row['user_id'] == author.id for row in data['results'])
+        assert data['users'] == {
+            str(author.id): {
+                "id": author.id,
+                "username": author.username,
+                "first_name": author.first_name,
+                "last_name": author.last_name,
+                "email": author.email
+            }
+        }
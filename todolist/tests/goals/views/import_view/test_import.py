@@ -0,0 +1,149 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+
+from goals.models import Category, Board, BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestImport:
+    url = reverse('goals:import')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, category_factory, user):
+        self.board: Board = board_factory.create(with_owner=user)
+        self.category: Category = category_factory.create(board=self.board, title='Work')
+        self.participant: BoardParticipant = self.board.participants.last()
+
+    def test_auth_required(self, client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку требований аутентификации.
+        """
+        response = client.post(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_failed_import_by_reader(self, auth_client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку отсутствия возможности импорта в доску, где пользователь является читателем.
+        """
+        self.participant.role = BoardParticipant.Role.reader
+        self.participant.save(update_fields=('role',))
+
+        response = auth_client.post(self.url, data={
+            'board': self.board.id,
+            'file': SimpleUploadedFile('goals.csv', b'title,category\nGoal,Work\n'),
+        })
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not Goal.objects.exists()
+
+    def test_success_csv(self, auth_client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку импорта из CSV: сопоставление существующих категорий по названию,
+        создание отсутствующих и построчный отчет об ошибках.
+        """
+        content = (
+            'title,category,priority,due_date\n'
+            'First,Work,3,2030-01-01\n'
+            'Second,Home,,\n'
+            ',Work,,\n'
+            'Third,Work,9,\n'
+        )
+        response = auth_client.post(self.url, data={
+            'board': self.board.id,
+            'file': SimpleUploadedFile('goals.csv', content.encode()),
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {
+            'created': 2,
+            'failed': 2,
+            'categories_created': 1,
+            'errors': [
+                {'row': 3, 'errors': {'title': 'This field is required.'}},
+                {'row': 4, 'errors': {'priority': 'Must be one of: 1, 2, 3, 4'}},
+            ],
+        }
+
+        first = Goal.objects.get(title='First')
+        assert first.category_id == self.category.id
+        assert first.priority == Goal.Priority.high
+        assert Goal.objects.get(title='Second').category.title == 'Home'
+
+    def test_success_ndjson(self, auth_client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку импорта из NDJSON.
+        """
+        content = '\n'.join(json.dumps({'title': f'Goal {i}', 'category': 'Work'}) for i in range(5))
+        response = auth_client.post(self.url, data={
+            'board': self.board.id,
+            'file': SimpleUploadedFile('goals.ndjson', content.encode()),
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()['created'] == 5
+        assert Goal.objects.filter(category=self.category).count() == 5
+
+    def test_failed_import_not_utf8(self, auth_client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку ответа 400 с ошибкой уровня файла при загрузке файла не в кодировке UTF-8.
+        """
+        response = auth_client.post(self.url, data={
+            'board': self.board.id,
+            'file': SimpleUploadedFile('goals.csv', 'title,category\nЦель,Work\n'.encode('cp1251')),
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()['file_error'] == 'Row 1: file is not valid UTF-8 text'
+        assert not Goal.objects.exists()
+
+    def test_failed_import_malformed_csv(self, auth_client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку ответа 400 с ошибкой уровня файла при некорректном CSV (слишком длинное поле):
+        строки до ошибки импортируются.
+        """
+        content = 'title,category\nFirst,Work\nSecond,Work\n' + 'x' * 200_000 + ',Work\nLast,Work\n'
+        response = auth_client.post(self.url, data={
+            'board': self.board.id,
+            'file': SimpleUploadedFile('goals.csv', content.encode()),
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {
+            'created': 2,
+            'failed': 0,
+            'categories_created': 0,
+            'errors': [],
+            'file_error': 'Row 3: malformed CSV (field larger than field limit (131072))',
+        }
+        assert sorted(Goal.objects.values_list('title', flat=True)) == ['First', 'Second']
+
+    def test_failed_import_null_character(self, auth_client):
+        """Тест на endpoint POST: /goals/import
+
+        Производит проверку отклонения строк с нулевым символом (Postgres не хранит его в текстовых полях).
+        """
+        content = '\n'.join(json.dumps(row) for row in (
+            {'title': 'First', 'category': 'Work'},
+            {'title': 'Nul\x00', 'category': 'Work'},
+            {'title': 'Last', 'category': 'Work', 'description': 'a\x00b'},
+        ))
+        response = auth_client.post(self.url, data={
+            'board': self.board.id,
+            'file': SimpleUploadedFile('goals.ndjson', content.encode()),
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {
+            'created': 1,
+            'failed': 2,
+            'categories_created': 0,
+            'errors': [
+                {'row': 2, 'errors': {'title': 'Null characters are not allowed.'}},
+                {'row': 3, 'errors': {'description': 'Null characters are not allowed.'}},
+            ],
+        }
+        assert list(Goal.objects.values_list('title', flat=True)) == ['First']
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from goals import events
+from goals.events import EventDispatcher
+from goals.models import Board
+from goals.stream import BoardEventListener, BoardEventsApp, notify_events
+
+
+class StreamClient:
+    """Клиент потока изменений досок: вызывает ASGI-приложение и собирает отправленные сообщения"""
+
+    def __init__(self, app: BoardEventsApp, headers: list[tuple[bytes, bytes]]):
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self._disconnect = asyncio.Event()
+        scope = {'type': 'http', 'method': 'GET', 'path': '/goals/events', 'headers': headers}
+        self.task = asyncio.ensure_future(app(scope, self._receive, self.messages.put))
+
+    async def _receive(self):
+        await self._disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def body(self) -> bytes:
+        message = await asyncio.wait_for(self.messages.get(), timeout=5)
+        return message['body']
+
+    async def close(self) -> None:
+        self._disconnect.set()
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+def dispatch(*items) -> None:
+    #: Выполняется в потоке sync_to_async: соединение этого потока закрывается, иначе тестовая БД не удаляется
+    try:
+        events.record(*items)
+        EventDispatcher(handlers=[notify_events]).drain()
+    finally:
+        connection.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBoardEventsStream:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, user):
+        self.board: Board = board_factory.create(with_owner=user)
+        self.other_board: Board = board_factory.create()
+
+    def test_auth_required(self):
+        """Тест на endpoint GET: /goals/events
+
+        Производит проверку требований аутентификации.
+        """
+        async def run():
+            client = StreamClient(BoardEventsApp(BoardEventListener()), [])
+            await client.task
+            return await client.messages.get()
+
+        assert asyncio.run(run())['status'] == 403
+
+    def test_board_events(self, auth_client):
+        """Тест на endpoint GET: /goals/events
+
+        Производит проверку доставки событий досок пользователя и отсутствия событий чужих досок.
+        """
+        session = auth_client.cookies[settings.SESSION_COOKIE_NAME].value
+        headers = [(b'cookie', f'{settings.SESSION_COOKIE_NAME}={session}'.encode())]
+
+        async def run():
+            listener = BoardEventListener()
+            client = StreamClient(BoardEventsApp(listener), headers)
+            try:
+                assert (await client.messages.get())['status'] == 200
+                assert await client.body() == b'retry: 3000\n\n'
+                await sync_to_async(dispatch)(
+                    events.event(events.Entity.category, events.Action.created, self.other_board.id, 1),
+                    events.event(events.Entity.category, events.Action.created, self.board.id, 2, title='x'),
+                )
+                return await client.body()
+            finally:
+                await client.close()
+                listener.stop()
+
+        lines = asyncio.run(run()).decode().splitlines()
+        assert lines[1] == 'event: category'
+        data = json.loads(lines[2].removeprefix('data: '))
+        assert lines[0] == f'id: {data["id"]}'
+        assert {key: data[key] for key in ('board', 'action', 'object', 'payload')} == {
+            'board': self.board.id, 'action': 'created', 'object': 2, 'payload': {'title': 'x'},
+        }
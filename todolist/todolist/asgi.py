@@ -13,4 +13,28 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from goals.stream import BoardEventsApp  # noqa: E402 (модели доступны после настройки Django)
+
+#: str: Путь потока изменений досок (Server-Sent Events)
+STREAM_PATH = '/goals/events'
+
+board_events = BoardEventsApp()
+
+
+async def application(scope, receive, send):
+    """Поток изменений досок (долгие соединения с общим слушателем БД) и остальные запросы Django"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                board_events.listener.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] == 'http' and scope['path'].rstrip('/') == STREAM_PATH:
+        await board_events(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
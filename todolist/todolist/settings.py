@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'social_django',
     'django_filters',
@@ -161,6 +162,25 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
 }
 
+#: Максимальное количество вложенных запросов в POST: /batch
+BATCH_MAX_REQUESTS = env.int('BATCH_MAX_REQUESTS', default=25)
+
+# Журнал изменений досок (goals.Event, команда dispatchevents)
+#: Обработчики событий: пути к функциям handler(events), вызываемым для каждой пачки
+GOALS_EVENT_HANDLERS = env.list('GOALS_EVENT_HANDLERS', default=[
+    'goals.events.log_events', 'goals.stream.notify_events',
+])
+#: Срок хранения обработанных событий (секунды)
+GOALS_EVENT_RETENTION = env.int('GOALS_EVENT_RETENTION', default=7 * 24 * 60 * 60)
+#: Канал Postgres NOTIFY, в который публикуются обработанные события (goals.stream.notify_events)
+GOALS_EVENT_CHANNEL = env.str('GOALS_EVENT_CHANNEL', default='goals_events')
+
+# Поток изменений досок (Server-Sent Events, GET: /goals/events в todolist.asgi)
+#: Период отправки комментария для поддержания соединения (секунды)
+GOALS_STREAM_HEARTBEAT = env.float('GOALS_STREAM_HEARTBEAT', default=15.0)
+#: Максимальное количество недоставленных сообщений соединения (при переполнении - resync)
+GOALS_STREAM_QUEUE_SIZE = env.int('GOALS_STREAM_QUEUE_SIZE', default=1000)
+
 if DEBUG:
     import socket
 
@@ -175,3 +195,90 @@ if DEBUG:
     INTERNAL_IPS = [ip[: ip.rfind(".")] + ".1" for ip in ips] + ["127.0.0.1", "10.0.2.2"]
 
 TG_TOKEN = env.str('TG_TOKEN')
+#: Адрес Telegram Bot API (для нагрузочного тестирования - адрес локальной заглушки, см. команду fake_tg)
+TG_API_URL = env.str('TG_API_URL', default='https://api.telegram.org')
+
+#: Таймаут HTTP-запросов к Telegram API (секунды) и количество повторов
+TG_TIMEOUT = env.float('TG_TIMEOUT', default=10)
+TG_MAX_RETRIES = env.int('TG_MAX_RETRIES', default=3)
+
+#: Секретный токен webhook (заголовок X-Telegram-Bot-Api-Secret-Token). Пустая строка - webhook отключен
+TG_WEBHOOK_SECRET = env.str('TG_WEBHOOK_SECRET', default='')
+#: Срок хранения обработанных и окончательно неудачных обновлений webhook (TgUpdate, команда runbotworker), секунды
+BOT_UPDATE_RETENTION = env.int('BOT_UPDATE_RETENTION', default=7 * 24 * 60 * 60)
+
+# Telegram bot runtime (runbot --async)
+#: Максимальное количество одновременно обрабатываемых чатов
+BOT_CONCURRENCY = env.int('BOT_CONCURRENCY', default=32)
+#: Размер пула потоков для работы с БД
+BOT_ORM_WORKERS = env.int('BOT_ORM_WORKERS', default=8)
+#: Максимальное количество полученных, но еще не обработанных обновлений (при достижении - пауза getUpdates)
+BOT_MAX_PENDING = env.int('BOT_MAX_PENDING', default=1000)
+#: Размер кэша состояний чатов (количество Telegram пользователей) и период записи изменений в БД (секунды)
+BOT_STATE_CACHE_SIZE = env.int('BOT_STATE_CACHE_SIZE', default=10_000)
+BOT_STATE_FLUSH_INTERVAL = env.float('BOT_STATE_FLUSH_INTERVAL', default=1)
+#: Срок хранения идентификаторов обработанных обновлений (секунды)
+BOT_PROCESSED_TTL = env.int('BOT_PROCESSED_TTL', default=2 * 24 * 60 * 60)
+
+# Telegram bot outgoing queue
+#: Общее ограничение и ограничение на чат (сообщений в секунду)
+BOT_GLOBAL_RATE = env.float('BOT_GLOBAL_RATE', default=30)
+BOT_CHAT_RATE = env.float('BOT_CHAT_RATE', default=1)
+#: Окно объединения сообщений одному чату (секунды)
+BOT_COALESCE_WINDOW = env.float('BOT_COALESCE_WINDOW', default=0.25)
+#: Количество потоков отправки
+BOT_SENDERS = env.int('BOT_SENDERS', default=4)
+#: Период записи показателей очереди в журнал (секунды)
+BOT_REPORT_INTERVAL = env.float('BOT_REPORT_INTERVAL', default=60)
+#: Срок хранения отправленных и окончательно неотправленных уведомлений (TgOutbox, команда runoutbox), секунды
+BOT_OUTBOX_RETENTION = env.int('BOT_OUTBOX_RETENTION', default=7 * 24 * 60 * 60)
+
+# Telegram bot observability (runbot)
+#: Адрес и порт HTTP-сервера показателей в формате Prometheus (GET /metrics). Порт 0 - сервер не запускается
+BOT_METRICS_HOST = env.str('BOT_METRICS_HOST', default='127.0.0.1')
+BOT_METRICS_PORT = env.int('BOT_METRICS_PORT', default=0)
+#: Формат журнала бота: json (одна строка JSON на запись) или text
+BOT_LOG_FORMAT = env.str('BOT_LOG_FORMAT', default='json')
+#: Уровень журнала бота
+BOT_LOG_LEVEL = env.str('BOT_LOG_LEVEL', default='INFO')
+#: Доля записываемых событий обработки обновлений (остальные записи журнала не отбрасываются)
+BOT_LOG_SAMPLE_RATE = env.float('BOT_LOG_SAMPLE_RATE', default=0.01)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'bot.log.JsonFormatter',
+        },
+        'text': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'filters': {
+        'sample': {
+            '()': 'bot.log.SampleFilter',
+            'rate': BOT_LOG_SAMPLE_RATE,
+        },
+    },
+    'handlers': {
+        'bot': {
+            'class': 'logging.StreamHandler',
+            'formatter': BOT_LOG_FORMAT,
+            'filters': ['sample'],
+        },
+    },
+    'loggers': {
+        'bot': {
+            'handlers': ['bot'],
+            'level': BOT_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
+# Telegram bot reminders (runreminders)
+#: За сколько секунд до срока цели отправляется напоминание
+BOT_REMINDER_LEAD = env.int('BOT_REMINDER_LEAD', default=24 * 60 * 60)
+#: Длина окна, загружаемого из БД за один раз (секунды)
+BOT_REMINDER_WINDOW = env.int('BOT_REMINDER_WINDOW', default=60)
@@ -5,6 +5,8 @@ from django.conf.urls.static import static
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from core.views import BatchView
+
 
 @api_view(['GET'])
 def health_check(request):
@@ -13,6 +15,7 @@ def health_check(request):
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('batch', BatchView.as_view(), name='batch'),
     path('bot/', include('bot.urls')),
     path('core/', include('core.urls')),
     path('goals/', include('goals.urls')),